@@ -5,14 +5,18 @@ Main Streamlit application for hackathon submission
 import streamlit as st
 import os
 from utils import (
-    parse_claim, summarize_claim, detect_bias, init_db, 
+    parse_claim, summarize_claim, summarize_claim_chunked, summarize_claim_hedged,
+    detect_bias,
     add_anon_data, get_claim_features
 )
+from bias_db import bias_db
+from bias_chart import bias_charts, chart_available
 from models import (
-    train_appeal_predictor, load_appeal_predictor, predict_appeal,
+    train_appeal_predictor, load_appeal_predictor, predict_appeal, appeal_models,
     dedalus_agent_summarize, grok_real_time_analysis,
     knot_payment_link, capital_one_impact, amplitude_track_event
 )
+from summarizer import warmup_summarizer, summarizer_status
 
 # Page configuration
 st.set_page_config(
@@ -56,18 +60,20 @@ if 'db_initialized' not in st.session_state:
     st.session_state.db_initialized = False
 if 'model_loaded' not in st.session_state:
     st.session_state.model_loaded = False
-if 'model' not in st.session_state:
-    st.session_state.model = None
-if 'db_conn' not in st.session_state:
-    st.session_state.db_conn = None
 
 # Auto-initialize database on first load
 if not st.session_state.db_initialized:
     try:
-        st.session_state.db_conn = init_db()
+        # Sessions share the process-wide connection pool instead of holding a connection each
+        bias_db.open()
         st.session_state.db_initialized = True
     except Exception as e:
-        st.session_state.db_conn = None
+        st.session_state.db_initialized = False
+
+# Start loading the shared local summarizer (no-op unless SUMMARIZER_WARMUP is set)
+if 'summarizer_warmup' not in st.session_state:
+    warmup_summarizer()
+    st.session_state.summarizer_warmup = True
 
 # Header
 st.markdown('<h1 class="main-header">⚖️ ClaimEquity AI</h1>', unsafe_allow_html=True)
@@ -97,6 +103,9 @@ with st.sidebar:
     st.header("📊 Settings")
     use_xai = st.checkbox("Use xAI Grok for Summarization", value=bool(xai_key), help="Uses your xAI credits for better summaries")
     use_openai = st.checkbox("Use OpenAI for Summarization", value=False, help="Alternative to xAI")
+    summarize_by_section = st.checkbox("Summarize Long Claims by Section", value=False, help="Summarizes every section of multi-page claims instead of truncating them")
+    race_providers = st.checkbox("Race Providers for Faster Fallback", value=False, help="Starts the next summarization provider if the current one is slow")
+    fast_summary = st.checkbox("Fast Extractive Summary (No AI Model)", value=False, help="Picks the key sentences from the claim in milliseconds instead of generating a summary")
     enable_analytics = st.checkbox("Enable Analytics", value=bool(amplitude_key))
     
     # Database status
@@ -105,12 +114,16 @@ with st.sidebar:
     else:
         if st.button("Initialize Database"):
             try:
-                st.session_state.db_conn = init_db()
+                bias_db.open()
                 st.session_state.db_initialized = True
                 st.success("✅ Database initialized!")
             except Exception as e:
                 st.error(f"Database initialization error: {e}")
     
+    # Local summarizer status (shared across all sessions in this process)
+    summarizer_state = summarizer_status()
+    st.caption(f"Local summarizer: {summarizer_state['state']}")
+    
     st.divider()
     st.caption("Built for HackPrinceton Fall 2025")
     st.caption("Healthcare Track | AI Innovation | Financial Hack")
@@ -142,14 +155,21 @@ with tab1:
             
             # Summarize
             st.subheader("📝 Claim Summary")
-            with st.spinner("Generating summary with xAI Grok..." if use_xai else "Generating summary..."):
-                summary, used_xai = summarize_claim(
-                    claim_text,
+            with st.spinner("Generating summary with xAI Grok..." if use_xai and not fast_summary else "Generating summary..."):
+                provider_options = dict(
                     use_openai=use_openai and bool(openai_key),
                     api_key=openai_key if use_openai else None,
                     use_xai=use_xai and bool(xai_key),
                     xai_key=xai_key if use_xai else None
                 )
+                if fast_summary:
+                    summary, used_xai = summarize_claim(claim_text, mode="extractive")
+                elif summarize_by_section:
+                    summary, used_xai, _ = summarize_claim_chunked(claim_text, **provider_options)
+                elif race_providers:
+                    summary, used_xai, _ = summarize_claim_hedged(claim_text, **provider_options)
+                else:
+                    summary, used_xai = summarize_claim(claim_text, **provider_options)
                 if used_xai:
                     st.success("✅ Summary generated using xAI Grok API")
                 elif use_xai and not used_xai:
@@ -178,10 +198,10 @@ with tab2:
     st.header("🔮 Predict Appeal Success Probability")
     st.caption("ML-powered prediction based on claim characteristics and demographics")
     
-    # Load or train model
+    # Shared in-memory model, hot-reloaded when appeal_model.pkl changes
     if not st.session_state.model_loaded:
         with st.spinner("Loading ML model..."):
-            st.session_state.model = load_appeal_predictor()
+            appeal_models.start()
             st.session_state.model_loaded = True
     
     # User input form
@@ -204,7 +224,11 @@ with tab2:
     )
     
     if st.button("🔮 Predict Appeal Success", type="primary"):
-        if st.session_state.model:
+        try:
+            model = appeal_models.get()
+        except Exception:
+            model = None
+        if model:
             user_data = {
                 'age': age,
                 'zip': int(zip_code) if zip_code.isdigit() else 10000,
@@ -219,7 +243,7 @@ with tab2:
             
             with st.spinner("Running prediction..."):
                 success_prob = predict_appeal(
-                    st.session_state.model,
+                    model,
                     user_data,
                     claim_features
                 )
@@ -255,12 +279,10 @@ with tab3:
     st.header("🚨 Bias Detection Engine")
     st.caption("Anonymized pattern analysis to detect systemic biases in claim denials")
     
-    # Get database connection
-    conn = st.session_state.get('db_conn')
-    if not conn:
+    # Make sure the database exists; reads and writes borrow pooled connections
+    if not st.session_state.db_initialized:
         try:
-            conn = init_db()
-            st.session_state.db_conn = conn
+            bias_db.open()
             st.session_state.db_initialized = True
         except Exception as e:
             st.error(f"Database error: {e}")
@@ -294,7 +316,8 @@ with tab3:
             'amount': check_amount,
             'outcome': 0 if check_outcome == "Denied" else 1
         }
-        add_anon_data(conn, anon_data)
+        with bias_db.connection() as conn:
+            add_anon_data(conn, anon_data)
         st.success("✅ Data added (anonymized and hashed)")
         
         if enable_analytics and amplitude_key:
@@ -308,12 +331,16 @@ with tab3:
         }
         
         with st.spinner("Analyzing patterns..."):
-            bias_msg, figure_path = detect_bias(conn, user_data)
+            with bias_db.connection() as conn:
+                bias_msg, chart_version = detect_bias(conn, user_data)
+                chart_png = bias_charts.get(conn, chart_version)[0] if chart_version and chart_available() else None
         
         st.markdown(f"### {bias_msg}")
         
-        if figure_path and os.path.exists(figure_path):
-            st.image(figure_path, caption="Bias Pattern Visualization")
+        if chart_png:
+            st.image(chart_png, caption="Bias Pattern Visualization")
+        elif chart_version and not chart_available():
+            st.info("Install matplotlib (pip install matplotlib) to see the bias pattern chart.")
         
         # Real-time Grok analysis
         if xai_key:
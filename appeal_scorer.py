@@ -0,0 +1,248 @@
+"""
+Dependency-free inference for the appeal predictor
+Scores exported logistic-regression weights with NumPy only, so prediction
+workers can serve without importing scikit-learn or pandas
+"""
+import io
+import json
+import os
+import tempfile
+
+import numpy as np
+
+
+# Column order the appeal predictor is trained and scored on
+APPEAL_FEATURE_COLS = ['age', 'zip', 'claim_amount', 'has_prior_auth',
+                       'denial_reason_code', 'text_length', 'has_icd_code']
+# Defaults used by predict_appeal when a value is missing; batch inputs may
+# also use 'amount' (the user_data key) for claim_amount
+APPEAL_FEATURE_DEFAULTS = {
+    'age': 50, 'zip': 10000, 'claim_amount': 5000, 'has_prior_auth': 0,
+    'denial_reason_code': 1, 'text_length': 1000, 'has_icd_code': 0
+}
+
+SCORER_FORMAT_VERSION = 1
+SCORER_EXTENSIONS = ('.npz', '.json')
+
+
+def is_scorer_path(path):
+    """True if path names an exported scorer (.npz/.json) rather than a pickle"""
+    return str(path).lower().endswith(SCORER_EXTENSIONS)
+
+
+def _to_float(value, default):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if number != number else number
+
+
+def _feature_column(values, name):
+    """Convert one input column to float64, filling missing/invalid values with the default"""
+    default = APPEAL_FEATURE_DEFAULTS[name]
+    try:
+        column = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        # Mixed input such as '' or None; coerce element by element
+        column = np.fromiter((_to_float(v, default) for v in values), dtype=np.float64)
+    if np.isnan(column).any():
+        column = np.where(np.isnan(column), default, column)
+    return column
+
+
+def build_feature_matrix(claims):
+    """
+    Build the appeal feature matrix for many claims at once
+
+    Args:
+        claims: One of
+            - list of dicts with the APPEAL_FEATURE_COLS keys (or 'amount' for
+              claim_amount); missing keys use APPEAL_FEATURE_DEFAULTS
+            - dict of columns {feature: list/array}; missing columns use defaults
+            - 2-D array with columns in APPEAL_FEATURE_COLS order
+
+    Returns:
+        numpy.ndarray: float64 matrix of shape (n_claims, len(APPEAL_FEATURE_COLS))
+    """
+    if isinstance(claims, np.ndarray):
+        matrix = np.asarray(claims, dtype=np.float64)
+        if matrix.ndim != 2 or matrix.shape[1] != len(APPEAL_FEATURE_COLS):
+            raise ValueError(f"Expected an (n, {len(APPEAL_FEATURE_COLS)}) array")
+        return matrix
+
+    if isinstance(claims, dict):
+        columns = dict(claims)
+        if 'claim_amount' not in columns and 'amount' in columns:
+            columns['claim_amount'] = columns['amount']
+        lengths = {len(v) for v in columns.values() if hasattr(v, '__len__') and not isinstance(v, str)}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same length")
+        n = lengths.pop() if lengths else 0
+        matrix = np.empty((n, len(APPEAL_FEATURE_COLS)), dtype=np.float64)
+        for j, name in enumerate(APPEAL_FEATURE_COLS):
+            if name in columns:
+                matrix[:, j] = _feature_column(columns[name], name)
+            else:
+                matrix[:, j] = APPEAL_FEATURE_DEFAULTS[name]
+        return matrix
+
+    claims = list(claims)
+    matrix = np.empty((len(claims), len(APPEAL_FEATURE_COLS)), dtype=np.float64)
+    for j, name in enumerate(APPEAL_FEATURE_COLS):
+        default = APPEAL_FEATURE_DEFAULTS[name]
+        if name == 'claim_amount':
+            values = [c.get('claim_amount', c.get('amount', default)) for c in claims]
+        else:
+            values = [c.get(name, default) for c in claims]
+        matrix[:, j] = _feature_column(values, name)
+    return matrix
+
+
+def _expit(z):
+    """Logistic sigmoid; agrees with scipy.special.expit to within 1 ulp"""
+    with np.errstate(over='ignore'):
+        # exp(-z) overflowing to inf for very negative z correctly gives 0
+        return 1.0 / (1.0 + np.exp(-z))
+
+
+class LinearAppealScorer:
+    """
+    NumPy-only replacement for a fitted binary LogisticRegression
+
+    predict_proba follows sklearn's binary path (X @ coef.T + intercept, then
+    the logistic sigmoid), so results match the exported model to within
+    floating-point rounding and rounded percentages are identical. The scorer
+    can be passed anywhere the sklearn model is used (predict_appeal,
+    predict_appeal_batch, AppealModelHolder).
+    """
+
+    def __init__(self, coef, intercept, feature_names=None, classes=(0, 1)):
+        self.coef_ = np.asarray(coef, dtype=np.float64).reshape(1, -1)
+        self.intercept_ = np.asarray(intercept, dtype=np.float64).reshape(1)
+        self.feature_names = list(feature_names or APPEAL_FEATURE_COLS)
+        self.classes_ = np.asarray(classes)
+        if self.coef_.shape[1] != len(self.feature_names):
+            raise ValueError("coef and feature_names lengths differ")
+
+    @classmethod
+    def from_model(cls, model):
+        """Build a scorer from a fitted binary sklearn LogisticRegression"""
+        if np.size(model.classes_) != 2:
+            raise ValueError("Only binary models can be exported")
+        feature_names = getattr(model, 'feature_names_in_', None)
+        return cls(model.coef_, model.intercept_,
+                   list(feature_names) if feature_names is not None else APPEAL_FEATURE_COLS,
+                   model.classes_.tolist())
+
+    def decision_function(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        return (X @ self.coef_.T + self.intercept_).ravel()
+
+    def predict_proba(self, X):
+        """
+        Class probabilities, shape (n_samples, 2)
+
+        Args:
+            X: (n, n_features) array or DataFrame in feature_names order
+        """
+        prob = _expit(self.decision_function(X))
+        return np.stack([1 - prob, prob], axis=1)
+
+    def predict(self, X):
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+    def score_claims(self, claims):
+        """
+        Appeal success probabilities for many claims
+
+        Args:
+            claims: Claims in any format accepted by build_feature_matrix
+
+        Returns:
+            numpy.ndarray: Success probabilities (0-100%), rounded to 2 decimals
+        """
+        X = build_feature_matrix(claims)
+        if len(X) == 0:
+            return np.zeros(0)
+        return np.round(self.predict_proba(X)[:, 1] * 100, 2)
+
+    def to_dict(self):
+        return {
+            "format_version": SCORER_FORMAT_VERSION,
+            "feature_names": self.feature_names,
+            "coef": self.coef_.ravel().tolist(),
+            "intercept": float(self.intercept_[0]),
+            "classes": self.classes_.tolist()
+        }
+
+    def to_bytes(self, fmt):
+        """Serialize as 'npz' or 'json' (floats round-trip exactly in both)"""
+        if fmt == 'json':
+            return json.dumps(self.to_dict(), indent=2).encode('utf-8')
+        if fmt == 'npz':
+            buffer = io.BytesIO()
+            np.savez(buffer, format_version=SCORER_FORMAT_VERSION, coef=self.coef_.ravel(),
+                     intercept=self.intercept_, feature_names=np.array(self.feature_names),
+                     classes=self.classes_)
+            return buffer.getvalue()
+        raise ValueError(f"Unknown scorer format: {fmt}")
+
+
+def _format_for(path):
+    return 'json' if str(path).lower().endswith('.json') else 'npz'
+
+
+def loads_scorer(content, path):
+    """
+    Load a scorer from bytes; the format is taken from path's extension
+
+    Args:
+        content: File contents
+        path: File name (.npz or .json)
+
+    Returns:
+        LinearAppealScorer
+    """
+    if _format_for(path) == 'json':
+        data = json.loads(content)
+    else:
+        with np.load(io.BytesIO(content), allow_pickle=False) as npz:
+            data = {key: npz[key] for key in npz.files}
+        data['feature_names'] = [str(name) for name in data['feature_names']]
+        data['format_version'] = int(data['format_version'])
+    if data['format_version'] != SCORER_FORMAT_VERSION:
+        raise ValueError(f"Unsupported scorer format version: {data['format_version']}")
+    return LinearAppealScorer(data['coef'], data['intercept'], data['feature_names'], data['classes'])
+
+
+def load_scorer(path):
+    """Load an exported scorer from a .npz or .json file"""
+    with open(path, 'rb') as f:
+        return loads_scorer(f.read(), path)
+
+
+def export_scorer(model, path):
+    """
+    Export a fitted LogisticRegression (or scorer) to a .npz/.json file
+
+    The file is written to a temporary file and moved into place, so
+    hot-reloading workers never read a partial export.
+
+    Returns:
+        LinearAppealScorer: The exported scorer
+    """
+    scorer = model if isinstance(model, LinearAppealScorer) else LinearAppealScorer.from_model(model)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=os.path.splitext(path)[1])
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(scorer.to_bytes(_format_for(path)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return scorer
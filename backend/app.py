@@ -2,20 +2,36 @@
 Flask backend API for ClaimEquity AI
 Provides REST API endpoints for the React frontend
 """
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import os
 import sys
+import json
+import numpy as np
 
 # Add parent directory to path to import utils and models
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils import parse_claim, summarize_claim, detect_bias, init_db, add_anon_data, get_claim_features
+from utils import (
+    summarize_claim, summarize_claim_chunked, summarize_claim_hedged,
+    stream_claim_summary, iter_text_chunks, SUMMARY_MODES, detect_bias, add_anon_data, bias_message, is_bias_alert
+)
 from models import (
-    train_appeal_predictor, load_appeal_predictor, predict_appeal,
+    train_appeal_predictor, load_appeal_predictor, predict_appeal, predict_appeal_batch, predict_appeal_surface,
+    appeal_models, ModelNotReadyError,
     dedalus_agent_summarize, grok_real_time_analysis,
     knot_payment_link, capital_one_impact, amplitude_track_event
 )
+from summarizer import warmup_summarizer, summarizer_status
+from summary_cache import summary_cache_stats
+from circuit_breaker import breaker_status
+from claim_extractor import claim_feature_columns, CLAIM_FEATURE_COLS
+from model_registry import model_registry
+from online_updater import online_updater, start_online_updates
+from bias_db import bias_db, bias_data_version, bias_patterns, bias_cell, bias_summary
+from bias_chart import bias_charts, chart_available
+from bias_ingest import ingest_stream, format_for
+from feature_store import feature_store, resolve_claim, ClaimNotFoundError
 
 app = Flask(__name__)
 # Enable CORS for React frontend with proper configuration
@@ -27,14 +43,83 @@ CORS(app, resources={
     }
 })
 
-# Initialize database on startup
-db_conn = init_db()
+def sse_response(events):
+    """
+    Stream event dicts to the client as Server-Sent Events
+
+    Each event is sent as one `data:` line of JSON. A "start" event goes out
+    immediately so the client gets its first byte before any model work.
+    """
+    def generate():
+        yield f"data: {json.dumps({'type': 'start'})}\n\n"
+        try:
+            for event in events:
+                yield f"data: {json.dumps(event)}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# Default what-if grid for /api/predict-appeal/surface: every age 18-100, amounts in $1,000 steps
+SURFACE_DEFAULT_AXES = {
+    "age": {"min": 18, "max": 100, "steps": 83},
+    "amount": {"min": 0, "max": 50000, "steps": 51}
+}
+
+def surface_axis(data, name):
+    """Evenly spaced grid axis from a {"min", "max", "steps"} request object"""
+    spec = {**SURFACE_DEFAULT_AXES[name], **(data.get(name) or {})}
+    steps = int(spec["steps"])
+    if steps < 1:
+        raise ValueError(f"{name}.steps must be at least 1")
+    return np.linspace(float(spec["min"]), float(spec["max"]), steps)
+
+# Open (and migrate) the bias database on startup; requests borrow pooled connections
+bias_db.open()
+
+# Load the local summarizer in the background if SUMMARIZER_WARMUP is set
+warmup_summarizer()
+
+# Load the appeal model (training it in the background if missing) and watch for updates
+appeal_models.start()
+
+# Fold shared outcomes into the appeal model on a schedule if APPEAL_ONLINE_UPDATES is set
+start_online_updates()
 
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
     return jsonify({"status": "healthy", "service": "ClaimEquity AI API"})
 
+@app.route('/api/models/status', methods=['GET'])
+def models_status():
+    """Report load state of locally served models"""
+    return jsonify({
+        "summarizer": summarizer_status(),
+        "appeal_model": appeal_models.status(),
+        "registry": model_registry.status(),
+        "online_updates": online_updater.status()
+    })
+
+@app.route('/api/cache/status', methods=['GET'])
+def cache_status():
+    """Report summary cache, feature store and bias chart hit counters, and bias database pool usage"""
+    return jsonify({
+        "summary_cache": summary_cache_stats(),
+        "feature_store": feature_store.stats(),
+        "bias_db": bias_db.status(),
+        "bias_chart": bias_charts.stats()
+    })
+
+@app.route('/api/providers/status', methods=['GET'])
+def providers_status():
+    """Report circuit breaker state for external LLM providers"""
+    return jsonify({"providers": breaker_status()})
+
 @app.route('/api/parse-claim', methods=['POST'])
 def parse_claim_endpoint():
     """Parse uploaded PDF claim file"""
@@ -46,53 +131,126 @@ def parse_claim_endpoint():
         if file.filename == '':
             return jsonify({"error": "No file selected"}), 400
         
-        # Parse the PDF
-        claim_text = parse_claim(file)
-        
-        if claim_text.startswith("Error"):
-            return jsonify({"error": claim_text}), 400
-        
-        # Extract features
-        claim_features = get_claim_features(claim_text)
+        # Parse the PDF and extract features, unless this file was seen before
+        try:
+            record, cached = feature_store.ingest_pdf(file.read())
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
+        # Later requests can send claim_id instead of the text
         return jsonify({
             "success": True,
-            "claim_text": claim_text,
-            "features": claim_features
+            "claim_id": record["claim_id"],
+            "claim_text": record["claim_text"],
+            "features": record["features"],
+            "fields": record["fields"],
+            "cached": cached
         })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/claims/<claim_id>', methods=['GET'])
+def claim_endpoint(claim_id):
+    """Return a stored claim's features and parsed fields (text with ?include_text=1)"""
+    try:
+        record = dict(feature_store.require(claim_id))
+        if request.args.get('include_text', '0').lower() not in ('1', 'true', 'yes'):
+            record.pop("claim_text")
+        return jsonify({"success": True, **record})
+    except ClaimNotFoundError as e:
+        return jsonify({"error": e.args[0]}), 404
+
 @app.route('/api/summarize', methods=['POST'])
 def summarize_endpoint():
     """Summarize claim text"""
     try:
         data = request.json
-        claim_text = data.get('claim_text', '')
+        claim_text, _ = resolve_claim(data)
         use_openai = data.get('use_openai', False)
         openai_key = data.get('openai_key', None)
         use_xai = data.get('use_xai', False)
         xai_key = data.get('xai_key', None)
+        chunked = data.get('chunked', False)
+        hedged = data.get('hedged', False)
+        mode = data.get('mode', 'auto')
         
         if not claim_text:
             return jsonify({"error": "No claim text provided"}), 400
+        if mode not in SUMMARY_MODES:
+            return jsonify({"error": f"Unknown summary mode '{mode}'"}), 400
+        
+        # Extractive mode is already fast and never truncates; skip hedging/chunking
+        if hedged and mode == 'auto':
+            # Race providers instead of waiting out each timeout in turn
+            summary, used_xai, hedging = summarize_claim_hedged(
+                claim_text,
+                use_openai=use_openai,
+                api_key=openai_key,
+                use_xai=use_xai,
+                xai_key=xai_key
+            )
+            return jsonify({
+                "success": True,
+                "summary": summary,
+                "used_xai": used_xai,
+                "hedging": hedging
+            })
+        
+        if chunked and mode == 'auto':
+            # Map-reduce over sections instead of truncating long claims
+            summary, used_xai, chunking = summarize_claim_chunked(
+                claim_text,
+                use_openai=use_openai,
+                api_key=openai_key,
+                use_xai=use_xai,
+                xai_key=xai_key
+            )
+            return jsonify({
+                "success": True,
+                "summary": summary,
+                "used_xai": used_xai,
+                "chunking": chunking
+            })
         
         summary, used_xai = summarize_claim(
             claim_text,
             use_openai=use_openai,
             api_key=openai_key,
             use_xai=use_xai,
-            xai_key=xai_key
+            xai_key=xai_key,
+            mode=mode
         )
         
         return jsonify({
             "success": True,
             "summary": summary,
-            "used_xai": used_xai
+            "used_xai": used_xai,
+            "mode": mode
         })
+    except ClaimNotFoundError as e:
+        return jsonify({"error": e.args[0]}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/summarize/stream', methods=['POST'])
+def summarize_stream_endpoint():
+    """Stream a claim summary as Server-Sent Events"""
+    data = request.json or {}
+    try:
+        claim_text, _ = resolve_claim(data)
+    except ClaimNotFoundError as e:
+        return jsonify({"error": e.args[0]}), 404
+    if not claim_text:
+        return jsonify({"error": "No claim text provided"}), 400
+    
+    return sse_response(stream_claim_summary(
+        claim_text,
+        use_openai=data.get('use_openai', False),
+        api_key=data.get('openai_key', None),
+        use_xai=data.get('use_xai', False),
+        xai_key=data.get('xai_key', None)
+    ))
+
 @app.route('/api/predict-appeal', methods=['POST'])
 def predict_appeal_endpoint():
     """Predict appeal success probability"""
@@ -105,13 +263,15 @@ def predict_appeal_endpoint():
             'demo': f"age_{data.get('age', 50)//10*10}"
         }
         
-        claim_features = data.get('claim_features', {})
+        # Features of an uploaded claim come from the store; explicit values override them
+        _, stored_features = resolve_claim(data)
+        claim_features = {**(stored_features or {}), **(data.get('claim_features') or {})}
         has_prior_auth = data.get('has_prior_auth', False)
         if has_prior_auth:
             claim_features['has_prior_auth'] = 1
         
-        # Load model
-        model = load_appeal_predictor()
+        # Current in-memory model (hot-reloaded when appeal_model.pkl changes)
+        model = appeal_models.get()
         
         # Predict
         success_prob = predict_appeal(model, user_data, claim_features)
@@ -121,6 +281,81 @@ def predict_appeal_endpoint():
             "probability": success_prob,
             "user_data": user_data
         })
+    except ClaimNotFoundError as e:
+        return jsonify({"error": e.args[0]}), 404
+    except ModelNotReadyError as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/predict-appeal/batch', methods=['POST'])
+def predict_appeal_batch_endpoint():
+    """Predict appeal success for many claims in one vectorized call"""
+    try:
+        data = request.json or {}
+        # Either row-oriented {"claims": [{...}, ...]} or columnar {"columns": {"age": [...], ...}};
+        # "claim_texts" derives text features and "claim_ids" reads stored ones, with any
+        # "columns" values taking precedence
+        if data.get('claim_ids'):
+            stored = [feature_store.require(claim_id)["features"] for claim_id in data['claim_ids']]
+            claims = {name: [features[name] for features in stored] for name in CLAIM_FEATURE_COLS}
+            claims.update(data.get('columns') or {})
+        elif data.get('claim_texts'):
+            claims = claim_feature_columns(data['claim_texts'])
+            claims.update(data.get('columns') or {})
+        else:
+            claims = data.get('columns') if 'columns' in data else data.get('claims')
+        if not claims:
+            return jsonify({"error": "Provide 'claims' (list of objects), 'columns' (object of arrays), "
+                                     "'claim_texts' or 'claim_ids'"}), 400
+        
+        probabilities = predict_appeal_batch(appeal_models.get(), claims)
+        
+        return jsonify({
+            "success": True,
+            "count": len(probabilities),
+            "probabilities": probabilities.tolist()
+        })
+    except ClaimNotFoundError as e:
+        return jsonify({"error": e.args[0]}), 404
+    except ModelNotReadyError as e:
+        return jsonify({"error": str(e)}), 503
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/predict-appeal/surface', methods=['POST'])
+def predict_appeal_surface_endpoint():
+    """Predict appeal success over an age x amount grid for client-side what-if sliders"""
+    try:
+        data = request.json or {}
+        _, stored_features = resolve_claim(data)
+        fixed = {**(stored_features or {}), **(data.get('claim_features') or {})}
+        fixed['zip'] = data.get('zip', 10000)
+        if data.get('has_prior_auth'):
+            fixed['has_prior_auth'] = 1
+        # Both prior-auth layers unless the client only wants the claim's own value
+        prior_auth = [0, 1] if data.get('include_prior_auth', True) else [int(fixed.get('has_prior_auth', 0))]
+        
+        ages = surface_axis(data, 'age')
+        amounts = surface_axis(data, 'amount')
+        probabilities = predict_appeal_surface(appeal_models.get(), fixed, ages, amounts, prior_auth)
+        
+        return jsonify({
+            "success": True,
+            "ages": ages.tolist(),
+            "amounts": amounts.tolist(),
+            "prior_auth": prior_auth,
+            # probabilities[prior_auth layer][age index][amount index]
+            "probabilities": probabilities.tolist()
+        })
+    except ClaimNotFoundError as e:
+        return jsonify({"error": e.args[0]}), 404
+    except ModelNotReadyError as e:
+        return jsonify({"error": str(e)}), 503
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -134,22 +369,101 @@ def detect_bias_endpoint():
             'demo': data.get('demo', '')
         }
         
-        bias_msg, figure_path = detect_bias(db_conn, user_data)
+        with bias_db.connection() as conn:
+            bias_msg, chart_version = detect_bias(conn, user_data)
         
         result = {
             "success": True,
             "bias_message": bias_msg,
-            "figure_path": figure_path if figure_path else None
+            # Versioned chart URL: the browser refetches only when the data changed
+            "figure_path": f"/api/bias-heatmap?v={chart_version}" if chart_version else None,
+            "chart_version": chart_version
         }
         
-        # If figure exists, include it as base64 or path
-        if figure_path and os.path.exists(figure_path):
+        # Server-side charts need matplotlib; without it clients use /api/bias-patterns
+        if chart_version and chart_available():
             result["has_figure"] = True
         
         return jsonify(result)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Largest page /api/bias-patterns returns
+BIAS_PATTERNS_MAX_LIMIT = 100
+
+@app.route('/api/bias-patterns', methods=['GET'])
+def bias_patterns_endpoint():
+    """
+    Bias aggregates as compact JSON for client-side charts
+
+    Query parameters: demo and zip (the user's group), filter_demo,
+    zip_prefix, min_records, limit and offset (pagination, largest groups
+    first). The ETag is the bias data version.
+    """
+    try:
+        args = request.args
+        limit = min(max(args.get('limit', 10, type=int), 1), BIAS_PATTERNS_MAX_LIMIT)
+        offset = max(args.get('offset', 0, type=int), 0)
+        min_records = max(args.get('min_records', 1, type=int), 1)
+        user_demo, user_zip = args.get('demo'), args.get('zip')
+        
+        with bias_db.connection() as conn:
+            version = bias_data_version(conn)
+            if request.if_none_match.contains(version):
+                response = Response(status=304)
+                response.set_etag(version)
+                return response
+            
+            total, rows = bias_patterns(conn, limit, offset, args.get('filter_demo'), args.get('zip_prefix'),
+                                        min_records)
+            records, groups, success_rate, avg_amount = bias_summary(conn)
+            cell = bias_cell(conn, user_demo, user_zip) if user_demo and user_zip else None
+        
+        result = {
+            "success": True,
+            "version": version,
+            "summary": {
+                "total_records": records,
+                "groups": groups,
+                "success_rate": round(success_rate * 100, 1) if success_rate is not None else None,
+                "avg_amount": round(avg_amount, 2) if avg_amount is not None else None
+            },
+            "patterns": {
+                "total": total,
+                "limit": limit,
+                "offset": offset,
+                # Success rates are percentages
+                "columns": ["demo", "zip", "denial_count", "success_rate", "avg_amount"],
+                "rows": [[demo, zip_code, count, round(rate * 100, 1), round(amount, 2)]
+                         for demo, zip_code, count, rate, amount in rows]
+            },
+            "user_cell": None
+        }
+        if user_demo and user_zip:
+            if records == 0:
+                result["bias_message"] = "No data available yet. Share anonymized data to build bias detection."
+            elif cell is None:
+                result["bias_message"] = bias_message(user_demo, user_zip)
+            else:
+                count, rate, amount, rank = cell
+                result["bias_message"] = bias_message(user_demo, user_zip, count, rate)
+                result["user_cell"] = {
+                    "demo": user_demo,
+                    "zip": user_zip,
+                    "denial_count": count,
+                    "success_rate": round(rate * 100, 1),
+                    "avg_amount": round(amount, 2),
+                    "rank": rank,
+                    "alert": is_bias_alert(count, rate)
+                }
+        
+        response = jsonify(result)
+        response.set_etag(version)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/share-anon-data', methods=['POST'])
 def share_anon_data_endpoint():
     """Add anonymized data for bias detection"""
@@ -163,7 +477,8 @@ def share_anon_data_endpoint():
             'outcome': 1 if data.get('outcome') == 'Approved' else 0
         }
         
-        add_anon_data(db_conn, anon_data)
+        with bias_db.connection() as conn:
+            add_anon_data(conn, anon_data)
         
         return jsonify({
             "success": True,
@@ -172,12 +487,31 @@ def share_anon_data_endpoint():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/share-anon-data/bulk', methods=['POST'])
+def share_anon_data_bulk_endpoint():
+    """Stream NDJSON or CSV anonymized records into the bias database in batched transactions"""
+    try:
+        # ?format= wins over the Content-Type (application/x-ndjson or text/csv)
+        fmt = request.args.get('format') or format_for(content_type=request.content_type)
+        if fmt is None:
+            return jsonify({"error": "Send application/x-ndjson or text/csv, or pass ?format=ndjson|csv"}), 415
+        
+        # The body is read line by line, never buffered whole
+        with bias_db.connection() as conn:
+            stats = ingest_stream(conn, request.stream, fmt)
+        
+        return jsonify({"success": True, **stats})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/generate-appeal', methods=['POST'])
 def generate_appeal_endpoint():
     """Generate appeal letter using AI agent"""
     try:
         data = request.json
-        claim_text = data.get('claim_text', '')
+        claim_text, _ = resolve_claim(data)
         additional_notes = data.get('additional_notes', '')
         dedalus_key = data.get('dedalus_key', None)
         
@@ -188,9 +522,32 @@ def generate_appeal_endpoint():
             "success": True,
             "appeal_letter": appeal_letter
         })
+    except ClaimNotFoundError as e:
+        return jsonify({"error": e.args[0]}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/generate-appeal/stream', methods=['POST'])
+def generate_appeal_stream_endpoint():
+    """Stream an appeal letter as Server-Sent Events"""
+    data = request.json or {}
+    try:
+        claim_text, _ = resolve_claim(data)
+    except ClaimNotFoundError as e:
+        return jsonify({"error": e.args[0]}), 404
+    additional_notes = data.get('additional_notes', '')
+    dedalus_key = data.get('dedalus_key', None)
+    
+    def events():
+        # Dedalus has no token streaming API; deliver the finished letter in chunks
+        full_context = f"{claim_text}\n\nAdditional Notes: {additional_notes}"
+        appeal_letter = dedalus_agent_summarize(full_context, dedalus_key)
+        for piece in iter_text_chunks(appeal_letter):
+            yield {"type": "delta", "text": piece}
+        yield {"type": "done", "provider": "dedalus" if dedalus_key else "template"}
+    
+    return sse_response(events())
+
 @app.route('/api/grok-analysis', methods=['POST'])
 def grok_analysis_endpoint():
     """Get real-time Grok analysis"""
@@ -230,13 +587,23 @@ def financial_impact_endpoint():
 
 @app.route('/api/bias-heatmap', methods=['GET'])
 def bias_heatmap_endpoint():
-    """Get bias heatmap image"""
+    """Get bias heatmap image (rendered in memory, cached per data version, ETag-validated)"""
     try:
-        figure_path = 'bias_heatmap.png'
-        if os.path.exists(figure_path):
-            return send_file(figure_path, mimetype='image/png')
-        else:
-            return jsonify({"error": "Heatmap not available"}), 404
+        with bias_db.connection() as conn:
+            version = bias_data_version(conn)
+            # The ETag is the data version, so a revalidation costs one query and no rendering
+            if request.if_none_match.contains(version):
+                response = Response(status=304)
+            elif not chart_available():
+                return jsonify({"error": "Server-side charts need matplotlib; use /api/bias-patterns"}), 501
+            else:
+                png, version = bias_charts.get(conn, version)
+                if png is None:
+                    return jsonify({"error": "Heatmap not available"}), 404
+                response = Response(png, mimetype='image/png')
+        response.set_etag(version)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
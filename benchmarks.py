@@ -0,0 +1,386 @@
+"""
+Performance benchmarks for ClaimEquity AI
+Run with: python benchmarks.py <benchmark> [options]
+"""
+import argparse
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+
+
+SAMPLE_CLAIM_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample_claim_report.txt')
+CHARS_PER_PAGE = 3000
+
+
+def load_sample_claim():
+    """Return the bundled sample claim text"""
+    with open(SAMPLE_CLAIM_PATH) as f:
+        return f.read()
+
+
+def synthetic_claim(pages):
+    """Build a claim of roughly `pages` pages by repeating the sample claim"""
+    sample = load_sample_claim()
+    target = pages * CHARS_PER_PAGE
+    return (sample * (target // len(sample) + 1))[:target]
+
+
+def best_of(func, repeat):
+    """Return the fastest of `repeat` timed calls, in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_fields(args):
+    """Field extraction time vs. document length (should scale linearly)"""
+    from claim_extractor import extract_claim_fields
+    from utils import simple_text_summary
+
+    print(f"{'pages':>6} {'chars':>9} {'extract ms':>11} {'ms/page':>8} {'summary ms':>11}")
+    for pages in args.pages:
+        text = synthetic_claim(pages)
+        extract = best_of(lambda: extract_claim_fields(text), args.repeat)
+        summary = best_of(lambda: simple_text_summary(text), args.repeat)
+        print(f"{pages:>6} {len(text):>9} {extract * 1000:>11.2f} {extract * 1000 / pages:>8.3f} {summary * 1000:>11.2f}")
+
+
+def legacy_claim_features(text):
+    """The original per-document utils.get_claim_features, kept as the benchmark baseline"""
+    return {
+        'text_length': len(text),
+        'has_icd_code': 1 if 'ICD' in text.upper() or 'E11' in text or 'I10' in text else 0,
+        'has_prior_auth': 1 if 'prior auth' in text.lower() or 'authorization' in text.lower() else 0,
+        'has_denial': 1 if 'denied' in text.lower() or 'denial' in text.lower() else 0,
+        'has_appeal': 1 if 'appeal' in text.lower() else 0
+    }
+
+
+def synthetic_claim_texts(docs, seed=0):
+    """Claim excerpts of varying length and offset taken from the sample claim"""
+    import random
+
+    rng = random.Random(seed)
+    sample = load_sample_claim()
+    texts = []
+    for _ in range(docs):
+        length = rng.randint(200, len(sample))
+        start = rng.randint(0, len(sample) - length)
+        texts.append(sample[start:start + length])
+    return texts
+
+
+def bench_features(args):
+    """Claim keyword features: per-document legacy scans vs. the batched single-pass extractor"""
+    from claim_extractor import claim_feature_matrix, CLAIM_FEATURE_COLS
+
+    texts = synthetic_claim_texts(args.docs)
+    chars = sum(map(len, texts))
+    legacy = best_of(lambda: [legacy_claim_features(text) for text in texts], args.repeat)
+    batch = best_of(lambda: claim_feature_matrix(texts), args.repeat)
+
+    expected = [[features[name] for name in CLAIM_FEATURE_COLS] for features in map(legacy_claim_features, texts)]
+    identical = claim_feature_matrix(texts).tolist() == expected
+    print(f"{args.docs} docs, {chars / 1e6:.0f}M chars, identical output: {identical}")
+    print(f"{'path':>8} {'seconds':>8} {'docs/s':>9} {'MB/s':>7}")
+    for name, seconds in (("legacy", legacy), ("batch", batch)):
+        print(f"{name:>8} {seconds:>8.2f} {args.docs / seconds:>9.0f} {chars / seconds / 1e6:>7.0f}")
+
+
+def bench_extractive(args):
+    """Extractive summary latency vs. document length"""
+    from extractive_summary import extractive_summary
+
+    extractive_summary(load_sample_claim())  # warm up imports
+    print(f"{'pages':>6} {'chars':>9} {'ms':>8}")
+    for pages in args.pages:
+        text = synthetic_claim(pages)
+        seconds = best_of(lambda: extractive_summary(text), args.repeat)
+        print(f"{pages:>6} {len(text):>9} {seconds * 1000:>8.2f}")
+
+
+def synthetic_appeal_claims(rows, seed=0):
+    """Random feature rows in the shape predict_appeal_batch accepts"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    return {
+        "age": rng.integers(18, 90, rows),
+        "zip": rng.integers(10000, 99999, rows),
+        "claim_amount": rng.integers(100, 50000, rows),
+        "has_prior_auth": rng.integers(0, 2, rows),
+        "text_length": rng.integers(500, 5000, rows),
+        "has_icd_code": rng.integers(0, 2, rows),
+    }
+
+
+def bench_predict(args):
+    """Appeal prediction throughput: per-row predict_appeal vs. one batched call"""
+    import tempfile
+    # Train into a scratch registry so the benchmark never replaces the served model
+    os.environ['MODEL_REGISTRY_DIR'] = tempfile.mkdtemp()
+    from models import train_appeal_predictor, predict_appeal, predict_appeal_batch
+
+    model, _ = train_appeal_predictor()
+    print(f"{'rows':>8} {'per-row rows/s':>15} {'batch ms':>9} {'batch rows/s':>13} {'speedup':>8}")
+    for rows in args.rows:
+        columns = synthetic_appeal_claims(rows)
+        # The per-row path is slow, so time a sample and extrapolate
+        sample = min(rows, args.sample)
+        row_dicts = [
+            ({"age": int(columns["age"][i]), "zip": str(columns["zip"][i]), "amount": int(columns["claim_amount"][i])},
+             {"has_prior_auth": int(columns["has_prior_auth"][i]), "text_length": int(columns["text_length"][i]),
+              "has_icd_code": int(columns["has_icd_code"][i])})
+            for i in range(sample)
+        ]
+        per_row = best_of(lambda: [predict_appeal(model, user, claim) for user, claim in row_dicts], args.repeat)
+        batch = best_of(lambda: predict_appeal_batch(model, columns), args.repeat)
+        per_row_rate = sample / per_row
+        batch_rate = rows / batch
+        print(f"{rows:>8} {per_row_rate:>15.0f} {batch * 1000:>9.1f} {batch_rate:>13.0f} {batch_rate / per_row_rate:>7.0f}x")
+
+
+def _cold_start_predict(kind, model_path, rows):
+    """Import, load and score in a fresh process; returns timings, RSS and scores"""
+    import importlib
+
+    start = time.perf_counter()
+    if kind == "sklearn":
+        models = importlib.import_module("models")
+        with open(model_path, 'rb') as f:
+            model = models.load_model_bytes(f.read(), model_path)
+        score = lambda claims: models.predict_appeal_batch(model, claims)
+    else:
+        appeal_scorer = importlib.import_module("appeal_scorer")
+        model = appeal_scorer.load_scorer(model_path)
+        score = model.score_claims
+    load_seconds = time.perf_counter() - start
+
+    claims = synthetic_appeal_claims(rows)
+    start = time.perf_counter()
+    scores = score(claims)
+    return {
+        "load_seconds": load_seconds,
+        "score_ms": (time.perf_counter() - start) * 1000,
+        "rss_mb": current_rss_mb(),
+        "heavy_imports": sorted(m for m in ("sklearn", "pandas", "scipy") if m in sys.modules),
+        "scores": scores
+    }
+
+
+def bench_scorer(args):
+    """Cold start and memory: pickled sklearn model vs. NumPy-only scorer export"""
+    import tempfile
+
+    workdir = tempfile.mkdtemp()
+    os.environ['MODEL_REGISTRY_DIR'] = workdir
+    from models import train_appeal_predictor, export_appeal_model, serving_model_path
+
+    train_appeal_predictor()
+    model_path = serving_model_path()
+    export_path = os.path.join(workdir, f'appeal_model.{args.format}')
+    export_appeal_model(export_path, model_path)
+
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for kind, path in (("sklearn", model_path), ("numpy", export_path)):
+        with context.Pool(1) as pool:
+            results[kind] = pool.apply(_cold_start_predict, (kind, path, args.rows))
+
+    reference = results["sklearn"]["scores"]
+    print(f"{'path':>8} {'import+load s':>14} {'score ms':>9} {'RSS MB':>7} {'identical':>10}  heavy imports")
+    for kind, result in results.items():
+        identical = bool((result["scores"] == reference).all())
+        print(f"{kind:>8} {result['load_seconds']:>14.3f} {result['score_ms']:>9.1f} {result['rss_mb']:>7.0f} "
+              f"{str(identical):>10}  {', '.join(result['heavy_imports']) or '-'}")
+
+
+def _train_in_process(mode, data_path, chunk_rows, model_dir):
+    """Train in a fresh process so peak memory reflects only this run"""
+    os.environ['MODEL_REGISTRY_DIR'] = os.path.join(model_dir, f'{mode}-{chunk_rows}')
+    import models
+
+    start = time.perf_counter()
+    if mode == "streaming":
+        _, accuracy = models.train_appeal_predictor_streaming(data_path, chunk_size=chunk_rows)
+    else:
+        models.APPEAL_TRAIN_STREAM_MB = float('inf')
+        _, accuracy = models.train_appeal_predictor(data_path)
+    return {"seconds": time.perf_counter() - start, "accuracy": accuracy, "peak_rss_mb": peak_rss_mb()}
+
+
+def bench_train(args):
+    """Peak memory and accuracy: in-memory vs. chunked streaming training on a large CSV"""
+    import tempfile
+    from models import synthetic_appeal_data
+
+    workdir = tempfile.mkdtemp()
+    data_path = os.path.join(workdir, 'claims.csv')
+    written = 0
+    while written < args.rows:
+        rows = min(100000, args.rows - written)
+        synthetic_appeal_data(rows, seed=written).to_csv(data_path, mode='a', header=written == 0, index=False)
+        written += rows
+    size_mb = os.path.getsize(data_path) / (1024 * 1024)
+    print(f"{args.rows} rows, {size_mb:.0f} MB CSV")
+
+    runs = [("streaming", chunk_rows) for chunk_rows in args.chunk_rows]
+    if args.in_memory:
+        runs.insert(0, ("in-memory", 0))
+    context = multiprocessing.get_context("spawn")
+    print(f"{'mode':>10} {'chunk rows':>11} {'seconds':>8} {'accuracy':>9} {'peak RSS MB':>12}")
+    for mode, chunk_rows in runs:
+        with context.Pool(1) as pool:
+            result = pool.apply(_train_in_process, (mode, data_path, chunk_rows, workdir))
+        print(f"{mode:>10} {chunk_rows or '-':>11} {result['seconds']:>8.1f} {result['accuracy']:>9.2%} "
+              f"{result['peak_rss_mb']:>12.0f}")
+
+
+def rouge_l(candidate, reference):
+    """ROUGE-L F1 between two texts (longest common token subsequence)"""
+    a, b = candidate.lower().split(), reference.lower().split()
+    if not a or not b:
+        return 0.0
+    previous = [0] * (len(b) + 1)
+    for token in a:
+        current = [0]
+        for j, other in enumerate(b):
+            current.append(previous[j] + 1 if token == other else max(previous[j + 1], current[j]))
+        previous = current
+    lcs = previous[-1]
+    if lcs == 0:
+        return 0.0
+    precision, recall = lcs / len(a), lcs / len(b)
+    return 2 * precision * recall / (precision + recall)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB"""
+    try:
+        # VmHWM starts fresh in spawned workers; ru_maxrss can carry over from the parent
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb():
+    """Current resident memory of this process in MB (peak RSS where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def _run_summarizer_backend(backend, model, texts, repeat):
+    """Load one backend and time it; runs in a fresh process so memory is isolated"""
+    from summarizer import PIPELINE_BUILDERS
+
+    baseline_rss = peak_rss_mb()
+    start = time.perf_counter()
+    summarizer = PIPELINE_BUILDERS[backend](model)
+    load_seconds = time.perf_counter() - start
+
+    summaries = []
+    latencies = []
+    for text in texts:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            output = summarizer(text[:1000], max_length=150, min_length=50, do_sample=False)
+            latencies.append(time.perf_counter() - start)
+        summaries.append(output[0]['summary_text'])
+
+    return {
+        "load_seconds": load_seconds,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "rss_mb": peak_rss_mb() - baseline_rss,
+        "summaries": summaries
+    }
+
+
+def bench_summarizer(args):
+    """Local summarizer latency, memory and output quality per backend"""
+    sample = load_sample_claim()
+    texts = [sample[i:i + 1000] for i in range(0, min(len(sample), 1000 * args.texts), 1000)]
+
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for backend in args.backends:
+        with context.Pool(1) as pool:
+            results[backend] = pool.apply(_run_summarizer_backend, (backend, args.model, texts, args.repeat))
+
+    reference = results.get(args.backends[0])
+    print(f"{'backend':>8} {'load s':>7} {'p50 ms':>8} {'max ms':>8} {'RSS MB':>7} {'ROUGE-L vs ' + args.backends[0]:>20}")
+    for backend, result in results.items():
+        quality = statistics.mean(
+            rouge_l(candidate, expected) for candidate, expected in zip(result["summaries"], reference["summaries"])
+        )
+        print(f"{backend:>8} {result['load_seconds']:>7.1f} {result['p50_ms']:>8.0f} {result['max_ms']:>8.0f} "
+              f"{result['rss_mb']:>7.0f} {quality:>20.3f}")
+
+
+BENCHMARKS = {
+    "fields": bench_fields,
+    "summarizer": bench_summarizer,
+    "extractive": bench_extractive,
+    "predict": bench_predict,
+    "scorer": bench_scorer,
+    "train": bench_train,
+    "features": bench_features,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ClaimEquity AI performance benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    fields = subparsers.add_parser("fields", help=bench_fields.__doc__)
+    fields.add_argument("--pages", type=int, nargs="+", default=[1, 10, 50, 100])
+    fields.add_argument("--repeat", type=int, default=5)
+
+    summarizer = subparsers.add_parser("summarizer", help=bench_summarizer.__doc__)
+    summarizer.add_argument("--backends", nargs="+", default=["pytorch", "onnx"])
+    summarizer.add_argument("--model", default=os.getenv('SUMMARIZER_MODEL', 'facebook/bart-large-cnn'))
+    summarizer.add_argument("--texts", type=int, default=4, help="number of 1000-char claim excerpts")
+    summarizer.add_argument("--repeat", type=int, default=3)
+
+    extractive = subparsers.add_parser("extractive", help=bench_extractive.__doc__)
+    extractive.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100])
+    extractive.add_argument("--repeat", type=int, default=5)
+
+    predict = subparsers.add_parser("predict", help=bench_predict.__doc__)
+    predict.add_argument("--rows", type=int, nargs="+", default=[1000, 50000])
+    predict.add_argument("--sample", type=int, default=500, help="rows timed on the per-row path")
+    predict.add_argument("--repeat", type=int, default=3)
+
+    scorer = subparsers.add_parser("scorer", help=bench_scorer.__doc__)
+    scorer.add_argument("--format", choices=["npz", "json"], default="npz")
+    scorer.add_argument("--rows", type=int, default=10000)
+
+    train = subparsers.add_parser("train", help=bench_train.__doc__)
+    train.add_argument("--rows", type=int, default=2000000)
+    train.add_argument("--chunk-rows", type=int, nargs="+", default=[10000, 100000])
+    train.add_argument("--in-memory", action="store_true", help="also run the whole-file pd.read_csv path")
+
+    features = subparsers.add_parser("features", help=bench_features.__doc__)
+    features.add_argument("--docs", type=int, default=100000)
+    features.add_argument("--repeat", type=int, default=1)
+
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    main()
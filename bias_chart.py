@@ -0,0 +1,130 @@
+"""
+Bias pattern chart rendering
+Renders the top-groups bar chart to in-memory PNG bytes and caches it per
+bias data version, so it is drawn once per change to the biases table.
+matplotlib is optional and only imported on the first render; the React app
+charts /api/bias-patterns itself.
+"""
+import importlib.util
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from bias_db import bias_data_version, top_bias_cells
+
+
+BIAS_CHART_DPI = int(os.getenv('BIAS_CHART_DPI', '150'))
+BIAS_CHART_TOP_N = 10
+BIAS_CHART_CACHE_ENTRIES = 4
+
+
+def chart_available():
+    """True if matplotlib is installed, so server-side charts can be rendered"""
+    return importlib.util.find_spec('matplotlib') is not None
+
+
+def render_bias_chart(cells, dpi=BIAS_CHART_DPI):
+    """
+    Draw the denials-by-group bar chart
+
+    Uses a standalone Figure rather than pyplot, so concurrent renders share
+    no global state.
+
+    Args:
+        cells: (demo, zip, record_count, success_rate) tuples from top_bias_cells
+        dpi: Output resolution
+
+    Returns:
+        bytes: PNG image
+
+    Raises:
+        ImportError: If matplotlib is not installed
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    if cells:
+        ax.barh(range(len(cells)), [cell[2] for cell in cells], color='coral')
+        ax.set_yticks(range(len(cells)))
+        ax.set_yticklabels([f"{demo} - {zip_code}" for demo, zip_code, *_ in cells])
+        ax.set_xlabel('Number of Denials')
+        ax.set_title('Bias Pattern: Denials by Demographics & Zip Code')
+        ax.grid(axis='x', alpha=0.3)
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+class BiasChartCache:
+    """
+    Rendered charts keyed by bias data version
+
+    Only the latest few versions are kept. Renders are serialized, so a burst
+    of requests after a data change draws the new chart once and the rest
+    wait for it instead of rendering it again.
+    """
+
+    def __init__(self, max_entries=BIAS_CHART_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._charts = OrderedDict()
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+        self._counters = {"hits": 0, "renders": 0}
+
+    def _lookup(self, version):
+        with self._lock:
+            png = self._charts.get(version)
+            if png is not None:
+                self._charts.move_to_end(version)
+                self._counters["hits"] += 1
+            return png
+
+    def get(self, conn, version=None):
+        """
+        PNG chart for the current data, rendering it on a cache miss
+
+        Args:
+            conn: SQLite connection to the bias database
+            version: Data version if already known (from bias_data_version)
+
+        Returns:
+            tuple: (PNG bytes or None if there is no data, version)
+        """
+        version = version or bias_data_version(conn)
+        png = self._lookup(version)
+        if png is not None:
+            return png, version
+
+        with self._render_lock:
+            png = self._lookup(version)
+            if png is not None:
+                return png, version
+            cells = top_bias_cells(conn, BIAS_CHART_TOP_N)
+            if not cells:
+                return None, version
+            png = render_bias_chart(cells)
+            with self._lock:
+                self._counters["renders"] += 1
+                self._charts[version] = png
+                while len(self._charts) > self.max_entries:
+                    self._charts.popitem(last=False)
+        return png, version
+
+    def stats(self):
+        """
+        Report cache counters
+
+        Returns:
+            dict: hits, renders and cached versions
+        """
+        with self._lock:
+            return {**self._counters, "versions": list(self._charts)}
+
+
+# Process-wide cache used by backend/app.py and app.py
+bias_charts = BiasChartCache()
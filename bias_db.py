@@ -0,0 +1,458 @@
+"""
+Connection management for the anonymized bias database
+Pooled, WAL-mode SQLite connections shared by the API threads, plus the
+schema migrations every connection pool applies once before use
+"""
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+# SQLite database holding the anonymized biases table
+BIAS_DB_PATH = os.getenv('BIAS_DB_PATH', 'database.db')
+BIAS_DB_POOL_SIZE = int(os.getenv('BIAS_DB_POOL_SIZE', '8'))
+BIAS_DB_BUSY_TIMEOUT = float(os.getenv('BIAS_DB_BUSY_TIMEOUT', '30'))  # seconds to wait on a locked database
+BIAS_DB_CACHE_MB = int(os.getenv('BIAS_DB_CACHE_MB', '64'))            # page cache per connection
+BIAS_DB_MMAP_MB = int(os.getenv('BIAS_DB_MMAP_MB', '256'))             # memory-mapped reads; 0 disables
+
+
+BIASES_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS biases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        hash TEXT UNIQUE,
+        denial_reason TEXT,
+        zip TEXT,
+        demo TEXT,
+        claim_amount REAL,
+        outcome INTEGER,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+'''
+
+# Running totals over biases, kept current by triggers so bias detection never
+# scans the raw rows: one row per (demo, zip, denial_reason), and one per
+# (demo, zip) with an index on the count for the top-N chart. Rows without a
+# demo or zip belong to no group and are skipped, as in a pandas groupby.
+# Superseded by BIAS_CELL_TRIGGERS, which drops the per-reason table.
+BIAS_AGGREGATE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS bias_aggregates (
+        demo TEXT,
+        zip TEXT,
+        denial_reason TEXT,
+        record_count INTEGER NOT NULL DEFAULT 0,
+        outcome_sum INTEGER NOT NULL DEFAULT 0,
+        amount_sum REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (demo, zip, denial_reason)
+    );
+    CREATE TABLE IF NOT EXISTS bias_cells (
+        demo TEXT,
+        zip TEXT,
+        record_count INTEGER NOT NULL DEFAULT 0,
+        outcome_sum INTEGER NOT NULL DEFAULT 0,
+        amount_sum REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (demo, zip)
+    );
+    CREATE INDEX IF NOT EXISTS idx_bias_cells_count ON bias_cells (record_count DESC, demo, zip);
+
+    CREATE TRIGGER IF NOT EXISTS biases_aggregate_insert AFTER INSERT ON biases
+    WHEN NEW.demo IS NOT NULL AND NEW.zip IS NOT NULL
+    BEGIN
+        INSERT INTO bias_aggregates (demo, zip, denial_reason, record_count, outcome_sum, amount_sum)
+        VALUES (NEW.demo, NEW.zip, COALESCE(NEW.denial_reason, 'unknown'), 1,
+                COALESCE(NEW.outcome, 0), COALESCE(NEW.claim_amount, 0))
+        ON CONFLICT (demo, zip, denial_reason) DO UPDATE SET
+            record_count = record_count + 1,
+            outcome_sum = outcome_sum + excluded.outcome_sum,
+            amount_sum = amount_sum + excluded.amount_sum;
+        INSERT INTO bias_cells (demo, zip, record_count, outcome_sum, amount_sum)
+        VALUES (NEW.demo, NEW.zip, 1, COALESCE(NEW.outcome, 0), COALESCE(NEW.claim_amount, 0))
+        ON CONFLICT (demo, zip) DO UPDATE SET
+            record_count = record_count + 1,
+            outcome_sum = outcome_sum + excluded.outcome_sum,
+            amount_sum = amount_sum + excluded.amount_sum;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS biases_aggregate_delete AFTER DELETE ON biases
+    WHEN OLD.demo IS NOT NULL AND OLD.zip IS NOT NULL
+    BEGIN
+        UPDATE bias_aggregates SET
+            record_count = record_count - 1,
+            outcome_sum = outcome_sum - COALESCE(OLD.outcome, 0),
+            amount_sum = amount_sum - COALESCE(OLD.claim_amount, 0)
+        WHERE demo = OLD.demo AND zip = OLD.zip AND denial_reason = COALESCE(OLD.denial_reason, 'unknown');
+        DELETE FROM bias_aggregates
+        WHERE demo = OLD.demo AND zip = OLD.zip AND denial_reason = COALESCE(OLD.denial_reason, 'unknown')
+            AND record_count <= 0;
+        UPDATE bias_cells SET
+            record_count = record_count - 1,
+            outcome_sum = outcome_sum - COALESCE(OLD.outcome, 0),
+            amount_sum = amount_sum - COALESCE(OLD.claim_amount, 0)
+        WHERE demo = OLD.demo AND zip = OLD.zip;
+        DELETE FROM bias_cells WHERE demo = OLD.demo AND zip = OLD.zip AND record_count <= 0;
+    END;
+'''
+
+BIAS_AGGREGATE_BACKFILL = '''
+    DELETE FROM bias_aggregates;
+    DELETE FROM bias_cells;
+    INSERT INTO bias_aggregates (demo, zip, denial_reason, record_count, outcome_sum, amount_sum)
+    SELECT demo, zip, COALESCE(denial_reason, 'unknown'), COUNT(*),
+           COALESCE(SUM(outcome), 0), COALESCE(SUM(claim_amount), 0)
+    FROM biases WHERE demo IS NOT NULL AND zip IS NOT NULL
+    GROUP BY demo, zip, COALESCE(denial_reason, 'unknown');
+    INSERT INTO bias_cells (demo, zip, record_count, outcome_sum, amount_sum)
+    SELECT demo, zip, SUM(record_count), SUM(outcome_sum), SUM(amount_sum)
+    FROM bias_aggregates GROUP BY demo, zip;
+'''
+
+BIAS_INDEXES = '''
+    CREATE INDEX IF NOT EXISTS idx_biases_demo_zip ON biases (demo, zip);
+    CREATE INDEX IF NOT EXISTS idx_biases_denial_reason ON biases (denial_reason);
+    CREATE INDEX IF NOT EXISTS idx_biases_timestamp ON biases (timestamp);
+'''
+
+# Counts deletes/updates of biases; with MAX(id) (which every insert raises,
+# as AUTOINCREMENT never reuses ids) it identifies the table's contents for
+# chart caching without adding work to the insert path
+BIAS_CHANGE_COUNTER = '''
+    CREATE TABLE IF NOT EXISTS bias_changes (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        changes INTEGER NOT NULL DEFAULT 0
+    );
+    INSERT OR IGNORE INTO bias_changes (id, changes) VALUES (1, 0);
+    CREATE TRIGGER IF NOT EXISTS biases_change_delete AFTER DELETE ON biases
+    BEGIN
+        UPDATE bias_changes SET changes = changes + 1 WHERE id = 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS biases_change_update AFTER UPDATE ON biases
+    BEGIN
+        UPDATE bias_changes SET changes = changes + 1 WHERE id = 1;
+    END;
+'''
+
+# bias_cells only, maintained on insert, delete and update. Nothing read the
+# per-reason bias_aggregates table, so it and its triggers are dropped rather
+# than updated on every insert. An UPDATE moves the row out of its OLD cell
+# and into its NEW one. The cells are rebuilt from biases in case updates
+# made before this step left them out of date.
+BIAS_CELL_TRIGGERS = '''
+    DROP TRIGGER IF EXISTS biases_aggregate_insert;
+    DROP TRIGGER IF EXISTS biases_aggregate_delete;
+    DROP TABLE IF EXISTS bias_aggregates;
+
+    CREATE TRIGGER IF NOT EXISTS biases_cells_insert AFTER INSERT ON biases
+    WHEN NEW.demo IS NOT NULL AND NEW.zip IS NOT NULL
+    BEGIN
+        INSERT INTO bias_cells (demo, zip, record_count, outcome_sum, amount_sum)
+        VALUES (NEW.demo, NEW.zip, 1, COALESCE(NEW.outcome, 0), COALESCE(NEW.claim_amount, 0))
+        ON CONFLICT (demo, zip) DO UPDATE SET
+            record_count = record_count + 1,
+            outcome_sum = outcome_sum + excluded.outcome_sum,
+            amount_sum = amount_sum + excluded.amount_sum;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS biases_cells_delete AFTER DELETE ON biases
+    WHEN OLD.demo IS NOT NULL AND OLD.zip IS NOT NULL
+    BEGIN
+        UPDATE bias_cells SET
+            record_count = record_count - 1,
+            outcome_sum = outcome_sum - COALESCE(OLD.outcome, 0),
+            amount_sum = amount_sum - COALESCE(OLD.claim_amount, 0)
+        WHERE demo = OLD.demo AND zip = OLD.zip;
+        DELETE FROM bias_cells WHERE demo = OLD.demo AND zip = OLD.zip AND record_count <= 0;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS biases_cells_update AFTER UPDATE OF demo, zip, outcome, claim_amount ON biases
+    BEGIN
+        UPDATE bias_cells SET
+            record_count = record_count - 1,
+            outcome_sum = outcome_sum - COALESCE(OLD.outcome, 0),
+            amount_sum = amount_sum - COALESCE(OLD.claim_amount, 0)
+        WHERE demo = OLD.demo AND zip = OLD.zip;
+        DELETE FROM bias_cells WHERE demo = OLD.demo AND zip = OLD.zip AND record_count <= 0;
+        INSERT INTO bias_cells (demo, zip, record_count, outcome_sum, amount_sum)
+        SELECT NEW.demo, NEW.zip, 1, COALESCE(NEW.outcome, 0), COALESCE(NEW.claim_amount, 0)
+        WHERE NEW.demo IS NOT NULL AND NEW.zip IS NOT NULL
+        ON CONFLICT (demo, zip) DO UPDATE SET
+            record_count = record_count + 1,
+            outcome_sum = outcome_sum + excluded.outcome_sum,
+            amount_sum = amount_sum + excluded.amount_sum;
+    END;
+
+    DELETE FROM bias_cells;
+    INSERT INTO bias_cells (demo, zip, record_count, outcome_sum, amount_sum)
+    SELECT demo, zip, COUNT(*), COALESCE(SUM(outcome), 0), COALESCE(SUM(claim_amount), 0)
+    FROM biases WHERE demo IS NOT NULL AND zip IS NOT NULL
+    GROUP BY demo, zip;
+'''
+
+# Applied in order; PRAGMA user_version records how many have run. Every step
+# is idempotent, so databases created before versioning (user_version 0) are
+# brought up to date safely. Append new steps; never edit released ones.
+MIGRATIONS = [
+    BIASES_SCHEMA,
+    BIAS_AGGREGATE_SCHEMA + BIAS_AGGREGATE_BACKFILL,
+    BIAS_INDEXES,
+    BIAS_CHANGE_COUNTER,
+    BIAS_CELL_TRIGGERS,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def anon_hash(zip_code, demo, reason):
+    """
+    Deduplication key of an anonymized record
+
+    Returns:
+        str: First 16 hex digits of sha256(zip + demo + reason)
+    """
+    return hashlib.sha256(f"{zip_code}{demo}{reason}".encode()).hexdigest()[:16]
+
+
+def _sql_statements(script):
+    """Split a schema script into statements, keeping trigger bodies whole"""
+    statements, current = [], ""
+    for line in script.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            if current.strip():
+                statements.append(current.strip())
+            current = ""
+    return statements
+
+
+def connect(db_path=BIAS_DB_PATH):
+    """
+    Open a tuned connection to the bias database
+
+    WAL lets readers proceed while one writer commits, and synchronous=NORMAL
+    only fsyncs at checkpoints (a power loss can drop the last commits but
+    never corrupts the database). The connection may be handed between
+    threads but must only be used by one at a time.
+
+    Returns:
+        sqlite3.Connection
+    """
+    conn = sqlite3.connect(db_path, timeout=BIAS_DB_BUSY_TIMEOUT, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA cache_size=-{BIAS_DB_CACHE_MB * 1024}')
+    conn.execute(f'PRAGMA mmap_size={BIAS_DB_MMAP_MB * 1024 * 1024}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return conn
+
+
+def migrate(conn):
+    """
+    Bring the bias database schema up to SCHEMA_VERSION
+
+    Each pending step runs in its own write transaction, and the version is
+    re-read inside it, so concurrent processes never apply a step twice.
+
+    Returns:
+        int: Schema version after migrating
+    """
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    while version < SCHEMA_VERSION:
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                break
+            for statement in _sql_statements(MIGRATIONS[version]):
+                conn.execute(statement)
+            version += 1
+            conn.execute(f'PRAGMA user_version={version}')
+    return version
+
+
+def bias_data_version(conn):
+    """
+    Version string that changes whenever the biases table changes
+
+    Built from MAX(id) and the delete/update counter, so it is two
+    primary-key lookups. Ignored duplicate inserts leave it unchanged (the
+    AUTOINCREMENT sequence would not).
+
+    Returns:
+        str: e.g. '1042.3'
+    """
+    row = conn.execute('''
+        SELECT (SELECT MAX(id) FROM biases),
+               (SELECT changes FROM bias_changes WHERE id = 1)
+    ''').fetchone()
+    return f"{row[0] or 0}.{row[1] or 0}"
+
+
+def top_bias_cells(conn, limit=10):
+    """
+    (demo, zip) groups with the most records, read from the count index
+
+    Returns:
+        list: (demo, zip, record_count, success_rate) tuples, largest first
+    """
+    return conn.execute('''
+        SELECT demo, zip, record_count, CAST(outcome_sum AS REAL) / record_count
+        FROM bias_cells ORDER BY record_count DESC, demo, zip LIMIT ?
+    ''', (limit,)).fetchall()
+
+
+def bias_patterns(conn, limit=10, offset=0, demo=None, zip_prefix=None, min_records=1):
+    """
+    One page of (demo, zip) groups, largest first
+
+    Args:
+        conn: SQLite connection to the bias database
+        limit: Page size
+        offset: Groups to skip
+        demo: Only this demographic group
+        zip_prefix: Only zips starting with this
+        min_records: Only groups with at least this many records
+
+    Returns:
+        tuple: (total matching groups, list of (demo, zip, record_count,
+            success_rate, avg_amount) tuples)
+    """
+    where, params = ['record_count >= ?'], [min_records]
+    if demo:
+        where.append('demo = ?')
+        params.append(demo)
+    if zip_prefix:
+        where.append("zip LIKE ? ESCAPE '\\'")
+        params.append(zip_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+    clause = ' AND '.join(where)
+    total = conn.execute(f'SELECT COUNT(*) FROM bias_cells WHERE {clause}', params).fetchone()[0]
+    rows = conn.execute(f'''
+        SELECT demo, zip, record_count, CAST(outcome_sum AS REAL) / record_count, amount_sum / record_count
+        FROM bias_cells WHERE {clause}
+        ORDER BY record_count DESC, demo, zip LIMIT ? OFFSET ?
+    ''', params + [limit, offset]).fetchall()
+    return total, rows
+
+
+def bias_cell(conn, demo, zip_code):
+    """
+    One (demo, zip) group and its rank by record count
+
+    Returns:
+        tuple or None: (record_count, success_rate, avg_amount, rank), rank 1 being the largest group
+    """
+    row = conn.execute('''
+        SELECT record_count, CAST(outcome_sum AS REAL) / record_count, amount_sum / record_count
+        FROM bias_cells WHERE demo = ? AND zip = ?
+    ''', (demo, zip_code)).fetchone()
+    if row is None:
+        return None
+    larger = conn.execute('SELECT COUNT(*) FROM bias_cells WHERE record_count > ?', (row[0],)).fetchone()[0]
+    return row + (larger + 1,)
+
+
+def bias_summary(conn):
+    """
+    Totals over every group
+
+    Returns:
+        tuple: (records, groups, success_rate or None, avg_amount or None)
+    """
+    records, groups, outcomes, amounts = conn.execute('''
+        SELECT COALESCE(SUM(record_count), 0), COUNT(*), SUM(outcome_sum), SUM(amount_sum) FROM bias_cells
+    ''').fetchone()
+    if not records:
+        return 0, 0, None, None
+    return records, groups, outcomes / records, amounts / records
+
+
+class BiasConnectionPool:
+    """
+    Bounded pool of bias database connections
+
+    Flask serves each request on its own thread, so connections are borrowed
+    per operation instead of being tied to threads. Up to size connections
+    are opened lazily; callers beyond that wait for one to be returned. The
+    schema is migrated once, when the first connection is opened.
+    """
+
+    def __init__(self, db_path=BIAS_DB_PATH, size=BIAS_DB_POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._migrated = False
+        self._counters = {"borrows": 0, "waits": 0}
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                conn = connect(self.db_path)
+                try:
+                    if not self._migrated:
+                        migrate(conn)
+                        self._migrated = True
+                except Exception:
+                    conn.close()
+                    raise
+                self._opened += 1
+                return conn
+            self._counters["waits"] += 1
+        return self._idle.get(timeout=BIAS_DB_BUSY_TIMEOUT)
+
+    def open(self):
+        """Open a first connection and migrate the schema now rather than on first use"""
+        with self.connection():
+            pass
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrow a connection for the duration of a with block
+
+        Uncommitted work is rolled back when the block exits, so a failed
+        request never leaves a transaction open on a pooled connection.
+
+        Raises:
+            queue.Empty: If no connection is returned within BIAS_DB_BUSY_TIMEOUT
+        """
+        conn = self._acquire()
+        with self._lock:
+            self._counters["borrows"] += 1
+        try:
+            yield conn
+        finally:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.put(conn)
+            except sqlite3.Error:
+                # Broken connection; let the pool open a fresh one
+                conn.close()
+                with self._lock:
+                    self._opened -= 1
+
+    def status(self):
+        """
+        Report pool usage
+
+        Returns:
+            dict: path, size, open/idle connections and counters
+        """
+        with self._lock:
+            return {
+                "path": self.db_path,
+                "size": self.size,
+                "open": self._opened,
+                "idle": self._idle.qsize(),
+                "schema_version": SCHEMA_VERSION if self._migrated else None,
+                **self._counters
+            }
+
+
+# Process-wide pool used by backend/app.py, app.py and the online updater
+bias_db = BiasConnectionPool()
@@ -0,0 +1,240 @@
+"""
+Bulk ingestion of anonymized denial records into the bias database
+Streams NDJSON or CSV and inserts the rows with one executemany per batch
+inside large transactions. Rows are validated and hashed one at a time:
+SHA-256 has no vectorized form in the standard library, and at about 1.6 us
+per row this is a small part of the cost next to the SQLite inserts.
+
+Run with: python bias_ingest.py <file or -> [--format ndjson|csv]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+from bias_db import BIAS_DB_PATH, anon_hash, connect, migrate
+
+
+BIAS_INGEST_BATCH_ROWS = int(os.getenv('BIAS_INGEST_BATCH_ROWS', '5000'))
+# Rows per transaction; larger means fewer fsyncs but holds the write lock longer
+BIAS_INGEST_COMMIT_ROWS = int(os.getenv('BIAS_INGEST_COMMIT_ROWS', '50000'))
+INGEST_FORMATS = ('ndjson', 'csv')
+MAX_REJECT_SAMPLES = 20
+
+OUTCOME_VALUES = {
+    'approved': 1, '1': 1, 'true': 1, 'yes': 1,
+    'denied': 0, '0': 0, 'false': 0, 'no': 0, '': 0
+}
+
+
+def format_for(name=None, content_type=None):
+    """
+    Guess the input format from a file name or Content-Type
+
+    Returns:
+        str or None: 'ndjson', 'csv', or None if neither matches
+    """
+    content_type = (content_type or '').lower()
+    name = (name or '').lower()
+    if 'csv' in content_type or name.endswith('.csv'):
+        return 'csv'
+    if 'ndjson' in content_type or 'jsonl' in content_type or name.endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return None
+
+
+def iter_records(stream, fmt):
+    """
+    Yield (line number, record dict or error message) from a text stream
+
+    Lines are read one at a time, so memory does not grow with the input.
+
+    Args:
+        stream: Text file-like object
+        fmt: 'ndjson' (one JSON object per line) or 'csv' (header row required)
+    """
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"invalid JSON: {str(e)}"
+            continue
+        yield line_number, record if isinstance(record, dict) else "not a JSON object"
+
+
+def _outcome(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)) and value in (0, 1):
+        return int(value)
+    outcome = OUTCOME_VALUES.get(str(value if value is not None else '').strip().lower())
+    if outcome is None:
+        raise ValueError(f"unknown outcome '{value}'")
+    return outcome
+
+
+def _text_field(record, name):
+    """A reason/zip/demo value as text (numbers are accepted, e.g. unquoted zips)"""
+    value = record.get(name)
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError(f"{name} must be a string or number, not {type(value).__name__}")
+
+
+def prepare_batch(records):
+    """
+    Validate and hash a batch of records
+
+    Field names and defaults follow add_anon_data (reason, zip, demo,
+    amount, outcome), and rows hash identically, so bulk rows deduplicate
+    against rows shared one at a time. outcome may be Approved/Denied, 0/1
+    or true/false; reason, zip and demo must be strings or numbers, so a
+    malformed row is rejected instead of failing the whole insert. Rows are
+    checked and hashed in a plain loop; "batch"
+    refers to the executemany chunk the results are inserted with.
+
+    Args:
+        records: List of (line number, record dict or error message)
+
+    Returns:
+        tuple: (list of insert parameter tuples, list of (line number, reason) rejects)
+    """
+    rows, rejects = [], []
+    for line_number, record in records:
+        if isinstance(record, str):
+            rejects.append((line_number, record))
+            continue
+        try:
+            amount = record.get('amount')
+            amount = float(amount) if amount not in (None, '') else 0.0
+            if amount != amount:
+                raise ValueError("amount is NaN")
+            outcome = _outcome(record.get('outcome'))
+            reason, zip_code, demo = (_text_field(record, name) for name in ('reason', 'zip', 'demo'))
+        except (TypeError, ValueError) as e:
+            rejects.append((line_number, str(e)))
+            continue
+        rows.append((
+            anon_hash(zip_code or '', demo or '', reason or ''),
+            reason or 'unknown',
+            zip_code or 'unknown',
+            demo or 'unknown',
+            amount,
+            outcome
+        ))
+    return rows, rejects
+
+
+def ingest_records(conn, records, batch_rows=BIAS_INGEST_BATCH_ROWS, commit_rows=BIAS_INGEST_COMMIT_ROWS):
+    """
+    Insert records in batches, committing every commit_rows rows
+
+    Args:
+        conn: SQLite connection to a migrated bias database
+        records: Iterable from iter_records
+        batch_rows: Rows per executemany call
+        commit_rows: Rows per transaction
+
+    Returns:
+        dict: rows, inserted, duplicates, rejected, reject samples, seconds and rows_per_second
+    """
+    stats = {"rows": 0, "inserted": 0, "duplicates": 0, "rejected": 0, "rejects": []}
+    start = time.time()
+    uncommitted = 0
+
+    def flush(batch):
+        nonlocal uncommitted
+        rows, rejects = prepare_batch(batch)
+        stats["rows"] += len(batch)
+        stats["rejected"] += len(rejects)
+        room = MAX_REJECT_SAMPLES - len(stats["rejects"])
+        if room > 0:
+            stats["rejects"].extend({"line": line, "error": error} for line, error in rejects[:room])
+        if rows:
+            cursor = conn.executemany('''
+                INSERT OR IGNORE INTO biases (hash, denial_reason, zip, demo, claim_amount, outcome)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', rows)
+            inserted = max(cursor.rowcount, 0)
+            stats["inserted"] += inserted
+            stats["duplicates"] += len(rows) - inserted
+            uncommitted += len(rows)
+            if uncommitted >= commit_rows:
+                conn.commit()
+                uncommitted = 0
+
+    try:
+        batch = []
+        for item in records:
+            batch.append(item)
+            if len(batch) >= batch_rows:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+        conn.commit()
+    except Exception:
+        # Keep what earlier transactions committed; drop the partial one
+        conn.rollback()
+        raise
+    finally:
+        stats["seconds"] = round(time.time() - start, 3)
+        stats["rows_per_second"] = round(stats["rows"] / stats["seconds"]) if stats["seconds"] > 0 else None
+    return stats
+
+
+def ingest_stream(conn, stream, fmt, **kwargs):
+    """
+    Ingest a binary or text stream of NDJSON/CSV records
+
+    Returns:
+        dict: Stats from ingest_records
+    """
+    if fmt not in INGEST_FORMATS:
+        raise ValueError(f"Unknown format '{fmt}' (expected one of {', '.join(INGEST_FORMATS)})")
+    if not isinstance(stream, io.TextIOBase):
+        stream = io.TextIOWrapper(stream, encoding='utf-8', errors='replace', newline='')
+    return ingest_records(conn, iter_records(stream, fmt), **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load anonymized denial records into the bias database")
+    parser.add_argument("path", help="NDJSON or CSV file, or - for stdin")
+    parser.add_argument("--format", choices=INGEST_FORMATS, help="input format (default: from the file extension)")
+    parser.add_argument("--db", default=BIAS_DB_PATH, help="bias database path")
+    parser.add_argument("--batch-rows", type=int, default=BIAS_INGEST_BATCH_ROWS)
+    parser.add_argument("--commit-rows", type=int, default=BIAS_INGEST_COMMIT_ROWS)
+    args = parser.parse_args()
+
+    fmt = args.format or format_for(args.path)
+    if fmt is None:
+        parser.error("cannot tell the format from the file name; pass --format")
+
+    conn = connect(args.db)
+    try:
+        migrate(conn)
+        if args.path == '-':
+            stats = ingest_stream(conn, sys.stdin.buffer, fmt, batch_rows=args.batch_rows,
+                                  commit_rows=args.commit_rows)
+        else:
+            with open(args.path, 'rb') as f:
+                stats = ingest_stream(conn, f, fmt, batch_rows=args.batch_rows, commit_rows=args.commit_rows)
+    finally:
+        conn.close()
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Circuit breakers and health tracking for external LLM providers
+Skips providers that keep failing so callers go straight to their fallback
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+BREAKER_ERROR_RATE = float(os.getenv('BREAKER_ERROR_RATE', '0.5'))
+BREAKER_WINDOW = int(os.getenv('BREAKER_WINDOW', '20'))
+BREAKER_RECOVERY_SECONDS = float(os.getenv('BREAKER_RECOVERY_SECONDS', '30'))
+# Calls slower than this count as slow; the breaker also opens when the
+# share of slow calls over the window reaches BREAKER_SLOW_CALL_RATE
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv('BREAKER_SLOW_CALL_SECONDS', '15'))
+BREAKER_SLOW_CALL_RATE = float(os.getenv('BREAKER_SLOW_CALL_RATE', '0.5'))
+# Breakers kept per process (one per provider and API key); least recently used are dropped
+BREAKER_MAX_ENTRIES = int(os.getenv('BREAKER_MAX_ENTRIES', '256'))
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is skipped because the provider's circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker for one provider
+
+    The breaker opens after failure_threshold consecutive failures, or when
+    the error rate or the rate of calls slower than slow_call_seconds over
+    the last `window` calls reaches error_rate or slow_call_rate. While open,
+    calls fail immediately with CircuitOpenError. After recovery_seconds one
+    half-open probe is let through: a fast success closes the circuit, a
+    failure or slow call opens it again.
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, error_rate=BREAKER_ERROR_RATE,
+                 window=BREAKER_WINDOW, recovery_seconds=BREAKER_RECOVERY_SECONDS,
+                 slow_call_seconds=BREAKER_SLOW_CALL_SECONDS, slow_call_rate=BREAKER_SLOW_CALL_RATE):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.recovery_seconds = recovery_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self._outcomes = deque(maxlen=window)  # (ok, latency_seconds)
+        self._state = "closed"
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._consecutive_failures = 0
+        self._last_error = None
+        self._counters = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """
+        Decide whether a call may go to the provider
+
+        Returns:
+            bool: True if the call should proceed
+        """
+        with self._lock:
+            if self._state == "closed":
+                return True
+            if self._state == "open" and time.monotonic() - self._opened_at >= self.recovery_seconds:
+                self._state = "half_open"
+            if self._state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._counters["rejected"] += 1
+            return False
+
+    def record_success(self, latency):
+        with self._lock:
+            self._counters["calls"] += 1
+            self._outcomes.append((True, latency))
+            self._consecutive_failures = 0
+            was_probe = self._probe_in_flight
+            self._probe_in_flight = False
+            slow = latency >= self.slow_call_seconds
+            if slow:
+                self._counters["slow_calls"] += 1
+                self._last_error = f"slow call: {latency:.1f}s"
+            if self._state != "closed":
+                # Only the half-open probe decides; a call that was already in
+                # flight when the circuit opened must not close it
+                if not was_probe:
+                    return
+                if slow:
+                    self._open()
+                    return
+                self._state = "closed"
+                self._opened_at = None
+                self._outcomes.clear()
+                self._outcomes.append((True, latency))
+            elif self._should_open():
+                self._open()
+
+    def record_failure(self, latency, error):
+        with self._lock:
+            self._counters["calls"] += 1
+            self._counters["failures"] += 1
+            self._outcomes.append((False, latency))
+            self._consecutive_failures += 1
+            self._last_error = f"{type(error).__name__}: {str(error)[:200]}"
+            was_probe = self._probe_in_flight
+            self._probe_in_flight = False
+            if was_probe or self._should_open():
+                self._open()
+
+    def _open(self):
+        if self._state != "open":
+            self._counters["opened"] += 1
+        self._state = "open"
+        self._opened_at = time.monotonic()
+
+    def _should_open(self):
+        if self._consecutive_failures >= self.failure_threshold:
+            return True
+        if len(self._outcomes) >= self.failure_threshold:
+            failures = sum(1 for ok, _ in self._outcomes if not ok)
+            slow = sum(1 for _, latency in self._outcomes if latency >= self.slow_call_seconds)
+            return (failures / len(self._outcomes) >= self.error_rate
+                    or slow / len(self._outcomes) >= self.slow_call_rate)
+        return False
+
+    def call(self, func, *args, **kwargs):
+        """
+        Run func through the breaker
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            Exception: Whatever func raises (recorded as a failure)
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"{self.name} circuit open; skipping provider")
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record_failure(time.perf_counter() - start, e)
+            raise
+        self.record_success(time.perf_counter() - start)
+        return result
+
+    def status(self):
+        """
+        Report state, error rate and latency for the status endpoint
+
+        Returns:
+            dict: breaker state and health metrics over the recent window
+        """
+        with self._lock:
+            latencies = sorted(latency for _, latency in self._outcomes)
+            failures = sum(1 for ok, _ in self._outcomes if not ok)
+            slow = sum(1 for latency in latencies if latency >= self.slow_call_seconds)
+            retry_in = None
+            if self._state == "open":
+                retry_in = round(max(self.recovery_seconds - (time.monotonic() - self._opened_at), 0.0), 1)
+            return {
+                "state": self._state,
+                "error_rate": round(failures / len(self._outcomes), 3) if self._outcomes else None,
+                "slow_call_rate": round(slow / len(latencies), 3) if latencies else None,
+                "p50_latency": round(latencies[len(latencies) // 2], 3) if latencies else None,
+                "p95_latency": round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)], 3) if latencies else None,
+                "consecutive_failures": self._consecutive_failures,
+                "retry_in_seconds": retry_in,
+                "last_error": self._last_error,
+                **self._counters
+            }
+
+
+_breakers = OrderedDict()
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(provider, api_key=None):
+    """
+    Return the breaker for a provider
+
+    API keys are supplied per request, so breakers are tracked per key
+    (identified by a short hash) to keep one caller's invalid key from
+    tripping the circuit for everyone else. At most BREAKER_MAX_ENTRIES
+    breakers are kept; the least recently used are dropped, so rotating or
+    user-supplied keys do not grow memory without bound.
+
+    Args:
+        provider: Provider name (xai, openai, dedalus)
+        api_key: API key used for the call
+
+    Returns:
+        CircuitBreaker: Shared breaker instance
+    """
+    key_id = hashlib.sha256(api_key.encode()).hexdigest()[:8] if api_key else "none"
+    name = f"{provider}:{key_id}"
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+            while len(_breakers) > BREAKER_MAX_ENTRIES:
+                _breakers.popitem(last=False)
+        else:
+            _breakers.move_to_end(name)
+    return breaker
+
+
+def breaker_status():
+    """
+    Report every breaker grouped by provider
+
+    Returns:
+        dict: {provider: {key_id: status}}
+    """
+    with _breakers_lock:
+        breakers = list(_breakers.items())
+    providers = {}
+    for name, breaker in breakers:
+        provider, key_id = name.split(":", 1)
+        providers.setdefault(provider, {})[key_id] = breaker.status()
+    return providers
@@ -0,0 +1,195 @@
+"""
+Declarative field extraction for insurance claim text
+All patterns are compiled once and applied in a single pass over the lines
+"""
+import re
+
+import numpy as np
+
+
+# Line labels that start a field. One alternation is searched per line and the
+# named group that matched says which field the line carries.
+FIELD_LABELS = {
+    "insurer": r"Insurance Company\s*:",
+    "claim_number": r"Claim Number\s*:",
+    "denial_code": r"DENIAL REASON CODE\s*:",
+    "denial_reason": r"DENIAL REASON\s*:",
+    "explanation": r"^\s*Explanation\s*:",
+    "total_claim_amount": r"Total Claim Amount\s*:",
+    "claim_amount": r"(?<!Total )Claim Amount\s*:",
+    "billed_amount": r"Billed Amount\s*:",
+    "denied_amount": r"(?:Total )?Denied Amount\s*:",
+    "icd_line": r"ICD|Diagnosis",
+    "cpt_line": r"CPT|Procedure",
+}
+LABEL_PATTERN = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in FIELD_LABELS.items()),
+    re.IGNORECASE
+)
+
+# Code patterns, anchored on word boundaries and only applied to lines that
+# mention diagnosis/procedure codes
+ICD10_PATTERN = re.compile(r"\b[A-TV-Z]\d[0-9A-Z](?:\.[0-9A-Z]{1,4})?\b")
+CPT_PATTERN = re.compile(r"\b\d{4}[0-9A-Z]\b")
+
+SINGLE_VALUE_FIELDS = ("insurer", "claim_number", "denial_code", "denial_reason",
+                       "total_claim_amount", "claim_amount", "denied_amount")
+MAX_EXPLANATION_CHARS = 200
+
+
+def _append_unique(values, seen, items):
+    for item in items:
+        if item not in seen:
+            seen.add(item)
+            values.append(item)
+
+
+def extract_claim_fields(text):
+    """
+    Extract structured fields from claim text in one pass
+
+    Args:
+        text: Claim text
+
+    Returns:
+        dict: insurer, claim_number, denial_code, denial_reason, explanation,
+            amounts (total_claim, claim, billed list, denied), icd10_codes and
+            cpt_codes (in document order, deduplicated). Missing fields are None
+            or empty lists.
+    """
+    fields = {name: None for name in SINGLE_VALUE_FIELDS}
+    fields["explanation"] = None
+    billed = []
+    icd_codes, icd_seen = [], set()
+    cpt_codes, cpt_seen = [], set()
+    explanation_lines = None
+    explanation_chars = 0
+
+    for line in (text or "").split("\n"):
+        if explanation_lines is not None:
+            # Collect the explanation paragraph until a blank line or enough text
+            stripped = line.strip()
+            if stripped:
+                explanation_lines.append(stripped)
+                explanation_chars += len(stripped) + 1
+            if (not stripped and explanation_lines) or explanation_chars >= MAX_EXPLANATION_CHARS:
+                fields["explanation"] = " ".join(explanation_lines)[:MAX_EXPLANATION_CHARS]
+                explanation_lines = None
+            continue
+
+        icd_scanned = cpt_scanned = False
+        for match in LABEL_PATTERN.finditer(line):
+            name = match.lastgroup
+            value = line[match.end():].strip()
+            if name == "icd_line":
+                if not icd_scanned:
+                    _append_unique(icd_codes, icd_seen, ICD10_PATTERN.findall(line))
+                    icd_scanned = True
+            elif name == "cpt_line":
+                if not cpt_scanned:
+                    _append_unique(cpt_codes, cpt_seen, CPT_PATTERN.findall(line))
+                    cpt_scanned = True
+            elif name == "billed_amount":
+                if value:
+                    billed.append(value)
+            elif name == "explanation":
+                if fields["explanation"] is not None:
+                    continue
+                if value:
+                    fields["explanation"] = value[:MAX_EXPLANATION_CHARS]
+                else:
+                    explanation_lines = []
+                    explanation_chars = 0
+            elif fields[name] is None and value:
+                fields[name] = value
+
+    if explanation_lines:
+        fields["explanation"] = " ".join(explanation_lines)[:MAX_EXPLANATION_CHARS]
+
+    return {
+        "insurer": fields["insurer"],
+        "claim_number": fields["claim_number"],
+        "denial_code": fields["denial_code"],
+        "denial_reason": fields["denial_reason"],
+        "explanation": fields["explanation"],
+        "amounts": {
+            "total_claim": fields["total_claim_amount"],
+            "claim": fields["claim_amount"],
+            "billed": billed,
+            "denied": fields["denied_amount"]
+        },
+        "icd10_codes": icd_codes,
+        "cpt_codes": cpt_codes
+    }
+
+
+# Keyword features used by the appeal predictor, in matrix column order.
+# text_length is computed separately; every other column is a 0/1 flag set
+# when any of its keywords occurs. "lower" keywords are searched in the
+# lower-cased text (ıcd: text.upper() maps the dotless i to I), "exact" ones
+# in the original text.
+CLAIM_FEATURE_COLS = ['text_length', 'has_icd_code', 'has_prior_auth', 'has_denial', 'has_appeal']
+CLAIM_KEYWORDS = {
+    "has_icd_code": {"lower": ("icd", "ıcd"), "exact": ("E11", "I10")},
+    "has_prior_auth": {"lower": ("prior auth", "authorization"), "exact": ()},
+    "has_denial": {"lower": ("denied", "denial"), "exact": ()},
+    "has_appeal": {"lower": ("appeal",), "exact": ()},
+}
+_KEYWORD_CHECKS = tuple((spec["lower"], spec["exact"]) for spec in CLAIM_KEYWORDS.values())
+
+
+def _keyword_flags(text):
+    lowered = text.lower()
+    flags = []
+    for lower, exact in _KEYWORD_CHECKS:
+        # Plain loops rather than any(<generator>): this runs per document
+        hit = False
+        for keyword in lower:
+            if keyword in lowered:
+                hit = True
+                break
+        else:
+            for keyword in exact:
+                if keyword in text:
+                    hit = True
+                    break
+        flags.append(hit)
+    return flags
+
+
+def claim_feature_matrix(texts):
+    """
+    Extract keyword features from many claim texts at once
+
+    Each text is lower-cased once and every keyword is checked with a plain
+    substring search (C-level, stops at the first hit); the flags for the
+    whole batch are then converted to a matrix in one step.
+
+    Args:
+        texts: Iterable of claim texts (list, pandas Series, ...); None/NaN
+            entries are treated as empty
+
+    Returns:
+        numpy.ndarray: int64 matrix of shape (n_texts, len(CLAIM_FEATURE_COLS))
+    """
+    texts = [text if isinstance(text, str) else "" for text in texts]
+    matrix = np.zeros((len(texts), len(CLAIM_FEATURE_COLS)), dtype=np.int64)
+    if not texts:
+        return matrix
+    matrix[:, 0] = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+    matrix[:, 1:] = np.array([_keyword_flags(text) for text in texts], dtype=np.int64)
+    return matrix
+
+
+def claim_feature_columns(texts):
+    """
+    Keyword features as {column: array}, ready for predict_appeal_batch
+
+    Args:
+        texts: Iterable of claim texts
+
+    Returns:
+        dict: CLAIM_FEATURE_COLS -> 1-D int64 arrays
+    """
+    matrix = claim_feature_matrix(texts)
+    return {name: matrix[:, j] for j, name in enumerate(CLAIM_FEATURE_COLS)}
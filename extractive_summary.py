@@ -0,0 +1,129 @@
+"""
+Fast extractive summarization for claim text
+Scores every sentence against the document's TF-IDF centroid in one sparse pass
+"""
+import re
+
+import numpy as np
+
+
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+SEPARATOR_LINE = re.compile(r'^[\s=\-_*#]*$')
+BULLET_PREFIX = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+')
+# "Label: value" lines are complete statements, not wrapped prose
+FIELD_LINE = re.compile(r'^\s*[A-Za-z][\w ()/#-]{0,40}:')
+# Sentences that state the denial are kept first, then ones carrying codes
+DENIAL_SENTENCE = re.compile(r'\bdenied\b|\bdenial reason\b', re.IGNORECASE)
+CODE_SENTENCE = re.compile(r'\b[A-TV-Z]\d[0-9A-Z]\.[0-9A-Z]{1,4}\b|\bCPT\b|\bICD', re.IGNORECASE)
+MIN_WORDS = 3
+FORCE_MIN_WORDS = 5  # shorter matches (e.g. checklist bullets) are not forced
+
+
+def split_sentences(text):
+    """
+    Split claim text into candidate sentences
+
+    Field lines ("Label: value") and bullets stand alone; other consecutive
+    lines are treated as wrapped prose, joined, and split on sentence
+    punctuation. Separator rules and fragments shorter than MIN_WORDS are
+    dropped.
+
+    Args:
+        text: Claim text
+
+    Returns:
+        list: Sentence strings in document order
+    """
+    blocks = []
+    prose = []
+    for line in (text or "").split("\n"):
+        if SEPARATOR_LINE.match(line) or FIELD_LINE.match(line) or BULLET_PREFIX.match(line):
+            if prose:
+                blocks.extend(SENTENCE_SPLIT.split(" ".join(prose)))
+                prose = []
+            if not SEPARATOR_LINE.match(line):
+                blocks.append(BULLET_PREFIX.sub('', line))
+        else:
+            prose.append(line.strip())
+    if prose:
+        blocks.extend(SENTENCE_SPLIT.split(" ".join(prose)))
+
+    return [block.strip() for block in blocks if len(block.split()) >= MIN_WORDS]
+
+
+def score_sentences(sentences):
+    """
+    Score sentences by TF-IDF centrality
+
+    Each sentence's score is its cosine similarity to the sum of all sentence
+    vectors, i.e. its total similarity to the rest of the document, computed
+    as one sparse matrix-vector product rather than an n x n similarity matrix.
+
+    Args:
+        sentences: List of sentence strings
+
+    Returns:
+        numpy.ndarray: One score per sentence
+    """
+    if not sentences:
+        return np.zeros(0)
+    # Imported here so serving processes that never use extractive mode skip scikit-learn
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    try:
+        matrix = TfidfVectorizer(stop_words='english', sublinear_tf=True).fit_transform(sentences)
+    except ValueError:
+        # Only stop words / empty vocabulary
+        return np.zeros(len(sentences))
+    centroid = np.asarray(matrix.sum(axis=0)).ravel()
+    norm = np.linalg.norm(centroid)
+    if norm == 0:
+        return np.zeros(len(sentences))
+    return matrix @ (centroid / norm)
+
+
+def extractive_summary(text, max_sentences=6):
+    """
+    Summarize claim text by selecting its most central sentences
+
+    Sentences stating the denial are kept first, then sentences carrying
+    diagnosis/procedure codes (up to max_sentences), and any remaining slots
+    are filled by centrality score. Selected sentences are returned in
+    document order.
+
+    Args:
+        text: Claim text
+        max_sentences: Maximum sentences in the summary
+
+    Returns:
+        str: Extractive summary
+    """
+    if not text or len(text.strip()) == 0:
+        return "No text found in claim document."
+
+    sentences = split_sentences(text)
+    if not sentences:
+        return text[:500]
+
+    scores = score_sentences(sentences)
+    priority = np.array([
+        0 if len(s.split()) < FORCE_MIN_WORDS
+        else 2 if DENIAL_SENTENCE.search(s)
+        else 1 if CODE_SENTENCE.search(s)
+        else 0
+        for s in sentences
+    ])
+
+    # Denial statements first, then code lines, then by centrality
+    order = np.lexsort((-scores, -priority))
+    seen = set()
+    selected = []
+    for index in order:
+        key = sentences[index].lower()
+        if key in seen:
+            continue  # Repeated boilerplate lines
+        seen.add(key)
+        selected.append(index)
+        if len(selected) >= max_sentences:
+            break
+
+    return "\n\n".join(sentences[i] for i in sorted(selected))
@@ -0,0 +1,277 @@
+"""
+Server-side store of parsed claims
+Keeps each uploaded PDF's extracted text, model features and parsed codes under
+the SHA-256 of the file, so later requests can send a claim ID instead of the text
+"""
+import hashlib
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from claim_extractor import extract_claim_fields
+from utils import parse_claim, get_claim_features
+
+
+FEATURE_STORE_PATH = os.getenv('FEATURE_STORE_PATH', 'feature_store.db')
+FEATURE_STORE_MEMORY_ENTRIES = int(os.getenv('FEATURE_STORE_MEMORY_ENTRIES', '128'))
+FEATURE_STORE_DISK_ENTRIES = int(os.getenv('FEATURE_STORE_DISK_ENTRIES', '10000'))
+# Bump when get_claim_features or extract_claim_fields change; stored claims
+# are then re-derived from their text on next access
+CLAIM_FEATURES_VERSION = "1"
+
+CLAIM_ID_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+class ClaimNotFoundError(KeyError):
+    """Raised when a claim ID is not in the store"""
+
+
+def claim_id_for(content):
+    """
+    Claim ID of an uploaded file
+
+    Args:
+        content: Raw file bytes
+
+    Returns:
+        str: Hex SHA-256 of the bytes
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+def build_claim_record(claim_id, text):
+    """Derive the stored features and parsed fields of a claim from its text"""
+    return {
+        "claim_id": claim_id,
+        "claim_text": text,
+        "features": get_claim_features(text),
+        "fields": extract_claim_fields(text),
+        "features_version": CLAIM_FEATURES_VERSION
+    }
+
+
+class FeatureStore:
+    """
+    Two-tier store of parsed claims keyed by claim ID
+
+    Same layout as SummaryCache: an in-memory LRU of records in front of a
+    SQLite table, with disk hits promoted to memory. Records are immutable
+    for a given file, so there is no TTL; the disk tier is bounded by
+    evicting the least recently accessed claims.
+    """
+
+    def __init__(self, db_path=FEATURE_STORE_PATH, max_memory_entries=FEATURE_STORE_MEMORY_ENTRIES,
+                 max_disk_entries=FEATURE_STORE_DISK_ENTRIES):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "parses": 0, "rebuilt": 0, "evictions": 0}
+
+    def _db(self):
+        """Open the SQLite tier on first use; must be called with the lock held"""
+        if self._conn is None and self.db_path:
+            try:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn.execute('''
+                    CREATE TABLE IF NOT EXISTS claims (
+                        claim_id TEXT PRIMARY KEY,
+                        claim_text TEXT,
+                        features TEXT,
+                        fields TEXT,
+                        features_version TEXT,
+                        created_at REAL,
+                        accessed_at REAL
+                    )
+                ''')
+                self._conn.execute('CREATE INDEX IF NOT EXISTS idx_claims_accessed ON claims (accessed_at)')
+                self._conn.commit()
+            except Exception as e:
+                print(f"Feature store disk tier unavailable: {str(e)}")
+                self._conn = None
+                self.db_path = None
+        return self._conn
+
+    def get(self, claim_id):
+        """
+        Look up a stored claim
+
+        Args:
+            claim_id: Claim ID from claim_id_for
+
+        Returns:
+            dict or None: claim_id, claim_text, features, fields and
+                features_version, or None if the claim is unknown
+        """
+        now = time.time()
+        with self._lock:
+            record = self._memory.get(claim_id)
+            if record is not None:
+                self._memory.move_to_end(claim_id)
+                self._counters["memory_hits"] += 1
+                return record
+
+            conn = self._db()
+            if conn is not None:
+                try:
+                    row = conn.execute('''
+                        SELECT claim_text, features, fields, features_version FROM claims WHERE claim_id = ?
+                    ''', (claim_id,)).fetchone()
+                    if row is not None:
+                        text, features, fields, version = row
+                        if version == CLAIM_FEATURES_VERSION:
+                            record = {"claim_id": claim_id, "claim_text": text, "features": json.loads(features),
+                                      "fields": json.loads(fields), "features_version": version}
+                        else:
+                            # Extraction logic changed since this claim was stored
+                            record = build_claim_record(claim_id, text)
+                            self._write(conn, record, now)
+                            self._counters["rebuilt"] += 1
+                        conn.execute('UPDATE claims SET accessed_at = ? WHERE claim_id = ?', (now, claim_id))
+                        conn.commit()
+                        self._remember(claim_id, record)
+                        self._counters["disk_hits"] += 1
+                        return record
+                except Exception as e:
+                    print(f"Feature store read error: {str(e)}")
+
+            self._counters["misses"] += 1
+            return None
+
+    def require(self, claim_id):
+        """
+        Look up a stored claim that must exist
+
+        Raises:
+            ClaimNotFoundError: If the claim ID is malformed or unknown
+        """
+        record = self.get(claim_id) if CLAIM_ID_PATTERN.match(str(claim_id)) else None
+        if record is None:
+            raise ClaimNotFoundError(f"Unknown claim ID '{claim_id}'; upload the claim again")
+        return record
+
+    def put(self, claim_id, text):
+        """
+        Derive and store a claim's features from its text
+
+        Args:
+            claim_id: Claim ID from claim_id_for
+            text: Extracted claim text
+
+        Returns:
+            dict: The stored record
+        """
+        record = build_claim_record(claim_id, text)
+        now = time.time()
+        with self._lock:
+            self._remember(claim_id, record)
+            conn = self._db()
+            if conn is not None:
+                try:
+                    self._write(conn, record, now)
+                    cursor = conn.execute('''
+                        DELETE FROM claims WHERE claim_id IN (
+                            SELECT claim_id FROM claims ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                        )
+                    ''', (self.max_disk_entries,))
+                    self._counters["evictions"] += max(cursor.rowcount, 0)
+                    conn.commit()
+                except Exception as e:
+                    print(f"Feature store write error: {str(e)}")
+        return record
+
+    def ingest_pdf(self, content):
+        """
+        Return the stored claim for a PDF, parsing it only the first time it is seen
+
+        Args:
+            content: Raw PDF bytes
+
+        Returns:
+            tuple: (record dict, cached bool)
+
+        Raises:
+            ValueError: If the PDF cannot be parsed
+        """
+        claim_id = claim_id_for(content)
+        record = self.get(claim_id)
+        if record is not None:
+            return record, True
+
+        text = parse_claim(io.BytesIO(content))
+        if text.startswith("Error"):
+            raise ValueError(text)
+        with self._lock:
+            self._counters["parses"] += 1
+        return self.put(claim_id, text), False
+
+    def _write(self, conn, record, now):
+        conn.execute('''
+            INSERT OR REPLACE INTO claims (claim_id, claim_text, features, fields, features_version,
+                                           created_at, accessed_at)
+            VALUES (?, ?, ?, ?, ?, COALESCE((SELECT created_at FROM claims WHERE claim_id = ?), ?), ?)
+        ''', (record["claim_id"], record["claim_text"], json.dumps(record["features"]),
+              json.dumps(record["fields"]), record["features_version"], record["claim_id"], now, now))
+
+    def _remember(self, claim_id, record):
+        """Insert into the memory tier, evicting least recently used claims"""
+        self._memory[claim_id] = record
+        self._memory.move_to_end(claim_id)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def stats(self):
+        """
+        Report hit/miss counters and tier sizes
+
+        Returns:
+            dict: counters, hit rate and entry counts
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else None
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = None
+            conn = self._db()
+            if conn is not None:
+                try:
+                    stats["disk_entries"] = conn.execute('SELECT COUNT(*) FROM claims').fetchone()[0]
+                except Exception:
+                    pass
+            return stats
+
+
+# Process-wide store used by backend/app.py
+feature_store = FeatureStore()
+
+
+def resolve_claim(data):
+    """
+    Claim text and features for a request body
+
+    Bodies may carry either "claim_id" (from /api/parse-claim) or the raw
+    "claim_text"; the ID wins when both are present.
+
+    Args:
+        data: Parsed JSON request body
+
+    Returns:
+        tuple: (claim_text, features dict or None); text is '' when neither is given
+
+    Raises:
+        ClaimNotFoundError: If claim_id is not in the store
+    """
+    claim_id = data.get('claim_id')
+    if claim_id:
+        record = feature_store.require(claim_id)
+        return record["claim_text"], record["features"]
+    return data.get('claim_text', ''), None
@@ -23,14 +23,24 @@ function AppealGenerator({ apiKeys }) {
     setError('');
 
     try {
-      const response = await apiService.generateAppeal(
+      // Stream the letter so it appears as soon as generation starts
+      let letter = '';
+      setAppealLetter('');
+      await apiService.generateAppealStream(
         claimText,
         formData.additionalNotes,
-        apiKeys.dedalus || null
+        apiKeys.dedalus || null,
+        (event) => {
+          if (event.type === 'delta') {
+            letter += event.text;
+            setAppealLetter(letter);
+          } else if (event.type === 'error') {
+            setError(event.error);
+          }
+        }
       );
-      setAppealLetter(response.data.appeal_letter);
     } catch (err) {
-      setError(err.response?.data?.error || err.message || 'An error occurred');
+      setError(err.message || 'An error occurred');
     } finally {
       setLoading(false);
     }
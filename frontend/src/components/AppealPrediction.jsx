@@ -1,5 +1,5 @@
-import React, { useState } from 'react';
-import apiService from '../services/api';
+import React, { useEffect, useState } from 'react';
+import apiService, { interpolateSurface } from '../services/api';
 
 function AppealPrediction({ apiKeys }) {
   const [formData, setFormData] = useState({
@@ -9,17 +9,52 @@ function AppealPrediction({ apiKeys }) {
     hasPriorAuth: false,
   });
   const [prediction, setPrediction] = useState(null);
+  // Inputs the shown prediction was computed for; any other inputs make it stale
+  const [predictedFor, setPredictedFor] = useState(null);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
+  // Probability grid for the current zip; age/amount changes are interpolated from it
+  const [surface, setSurface] = useState(null);
+
+  const localPrediction = (data, grid) => {
+    if (!grid || grid.zip !== data.zip) return null;
+    const probability = interpolateSurface(grid, data.age, data.amount, data.hasPriorAuth);
+    if (probability === null) return null;
+    return { probability, user_data: { age: data.age, zip: data.zip, amount: data.amount } };
+  };
+
+  // Update the shown prediction as inputs change, without a request per change.
+  // Inputs outside the grid (or a new zip) leave it marked stale until resubmitted.
+  useEffect(() => {
+    if (!prediction) return;
+    const local = localPrediction(formData, surface);
+    if (local) {
+      setPrediction(local);
+      setPredictedFor(formData);
+    }
+  }, [formData, surface]);
+
+  const stale = prediction !== null && predictedFor !== formData;
 
   const handleSubmit = async (e) => {
     e.preventDefault();
+    const submitted = formData;
     setLoading(true);
     setError('');
 
     try {
-      const response = await apiService.predictAppeal(formData, {});
-      setPrediction(response.data);
+      const response = await apiService.predictAppealSurface(submitted, {});
+      const grid = { ...response.data, zip: submitted.zip };
+      const local = localPrediction(submitted, grid);
+      if (local) {
+        setPrediction(local);
+      } else {
+        // Outside the grid (e.g. a very large amount): ask for the exact point
+        const exact = await apiService.predictAppeal(submitted, {});
+        setPrediction(exact.data);
+      }
+      setPredictedFor(submitted);
+      setSurface(grid);
     } catch (err) {
       setError(err.response?.data?.error || err.message || 'An error occurred');
     } finally {
@@ -114,7 +149,12 @@ function AppealPrediction({ apiKeys }) {
       )}
 
       {prediction && (
-        <div className="bg-white rounded-lg shadow p-6 space-y-4">
+        <div className={`bg-white rounded-lg shadow p-6 space-y-4 ${stale ? 'opacity-50' : ''}`}>
+          {stale && (
+            <p className="text-sm text-gray-600">
+              Inputs changed outside the predicted range. Click Predict to update.
+            </p>
+          )}
           <div className={`rounded-lg p-6 text-center ${getProbabilityColor(prediction.probability)}`}>
             <div className="text-4xl font-bold mb-2">{prediction.probability}%</div>
             <div className="text-lg font-medium">Appeal Success Probability</div>
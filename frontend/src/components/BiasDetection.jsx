@@ -1,6 +1,14 @@
 import React, { useState } from 'react';
+import { BarChart, Bar, XAxis, YAxis, Tooltip, Cell, ResponsiveContainer } from 'recharts';
 import apiService from '../services/api';
 
+const PAGE_SIZE = 10;
+
+// Turn the columnar /api/bias-patterns rows into chart objects
+const patternRows = (patterns) => patterns.rows.map((row) => (
+  Object.fromEntries(patterns.columns.map((name, i) => [name, row[i]]))
+));
+
 function BiasDetection({ apiKeys }) {
   const [formData, setFormData] = useState({
     zip: '08540',
@@ -12,15 +20,21 @@ function BiasDetection({ apiKeys }) {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [shared, setShared] = useState(false);
+  const [filters, setFilters] = useState({ zipPrefix: '', minRecords: 1 });
 
-  const handleDetectBias = async () => {
+  // The server returns aggregates only; the chart is drawn here
+  const loadPatterns = async (offset = 0) => {
     setLoading(true);
     setError('');
 
     try {
-      const response = await apiService.detectBias({
+      const response = await apiService.getBiasPatterns({
         zip: formData.zip,
         demo: formData.demo,
+        zipPrefix: filters.zipPrefix,
+        minRecords: filters.minRecords,
+        limit: PAGE_SIZE,
+        offset,
       });
       setBiasResult(response.data);
     } catch (err) {
@@ -30,6 +44,8 @@ function BiasDetection({ apiKeys }) {
     }
   };
 
+  const handleDetectBias = () => loadPatterns(0);
+
   const handleShareData = async () => {
     try {
       await apiService.shareAnonData({
@@ -143,14 +159,101 @@ function BiasDetection({ apiKeys }) {
             <p className="text-yellow-800">{biasResult.bias_message}</p>
           </div>
 
-          {biasResult.has_figure && (
+          <div className="grid grid-cols-3 gap-4 text-center">
+            <div className="bg-gray-50 rounded-lg p-3">
+              <div className="text-2xl font-bold">{biasResult.summary.total_records.toLocaleString()}</div>
+              <div className="text-sm text-gray-600">Shared records</div>
+            </div>
+            <div className="bg-gray-50 rounded-lg p-3">
+              <div className="text-2xl font-bold">{biasResult.summary.groups.toLocaleString()}</div>
+              <div className="text-sm text-gray-600">Groups</div>
+            </div>
+            <div className="bg-gray-50 rounded-lg p-3">
+              <div className="text-2xl font-bold">
+                {biasResult.summary.success_rate !== null ? `${biasResult.summary.success_rate}%` : '—'}
+              </div>
+              <div className="text-sm text-gray-600">Overall success rate</div>
+            </div>
+          </div>
+
+          {biasResult.user_cell && (
+            <p className="text-sm text-gray-700">
+              Your group ranks #{biasResult.user_cell.rank} of {biasResult.summary.groups} by denials
+              ({biasResult.user_cell.success_rate}% success, avg ${biasResult.user_cell.avg_amount.toLocaleString()}).
+            </p>
+          )}
+
+          <div className="flex flex-wrap items-end gap-4">
+            <div>
+              <label className="block text-sm font-medium text-gray-700 mb-1">Zip prefix</label>
+              <input
+                type="text"
+                value={filters.zipPrefix}
+                onChange={(e) => setFilters({ ...filters, zipPrefix: e.target.value })}
+                className="px-3 py-2 border border-gray-300 rounded-md"
+              />
+            </div>
             <div>
-              <img
-                src={apiService.getBiasHeatmap()}
-                alt="Bias Pattern Visualization"
-                className="w-full rounded-lg border"
+              <label className="block text-sm font-medium text-gray-700 mb-1">Min records</label>
+              <input
+                type="number"
+                min="1"
+                value={filters.minRecords}
+                onChange={(e) => setFilters({ ...filters, minRecords: parseInt(e.target.value) || 1 })}
+                className="w-24 px-3 py-2 border border-gray-300 rounded-md"
               />
             </div>
+            <button
+              onClick={() => loadPatterns(0)}
+              className="bg-gray-600 text-white py-2 px-4 rounded-md hover:bg-gray-700"
+            >
+              Apply
+            </button>
+          </div>
+
+          {biasResult.patterns.rows.length > 0 && (
+            <div>
+              <h4 className="font-medium text-gray-700 mb-2">Bias Pattern: Denials by Demographics & Zip Code</h4>
+              <ResponsiveContainer width="100%" height={40 * biasResult.patterns.rows.length + 40}>
+                <BarChart data={patternRows(biasResult.patterns)} layout="vertical" margin={{ left: 40 }}>
+                  <XAxis type="number" allowDecimals={false} />
+                  <YAxis
+                    type="category"
+                    dataKey={(row) => `${row.demo} - ${row.zip}`}
+                    width={140}
+                  />
+                  <Tooltip formatter={(value, name, item) => [`${value} (${item.payload.success_rate}% success)`, 'Denials']} />
+                  <Bar dataKey="denial_count">
+                    {patternRows(biasResult.patterns).map((row) => (
+                      <Cell
+                        key={`${row.demo}-${row.zip}`}
+                        fill={row.demo === formData.demo && row.zip === formData.zip ? '#dc2626' : 'coral'}
+                      />
+                    ))}
+                  </Bar>
+                </BarChart>
+              </ResponsiveContainer>
+
+              <div className="flex justify-between items-center text-sm text-gray-600">
+                <button
+                  onClick={() => loadPatterns(biasResult.patterns.offset - PAGE_SIZE)}
+                  disabled={biasResult.patterns.offset === 0 || loading}
+                  className="px-3 py-1 border rounded disabled:opacity-50"
+                >
+                  ← Previous
+                </button>
+                <span>
+                  {biasResult.patterns.offset + 1}–{biasResult.patterns.offset + biasResult.patterns.rows.length} of {biasResult.patterns.total}
+                </span>
+                <button
+                  onClick={() => loadPatterns(biasResult.patterns.offset + PAGE_SIZE)}
+                  disabled={biasResult.patterns.offset + PAGE_SIZE >= biasResult.patterns.total || loading}
+                  className="px-3 py-1 border rounded disabled:opacity-50"
+                >
+                  Next →
+                </button>
+              </div>
+            </div>
           )}
 
           {apiKeys.xai && (
@@ -23,17 +23,37 @@ function ClaimAnalysis({ apiKeys }) {
       const parseResponse = await apiService.parseClaim(selectedFile);
       const text = parseResponse.data.claim_text;
       setClaimText(text);
+      // The server keeps the parsed claim; refer to it by ID from here on
+      const claim = { claimId: parseResponse.data.claim_id };
 
       // Summarize
-      const summaryResponse = await apiService.summarizeClaim(text, {
+      const options = {
         useXAI: true,
         xaiKey: apiKeys.xai || null,
         useOpenAI: false,
         openaiKey: apiKeys.openai || null,
-      });
+      };
 
-      setSummary(summaryResponse.data.summary);
-      setUsedXAI(summaryResponse.data.used_xai);
+      if (text.length > 4000) {
+        // Multi-page claims are summarized section by section instead of truncated
+        const summaryResponse = await apiService.summarizeClaim(claim, { ...options, chunked: true });
+        setSummary(summaryResponse.data.summary);
+        setUsedXAI(summaryResponse.data.used_xai);
+      } else {
+        // Stream tokens so the summary starts appearing right away
+        let streamed = '';
+        setSummary('');
+        await apiService.summarizeClaimStream(claim, options, (event) => {
+          if (event.type === 'delta') {
+            streamed += event.text;
+            setSummary(streamed);
+          } else if (event.type === 'done') {
+            setUsedXAI(event.used_xai);
+          } else if (event.type === 'error') {
+            setError(event.error);
+          }
+        });
+      }
     } catch (err) {
       setError(err.response?.data?.error || err.message || 'An error occurred');
     } finally {
@@ -9,6 +9,41 @@ const api = axios.create({
   },
 });
 
+// POST a JSON body and read a Server-Sent Events response.
+// Calls onEvent with each parsed `data:` payload; resolves when the stream ends.
+const streamEvents = async (path, body, onEvent) => {
+  const response = await fetch(`${API_BASE_URL}${path}`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(body),
+  });
+  if (!response.ok) {
+    const data = await response.json().catch(() => ({}));
+    throw new Error(data.error || `Request failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const frames = buffer.split('\n\n');
+    buffer = frames.pop();
+    for (const frame of frames) {
+      const line = frame.split('\n').find((l) => l.startsWith('data:'));
+      if (line) onEvent(JSON.parse(line.slice(5)));
+    }
+  }
+};
+
+// A claim is either its text or { claimId } from parseClaim; the ID saves
+// re-sending (and the server re-processing) the whole document.
+const claimPayload = (claim) => (
+  claim && claim.claimId ? { claim_id: claim.claimId } : { claim_text: claim || '' }
+);
+
 // API service functions
 export const apiService = {
   // Health check
@@ -25,20 +60,35 @@ export const apiService = {
     });
   },
 
-  // Summarize claim
-  summarizeClaim: (claimText, options = {}) => {
+  // Summarize claim (text or { claimId })
+  summarizeClaim: (claim, options = {}) => {
     return api.post('/api/summarize', {
-      claim_text: claimText,
+      ...claimPayload(claim),
       use_openai: options.useOpenAI || false,
       openai_key: options.openaiKey || null,
       use_xai: options.useXAI || false,
       xai_key: options.xaiKey || null,
+      chunked: options.chunked || false,
+      hedged: options.hedged || false,
+      mode: options.mode || 'auto',
     });
   },
 
-  // Predict appeal success
+  // Stream claim summary (Server-Sent Events)
+  summarizeClaimStream: (claim, options = {}, onEvent) => {
+    return streamEvents('/api/summarize/stream', {
+      ...claimPayload(claim),
+      use_openai: options.useOpenAI || false,
+      openai_key: options.openaiKey || null,
+      use_xai: options.useXAI || false,
+      xai_key: options.xaiKey || null,
+    }, onEvent);
+  },
+
+  // Predict appeal success; userData.claimId uses the stored claim's features
   predictAppeal: (userData, claimFeatures = {}) => {
     return api.post('/api/predict-appeal', {
+      ...(userData.claimId ? { claim_id: userData.claimId } : {}),
       age: userData.age,
       zip: userData.zip,
       amount: userData.amount,
@@ -47,6 +97,24 @@ export const apiService = {
     });
   },
 
+  // Appeal success over an age x amount grid (both prior-auth layers) for
+  // interpolating slider changes locally; see interpolateSurface below.
+  // axes: { age: { min, max, steps }, amount: { min, max, steps } } (optional)
+  predictAppealSurface: (userData, claimFeatures = {}, axes = {}) => {
+    return api.post('/api/predict-appeal/surface', {
+      ...(userData.claimId ? { claim_id: userData.claimId } : {}),
+      zip: userData.zip,
+      claim_features: claimFeatures,
+      ...axes,
+    });
+  },
+
+  // Predict appeal success for many claims in one request.
+  // claims: [{ age, zip, amount, has_prior_auth, text_length, has_icd_code }, ...]
+  predictAppealBatch: (claims) => {
+    return api.post('/api/predict-appeal/batch', { claims });
+  },
+
   // Detect bias
   detectBias: (userData) => {
     return api.post('/api/detect-bias', {
@@ -55,6 +123,22 @@ export const apiService = {
     });
   },
 
+  // Bias aggregates as JSON for client-side charts.
+  // params: { demo, zip, filterDemo, zipPrefix, minRecords, limit, offset }
+  getBiasPatterns: (params = {}) => {
+    return api.get('/api/bias-patterns', {
+      params: {
+        demo: params.demo,
+        zip: params.zip,
+        filter_demo: params.filterDemo || undefined,
+        zip_prefix: params.zipPrefix || undefined,
+        min_records: params.minRecords || undefined,
+        limit: params.limit || 10,
+        offset: params.offset || 0,
+      },
+    });
+  },
+
   // Share anonymized data
   shareAnonData: (data) => {
     return api.post('/api/share-anon-data', {
@@ -66,15 +150,29 @@ export const apiService = {
     });
   },
 
-  // Generate appeal letter
-  generateAppeal: (claimText, additionalNotes, dedalusKey) => {
+  // Get a stored claim's features and parsed fields
+  getClaim: (claimId, includeText = false) => {
+    return api.get(`/api/claims/${claimId}`, { params: { include_text: includeText ? 1 : 0 } });
+  },
+
+  // Generate appeal letter (claim text or { claimId })
+  generateAppeal: (claim, additionalNotes, dedalusKey) => {
     return api.post('/api/generate-appeal', {
-      claim_text: claimText,
+      ...claimPayload(claim),
       additional_notes: additionalNotes,
       dedalus_key: dedalusKey,
     });
   },
 
+  // Stream appeal letter (Server-Sent Events)
+  generateAppealStream: (claim, additionalNotes, dedalusKey, onEvent) => {
+    return streamEvents('/api/generate-appeal/stream', {
+      ...claimPayload(claim),
+      additional_notes: additionalNotes,
+      dedalus_key: dedalusKey,
+    }, onEvent);
+  },
+
   // Grok real-time analysis
   grokAnalysis: (query, xaiKey) => {
     return api.post('/api/grok-analysis', {
@@ -91,11 +189,33 @@ export const apiService = {
     });
   },
 
-  // Get bias heatmap
-  getBiasHeatmap: () => {
-    return `${API_BASE_URL}/api/bias-heatmap`;
+  // Get bias heatmap; pass the chart_version from detectBias so the browser
+  // refetches only when the data changed (the server also honors If-None-Match)
+  getBiasHeatmap: (chartVersion) => {
+    return `${API_BASE_URL}/api/bias-heatmap${chartVersion ? `?v=${encodeURIComponent(chartVersion)}` : ''}`;
   },
 };
 
+// Bilinear interpolation of a /api/predict-appeal/surface response.
+// Returns null when age or amount is outside the grid.
+export const interpolateSurface = (surface, age, amount, hasPriorAuth) => {
+  const { ages, amounts, prior_auth: priorAuth, probabilities } = surface;
+  const layer = probabilities[Math.max(priorAuth.indexOf(hasPriorAuth ? 1 : 0), 0)];
+  const locate = (axis, value) => {
+    if (!(value >= axis[0] && value <= axis[axis.length - 1])) return null;
+    if (axis.length === 1) return [0, 0, 0];
+    const step = (axis[axis.length - 1] - axis[0]) / (axis.length - 1);
+    const i = Math.min(Math.floor((value - axis[0]) / step), axis.length - 2);
+    return [i, i + 1, (value - axis[i]) / step];
+  };
+  const a = locate(ages, age);
+  const m = locate(amounts, amount);
+  if (!a || !m) return null;
+  const lerp = (x, y, t) => x + (y - x) * t;
+  const low = lerp(layer[a[0]][m[0]], layer[a[0]][m[1]], m[2]);
+  const high = lerp(layer[a[1]][m[0]], layer[a[1]][m[1]], m[2]);
+  return Math.round(lerp(low, high, a[2]) * 100) / 100;
+};
+
 export default apiService;
 
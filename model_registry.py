@@ -0,0 +1,326 @@
+"""
+Versioned on-disk registry for trained appeal models
+Each version is an immutable directory of artifacts plus metadata; the served
+version is named by a pointer file that is swapped atomically on promotion
+
+Run with: python model_registry.py [list | promote <version> | rollback]
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to an exclusive-create lock file
+    fcntl = None
+
+
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', 'model_registry')
+MODEL_ARTIFACT = 'model.pkl'
+METADATA_FILE = 'metadata.json'
+STATE_FILE = 'state.json'
+
+
+def _write_atomic(path, content):
+    """Write bytes to path via a temporary file and os.replace"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ModelRegistry:
+    """
+    Directory of model versions with an atomically swapped CURRENT pointer
+
+    Layout:
+        <root>/versions/<version>/model.pkl (+ other artifacts), metadata.json
+        <root>/CURRENT          version being served
+        <root>/history.jsonl    promotion log (used by rollback)
+        <root>/state.json       registry-wide values, e.g. the online updater's watermark
+        <root>/train.lock       held by the one process allowed to train
+
+    Versions are written to a temporary directory and renamed into place, so
+    a version directory is either complete or absent. Readers resolve CURRENT
+    to a version and then read only that version's files.
+    """
+
+    def __init__(self, root=MODEL_REGISTRY_DIR):
+        self.root = root
+        self.versions_dir = os.path.join(root, 'versions')
+        self.pointer_path = os.path.join(root, 'CURRENT')
+        self.history_path = os.path.join(root, 'history.jsonl')
+        self.lock_path = os.path.join(root, 'train.lock')
+        # Makes training_lock re-entrant within this process
+        self._local_lock = threading.RLock()
+        self._lock_depth = 0
+
+    def _ensure_dirs(self):
+        os.makedirs(self.versions_dir, exist_ok=True)
+
+    def register(self, artifacts, metadata=None):
+        """
+        Store a new immutable version
+
+        Args:
+            artifacts: {file name: bytes}; must include MODEL_ARTIFACT
+            metadata: JSON-serializable dict (features, metrics, training time, ...)
+
+        Returns:
+            str: The new version id
+        """
+        if MODEL_ARTIFACT not in artifacts:
+            raise ValueError(f"artifacts must include {MODEL_ARTIFACT}")
+        self._ensure_dirs()
+        digest = hashlib.sha256(artifacts[MODEL_ARTIFACT]).hexdigest()
+        version = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{digest[:8]}-{uuid.uuid4().hex[:4]}"
+
+        staging = tempfile.mkdtemp(dir=self.versions_dir, prefix='.tmp-')
+        try:
+            for name, content in artifacts.items():
+                with open(os.path.join(staging, name), 'wb') as f:
+                    f.write(content)
+                    f.flush()
+                    os.fsync(f.fileno())
+            record = dict(metadata or {})
+            record.update({
+                "version": version,
+                "sha256": digest,
+                "artifacts": sorted(artifacts),
+                "registered_at": time.time()
+            })
+            with open(os.path.join(staging, METADATA_FILE), 'w') as f:
+                json.dump(record, f, indent=2, default=str)
+            os.rename(staging, os.path.join(self.versions_dir, version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return version
+
+    def promote(self, version):
+        """
+        Make version the served one with a single atomic pointer replace
+
+        Raises:
+            KeyError: If the version does not exist
+        """
+        if not os.path.isdir(os.path.join(self.versions_dir, version)):
+            raise KeyError(f"Unknown model version: {version}")
+        previous = self.current_version()
+        _write_atomic(self.pointer_path, version.encode('utf-8'))
+        with open(self.history_path, 'a') as f:
+            f.write(json.dumps({"version": version, "previous": previous, "promoted_at": time.time()}) + "\n")
+
+    def rollback(self):
+        """
+        Re-promote the version that was served before the current one
+
+        Returns:
+            str or None: The version now served, or None if there is no history
+        """
+        if not os.path.exists(self.history_path):
+            return None
+        with open(self.history_path) as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        current = self.current_version()
+        for entry in reversed(entries):
+            if entry["version"] == current and entry.get("previous"):
+                self.promote(entry["previous"])
+                return entry["previous"]
+        return None
+
+    def current_version(self):
+        """Version named by the CURRENT pointer, or None if nothing is promoted"""
+        try:
+            with open(self.pointer_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def artifact_path(self, version=None, name=MODEL_ARTIFACT):
+        """Path of an artifact of version (default: current), or None"""
+        version = version or self.current_version()
+        if version is None:
+            return None
+        return os.path.join(self.versions_dir, version, name)
+
+    def metadata(self, version=None):
+        """Metadata dict of version (default: current), or None"""
+        path = self.artifact_path(version, METADATA_FILE)
+        if path is None or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def delete(self, version):
+        """
+        Remove a version's directory
+
+        Raises:
+            ValueError: If the version is the one being served
+        """
+        if version == self.current_version():
+            raise ValueError(f"Cannot delete the served version {version}")
+        shutil.rmtree(os.path.join(self.versions_dir, version), ignore_errors=True)
+
+    def get_state(self, key, default=None):
+        """Registry-wide value stored independently of any version"""
+        try:
+            with open(os.path.join(self.root, STATE_FILE)) as f:
+                return json.load(f).get(key, default)
+        except FileNotFoundError:
+            return default
+
+    def set_state(self, key, value):
+        """Store a registry-wide value; callers should hold training_lock"""
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, STATE_FILE)
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = {}
+        state[key] = value
+        _write_atomic(path, json.dumps(state, indent=2).encode('utf-8'))
+
+    def versions(self):
+        """Metadata of every registered version, oldest first"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        records = []
+        for version in sorted(os.listdir(self.versions_dir)):
+            if not version.startswith('.'):
+                record = self.metadata(version)
+                if record is not None:
+                    records.append(record)
+        return records
+
+    @contextmanager
+    def training_lock(self, blocking=False):
+        """
+        Hold the registry-wide training lock
+
+        Yields True if the lock was acquired. With blocking=False, yields
+        False immediately when another process or thread is training, so
+        callers can keep serving the current version instead of training
+        too. Nested use from the thread that holds the lock succeeds.
+        """
+        if not self._local_lock.acquire(blocking=blocking):
+            yield False
+            return
+        try:
+            if self._lock_depth > 0:
+                self._lock_depth += 1
+                try:
+                    yield True
+                finally:
+                    self._lock_depth -= 1
+                return
+            with self._process_lock(blocking) as acquired:
+                if not acquired:
+                    yield False
+                    return
+                self._lock_depth = 1
+                try:
+                    yield True
+                finally:
+                    self._lock_depth = 0
+        finally:
+            self._local_lock.release()
+
+    @contextmanager
+    def _process_lock(self, blocking):
+        self._ensure_dirs()
+        if fcntl is not None:
+            with open(self.lock_path, 'a+') as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield False
+                    return
+                f.seek(0)
+                f.truncate()
+                f.write(f"{os.getpid()}\n")
+                f.flush()
+                try:
+                    yield True
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+            return
+
+        while True:
+            try:
+                fd = os.open(self.lock_path + '.pid', os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                if not blocking:
+                    yield False
+                    return
+                time.sleep(0.5)
+        try:
+            os.write(fd, f"{os.getpid()}\n".encode())
+            yield True
+        finally:
+            os.close(fd)
+            os.remove(self.lock_path + '.pid')
+
+    def status(self):
+        """
+        Report the served version and registry size
+
+        Returns:
+            dict: root, current version metadata and version count
+        """
+        return {
+            "root": self.root,
+            "current": self.metadata(),
+            "versions": len(self.versions())
+        }
+
+
+# Shared by models.py, model_search.py and the CLI below
+model_registry = ModelRegistry()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and promote appeal model versions")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("list", help="list registered versions")
+    promote = subparsers.add_parser("promote", help="serve a registered version")
+    promote.add_argument("version")
+    subparsers.add_parser("rollback", help="serve the previously promoted version")
+    args = parser.parse_args()
+
+    if args.command == "promote":
+        model_registry.promote(args.version)
+        print(f"Promoted {args.version}")
+    elif args.command == "rollback":
+        version = model_registry.rollback()
+        print(f"Rolled back to {version}" if version else "No earlier promotion to roll back to")
+    else:
+        current = model_registry.current_version()
+        for record in model_registry.versions():
+            marker = "*" if record["version"] == current else " "
+            metrics = ", ".join(f"{k}={v:.4f}" for k, v in (record.get("metrics") or {}).items()
+                                if isinstance(v, (int, float)))
+            print(f"{marker} {record['version']}  {record.get('model_type', '?'):<24} {metrics}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,360 @@
+"""
+Offline hyperparameter search for the appeal predictor
+Cross-validates several model families in a process pool, measures each
+candidate's serving latency serially once the pool is done, writes a
+leaderboard, and promotes the winner only if it meets the latency budget
+
+Run with: python model_search.py [--data claims.csv] [--promote]
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import ParameterGrid, StratifiedKFold
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from model_registry import model_registry
+from models import (
+    APPEAL_FEATURE_COLS, APPEAL_SERVE_ARTIFACT, has_serve_artifact, publish_appeal_model, synthetic_appeal_data
+)
+
+
+MODEL_SEARCH_DIR = os.getenv('MODEL_SEARCH_DIR', 'model_search')
+# Single-claim p95 prediction latency a model must meet to be promoted
+APPEAL_LATENCY_BUDGET_MS = float(os.getenv('APPEAL_LATENCY_BUDGET_MS', '5'))
+LATENCY_SAMPLES = 50
+
+
+def _baseline(**params):
+    return LogisticRegression(max_iter=1000, random_state=42, **params)
+
+
+def _scaled_logistic(C):
+    return make_pipeline(StandardScaler(), LogisticRegression(C=C, max_iter=1000, random_state=42))
+
+
+def _random_forest(**params):
+    return RandomForestClassifier(random_state=42, n_jobs=1, **params)
+
+
+def _gradient_boosting(**params):
+    return HistGradientBoostingClassifier(random_state=42, **params)
+
+
+# family: (constructor, parameter grid)
+MODEL_FAMILIES = {
+    "baseline_logistic": (_baseline, {}),
+    "scaled_logistic": (_scaled_logistic, {"C": [0.01, 0.1, 1.0, 10.0]}),
+    "random_forest": (_random_forest, {"n_estimators": [100, 300], "max_depth": [None, 8]}),
+    "gradient_boosting": (_gradient_boosting, {"learning_rate": [0.05, 0.1], "max_depth": [None, 6]}),
+}
+
+
+def candidate_grid(families=None):
+    """
+    Expand MODEL_FAMILIES into (family, params) candidates
+
+    Args:
+        families: Family names to include (default: all)
+
+    Returns:
+        list: (family, params) tuples
+    """
+    candidates = []
+    for family in families or MODEL_FAMILIES:
+        _, grid = MODEL_FAMILIES[family]
+        candidates.extend((family, params) for params in ParameterGrid(grid))
+    return candidates
+
+
+def build_model(family, params):
+    constructor, _ = MODEL_FAMILIES[family]
+    return constructor(**params)
+
+
+def single_claim_latency_ms(model, X):
+    """
+    p95 latency of a one-claim prediction, the per-request serving path
+
+    Does what predict_appeal does per request (build a one-row DataFrame and
+    call predict_proba) but calls the model directly, so a model that raises
+    fails the measurement instead of looking fast behind predict_appeal's
+    50% fallback. Run it outside the process pool: timings taken while other
+    folds are fitting measure CPU contention, not the model.
+    """
+    records = X.iloc[:LATENCY_SAMPLES].to_dict('records')
+    model.predict_proba(pd.DataFrame(records[:1])[APPEAL_FEATURE_COLS])  # warm up
+    timings = []
+    for record in records:
+        start = time.perf_counter()
+        model.predict_proba(pd.DataFrame([record])[APPEAL_FEATURE_COLS])
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+
+
+# Training data shared with pool workers once, via the initializer
+_worker_data = {}
+
+
+def _init_worker(X, y):
+    _worker_data["X"] = X
+    _worker_data["y"] = y
+
+
+def _fit_fold(family, params, train_index, test_index, cache_path, return_model=False):
+    """
+    Fit and score one candidate on one fold
+
+    The fitted model and its metrics are cached on disk; only the metrics
+    are sent back to the parent process, plus the model when return_model is
+    set (one fold per candidate, for the latency measurement).
+    """
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+        if not return_model:
+            cached.pop("model", None)
+        return cached
+
+    X, y = _worker_data["X"], _worker_data["y"]
+    X_train, y_train = X.iloc[train_index], y[train_index]
+    X_test, y_test = X.iloc[test_index], y[test_index]
+
+    model = build_model(family, params)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    proba = model.predict_proba(X_test)[:, 1]
+    predict_seconds = time.perf_counter() - start
+
+    result = {
+        "accuracy": accuracy_score(y_test, (proba > 0.5).astype(int)),
+        "auc": roc_auc_score(y_test, proba) if len(np.unique(y_test)) > 1 else float('nan'),
+        "fit_seconds": fit_seconds,
+        "predict_us_per_row": predict_seconds / len(test_index) * 1e6,
+        "model": model,
+    }
+    if cache_path:
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(result, f)
+        os.replace(tmp_path, cache_path)
+    if not return_model:
+        result.pop("model")
+    return result
+
+
+def _fold_cache_path(cache_dir, data_digest, family, params, folds, fold):
+    key = json.dumps([data_digest, family, params, folds, fold], sort_keys=True, default=str)
+    return os.path.join(cache_dir, hashlib.sha256(key.encode()).hexdigest()[:24] + '.pkl')
+
+
+def load_training_data(data_path=None, max_rows=None, synthetic_rows=5000):
+    """
+    Load the feature matrix and labels for the search
+
+    Args:
+        data_path: CSV with APPEAL_FEATURE_COLS and 'outcome' (synthetic data if None)
+        max_rows: Randomly sample at most this many rows
+        synthetic_rows: Rows of synthetic data when no CSV is given
+
+    Returns:
+        tuple: (X DataFrame, y ndarray)
+    """
+    if data_path:
+        df = pd.read_csv(data_path)
+    else:
+        df = synthetic_appeal_data(synthetic_rows)
+    if max_rows and len(df) > max_rows:
+        df = df.sample(max_rows, random_state=42)
+    for col in APPEAL_FEATURE_COLS:
+        if col not in df.columns:
+            df[col] = 0
+    X = df[APPEAL_FEATURE_COLS].apply(pd.to_numeric, errors='coerce').fillna(0).reset_index(drop=True)
+    y = (pd.to_numeric(df['outcome'], errors='coerce').fillna(0).to_numpy() > 0).astype(int)
+    return X, y
+
+
+def run_search(X, y, candidates=None, folds=5, workers=None, output_dir=MODEL_SEARCH_DIR, use_cache=True):
+    """
+    Cross-validate every candidate, spreading (candidate, fold) jobs across processes
+
+    Once the pool has finished, each candidate's first-fold model is timed
+    serially in this process, so the latency budget is not skewed by folds
+    still fitting on other cores. Folds without both classes have no AUC
+    and are left out of the candidate's mean; a candidate with no AUC on any
+    fold ranks last.
+
+    Args:
+        X: Feature DataFrame in APPEAL_FEATURE_COLS order
+        y: 0/1 labels
+        candidates: (family, params) list (default: candidate_grid())
+        folds: Number of stratified CV folds
+        workers: Pool size (default: all cores)
+        output_dir: Directory for the fold cache and leaderboard
+        use_cache: Reuse fold results from earlier runs on the same data
+
+    Returns:
+        list: Leaderboard rows sorted by mean AUC, best first
+    """
+    candidates = candidates or candidate_grid()
+    workers = workers or os.cpu_count() or 1
+    cache_dir = os.path.join(output_dir, 'fold_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    data_digest = hashlib.sha256(X.to_numpy().tobytes() + y.tobytes()).hexdigest()
+
+    splits = list(StratifiedKFold(n_splits=folds, shuffle=True, random_state=42).split(X, y))
+    results = {index: [] for index in range(len(candidates))}
+    start = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(X, y)) as pool:
+        futures = {}
+        for index, (family, params) in enumerate(candidates):
+            for fold, (train_index, test_index) in enumerate(splits):
+                cache_path = _fold_cache_path(cache_dir, data_digest, family, params, folds, fold) if use_cache else None
+                future = pool.submit(_fit_fold, family, params, train_index, test_index, cache_path,
+                                     return_model=fold == 0)
+                futures[future] = index
+        for future in as_completed(futures):
+            results[futures[future]].append(future.result())
+
+    leaderboard = []
+    for index, (family, params) in enumerate(candidates):
+        fold_results = results[index]
+        row = {"family": family, "params": params}
+        for metric in ("accuracy", "auc", "fit_seconds", "predict_us_per_row"):
+            values = [result[metric] for result in fold_results if not np.isnan(result[metric])]
+            row[metric] = statistics.mean(values) if values else None
+            if metric in ("accuracy", "auc"):
+                row[f"{metric}_std"] = statistics.pstdev(values) if values else None
+        model = next(result["model"] for result in fold_results if "model" in result)
+        row["single_claim_p95_ms"] = single_claim_latency_ms(model, X)
+        row["servable"] = has_serve_artifact(model)
+        leaderboard.append(row)
+    leaderboard.sort(key=lambda row: (row["auc"] is None, -(row["auc"] or 0), -row["accuracy"]))
+
+    with open(os.path.join(output_dir, 'leaderboard.json'), 'w') as f:
+        json.dump({
+            "folds": folds,
+            "rows": len(y),
+            "workers": workers,
+            "search_seconds": time.perf_counter() - start,
+            "leaderboard": leaderboard
+        }, f, indent=2, default=str)
+    return leaderboard
+
+
+def promote_winner(X, y, leaderboard, budget_ms=APPEAL_LATENCY_BUDGET_MS):
+    """
+    Refit the best candidate within the latency budget and promote it if it still meets the budget
+
+    Candidates whose single-claim latency exceeded the budget, that have no
+    cross-validated AUC, or that cannot produce APPEAL_SERVE_ARTIFACT (e.g.
+    a pipeline or tree model when serving model.npz) are skipped; the
+    winner's latency and artifact are checked again after refitting on all
+    data. The refit model is registered as a new registry version either
+    way, but only promoted (served) if it passes. Publishing holds the
+    registry training lock, like train_appeal_predictor and the online
+    updater.
+
+    Args:
+        X: Feature DataFrame
+        y: Labels
+        leaderboard: Output of run_search
+        budget_ms: Maximum single-claim p95 latency in milliseconds
+
+    Returns:
+        dict: winner, measured latency and whether it was promoted
+    """
+    eligible = [row for row in leaderboard
+                if row["single_claim_p95_ms"] <= budget_ms and row["auc"] is not None and row["servable"]]
+    if not eligible:
+        return {"family": None, "budget_ms": budget_ms, "promoted": False, "version": None,
+                "reason": f"no candidate with an AUC and a {APPEAL_SERVE_ARTIFACT} met the latency budget"}
+
+    winner = eligible[0]
+    model = build_model(winner["family"], winner["params"])
+    start = time.perf_counter()
+    model.fit(X, y)
+    training_seconds = time.perf_counter() - start
+    latency_ms = single_claim_latency_ms(model, X)
+    servable = has_serve_artifact(model)
+    promoted = latency_ms <= budget_ms and servable
+    metrics = {metric: winner[metric] for metric in ("accuracy", "auc", "predict_us_per_row")}
+    metrics["single_claim_p95_ms"] = latency_ms
+    with model_registry.training_lock(blocking=True):
+        version = publish_appeal_model(model, metrics, training_seconds, promote=promoted)
+    return {
+        "family": winner["family"],
+        "params": winner["params"],
+        "auc": winner["auc"],
+        "single_claim_p95_ms": latency_ms,
+        "budget_ms": budget_ms,
+        "promoted": promoted,
+        "version": version,
+        "reason": (None if promoted else "latency after refit exceeded the budget" if servable
+                   else f"refit model has no {APPEAL_SERVE_ARTIFACT}"),
+        "skipped": leaderboard.index(winner)
+    }
+
+
+def print_leaderboard(leaderboard, budget_ms):
+    print(f"{'rank':>4} {'family':<18} {'params':<36} {'acc':>6} {'AUC':>6} {'fit s':>6} "
+          f"{'us/row':>7} {'p95 ms':>7}")
+    for rank, row in enumerate(leaderboard, 1):
+        params = ", ".join(f"{k}={v}" for k, v in row["params"].items()) or "-"
+        flag = "" if row["single_claim_p95_ms"] <= budget_ms else "  (over budget)"
+        if not row["servable"]:
+            flag += f"  (no {APPEAL_SERVE_ARTIFACT})"
+        auc = f"{row['auc']:>6.3f}" if row["auc"] is not None else f"{'n/a':>6}"
+        print(f"{rank:>4} {row['family']:<18} {params:<36} {row['accuracy']:>6.3f} {auc} "
+              f"{row['fit_seconds']:>6.2f} {row['predict_us_per_row']:>7.1f} {row['single_claim_p95_ms']:>7.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated model search for the appeal predictor")
+    parser.add_argument("--data", help="training CSV (synthetic data if omitted)")
+    parser.add_argument("--max-rows", type=int, help="sample at most this many rows")
+    parser.add_argument("--families", nargs="+", choices=list(MODEL_FAMILIES))
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, help="process pool size (default: all cores)")
+    parser.add_argument("--output-dir", default=MODEL_SEARCH_DIR)
+    parser.add_argument("--no-cache", action="store_true", help="refit every fold")
+    parser.add_argument("--budget-ms", type=float, default=APPEAL_LATENCY_BUDGET_MS)
+    parser.add_argument("--promote", action="store_true", help="replace the served model if the winner meets the budget")
+    args = parser.parse_args()
+
+    X, y = load_training_data(args.data, args.max_rows)
+    leaderboard = run_search(X, y, candidate_grid(args.families), args.folds, args.workers,
+                             args.output_dir, use_cache=not args.no_cache)
+    print_leaderboard(leaderboard, args.budget_ms)
+    print(f"Leaderboard written to {os.path.join(args.output_dir, 'leaderboard.json')}")
+
+    if args.promote:
+        outcome = promote_winner(X, y, leaderboard, args.budget_ms)
+        if outcome["promoted"]:
+            print(f"Promoted {outcome['family']} {outcome['params']} as version {outcome['version']} "
+                  f"(p95 {outcome['single_claim_p95_ms']:.2f} ms <= {outcome['budget_ms']} ms budget; "
+                  f"{outcome['skipped']} higher-ranked candidates were over budget, had no AUC or could not be served)")
+        else:
+            print(f"Not promoted: {outcome['reason']}")
+
+
+if __name__ == "__main__":
+    main()
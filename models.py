@@ -1,52 +1,195 @@
 """
 ML Models and API Integrations for ClaimEquity AI
 Handles appeal prediction, agent integrations, and real-time analysis
+
+scikit-learn and pandas are imported by the training functions only, so a
+process serving an exported .npz/.json scorer never loads them
 """
-import pandas as pd
 import numpy as np
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score, classification_report
 import requests
 import os
 import pickle
 import json
+import hashlib
+import tempfile
+import threading
+import time
+from circuit_breaker import get_breaker
+from model_registry import model_registry, MODEL_ARTIFACT
+from appeal_scorer import (
+    APPEAL_FEATURE_COLS, APPEAL_FEATURE_DEFAULTS, build_feature_matrix,
+    LinearAppealScorer, export_scorer, is_scorer_path, loads_scorer
+)
+
+
+# Legacy single-file model, served only while the registry has no promoted version
+APPEAL_MODEL_PATH = os.getenv('APPEAL_MODEL_PATH', 'appeal_model.pkl')
+# NumPy scorer export stored with every registry version of a linear model
+SCORER_ARTIFACT = 'model.npz'
+# Artifact of the promoted registry version to serve (model.pkl, or model.npz for the NumPy scorer)
+APPEAL_SERVE_ARTIFACT = os.getenv('APPEAL_SERVE_ARTIFACT', MODEL_ARTIFACT)
+APPEAL_MODEL_CHECK_SECONDS = float(os.getenv('APPEAL_MODEL_CHECK_SECONDS', '5'))
+# Training CSVs larger than this are streamed in chunks instead of loaded whole
+APPEAL_TRAIN_STREAM_MB = float(os.getenv('APPEAL_TRAIN_STREAM_MB', '200'))
+APPEAL_TRAIN_CHUNK_ROWS = int(os.getenv('APPEAL_TRAIN_CHUNK_ROWS', '100000'))
+APPEAL_TRAIN_EPOCHS = int(os.getenv('APPEAL_TRAIN_EPOCHS', '3'))
+# Optional NumPy-only export (.npz/.json) written after each training run
+APPEAL_EXPORT_PATH = os.getenv('APPEAL_EXPORT_PATH', '')
+# Largest age x amount x prior-auth grid predict_appeal_surface will score
+APPEAL_SURFACE_MAX_POINTS = int(os.getenv('APPEAL_SURFACE_MAX_POINTS', '100000'))
+
+
+def save_model_atomic(model, path):
+    """
+    Pickle a model to path without ever exposing a partially written file
+
+    The model is written to a temporary file in the same directory and moved
+    into place with os.replace, so readers see either the old or new file.
+    Paths ending in .npz/.json get the NumPy-only scorer export instead.
+    """
+    if is_scorer_path(path):
+        export_scorer(model, path)
+        return
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix='.pkl')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(model, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def synthetic_appeal_data(n_samples=1000, seed=42):
+    """
+    Generate synthetic training data based on CMS patterns
+
+    Args:
+        n_samples: Number of rows
+        seed: Random seed
+
+    Returns:
+        DataFrame: APPEAL_FEATURE_COLS plus a 0/1 'outcome' column
+    """
+    import pandas as pd
+
+    np.random.seed(seed)
+    df = pd.DataFrame({
+        'age': np.random.randint(25, 85, n_samples),
+        'zip': np.random.randint(10000, 99999, n_samples),
+        'claim_amount': np.random.uniform(500, 50000, n_samples),
+        'has_prior_auth': np.random.choice([0, 1], n_samples, p=[0.4, 0.6]),
+        'denial_reason_code': np.random.choice([1, 2, 3, 4, 5], n_samples),
+        'text_length': np.random.randint(500, 5000, n_samples),
+        'has_icd_code': np.random.choice([0, 1], n_samples, p=[0.3, 0.7])
+    })
+    # Simulate outcome: higher success for lower amounts, prior auth, older patients
+    df['outcome'] = (
+        (df['claim_amount'] < 10000).astype(int) * 0.3 +
+        (df['has_prior_auth'] == 1).astype(int) * 0.4 +
+        (df['age'] > 50).astype(int) * 0.2 +
+        np.random.random(n_samples) * 0.1
+    ) > 0.5
+    df['outcome'] = df['outcome'].astype(int)
+    return df
+
+
+def publish_appeal_model(model, metrics, training_seconds=None, data_path=None, promote=True, metadata=None):
+    """
+    Register a trained model as a new registry version and (by default) promote it
+
+    The sklearn pickle is always stored; linear models also get a model.npz
+    NumPy scorer export so prediction-only workers can serve the same version.
+
+    Args:
+        model: Trained model
+        metrics: dict of evaluation metrics
+        training_seconds: Wall-clock training time
+        data_path: Training data source (None for synthetic data)
+        promote: Point CURRENT at the new version
+        metadata: Extra metadata fields to store with the version
+
+    Returns:
+        str: The new version id
+    """
+    artifacts = {MODEL_ARTIFACT: pickle.dumps(model)}
+    try:
+        scorer = model if isinstance(model, LinearAppealScorer) else LinearAppealScorer.from_model(model)
+        artifacts[SCORER_ARTIFACT] = scorer.to_bytes('npz')
+    except (AttributeError, ValueError):
+        pass  # Not a binary linear model
+
+    version = model_registry.register(artifacts, {
+        "model_type": type(model).__name__,
+        "features": APPEAL_FEATURE_COLS,
+        "metrics": metrics,
+        "training_seconds": training_seconds,
+        "trained_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        "data_path": data_path,
+        **(metadata or {})
+    })
+    if promote:
+        model_registry.promote(version)
+    if APPEAL_EXPORT_PATH and SCORER_ARTIFACT in artifacts:
+        export_scorer(scorer, APPEAL_EXPORT_PATH)
+    return version
+
+
+def has_serve_artifact(model, artifact=APPEAL_SERVE_ARTIFACT):
+    """
+    True if publish_appeal_model stores the served artifact for this model
+
+    Every version has the pickle; only binary linear models also get the
+    NumPy scorer export.
+    """
+    if artifact == MODEL_ARTIFACT:
+        return True
+    if artifact != SCORER_ARTIFACT:
+        return False
+    try:
+        LinearAppealScorer.from_model(model)
+        return True
+    except (AttributeError, ValueError):
+        return False
 
 
 def train_appeal_predictor(data_path=None):
     """
     Train ML model to predict appeal success
     
+    Holds the registry training lock, so concurrent callers in other processes
+    wait instead of training the same model at once. The trained model is
+    registered and promoted as a new version.
+    
     Args:
         data_path: Path to CSV file with training data (optional, uses synthetic if None)
     
     Returns:
         tuple: (trained_model, accuracy_score)
     """
+    with model_registry.training_lock(blocking=True):
+        if (data_path and os.path.exists(data_path)
+                and os.path.getsize(data_path) > APPEAL_TRAIN_STREAM_MB * 1024 * 1024):
+            return train_appeal_predictor_streaming(data_path)
+        return _train_appeal_predictor_in_memory(data_path)
+
+
+def _train_appeal_predictor_in_memory(data_path):
+    import pandas as pd
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.metrics import accuracy_score
+    from sklearn.model_selection import train_test_split
+
+    start = time.time()
     try:
         if data_path and os.path.exists(data_path):
             df = pd.read_csv(data_path)
         else:
-            # Generate synthetic training data based on CMS patterns
-            np.random.seed(42)
-            n_samples = 1000
-            df = pd.DataFrame({
-                'age': np.random.randint(25, 85, n_samples),
-                'zip': np.random.randint(10000, 99999, n_samples),
-                'claim_amount': np.random.uniform(500, 50000, n_samples),
-                'has_prior_auth': np.random.choice([0, 1], n_samples, p=[0.4, 0.6]),
-                'denial_reason_code': np.random.choice([1, 2, 3, 4, 5], n_samples),
-                'text_length': np.random.randint(500, 5000, n_samples),
-                'has_icd_code': np.random.choice([0, 1], n_samples, p=[0.3, 0.7])
-            })
-            # Simulate outcome: higher success for lower amounts, prior auth, older patients
-            df['outcome'] = (
-                (df['claim_amount'] < 10000).astype(int) * 0.3 +
-                (df['has_prior_auth'] == 1).astype(int) * 0.4 +
-                (df['age'] > 50).astype(int) * 0.2 +
-                np.random.random(n_samples) * 0.1
-            ) > 0.5
-            df['outcome'] = df['outcome'].astype(int)
+            df = synthetic_appeal_data()
         
         # Prepare features
         feature_cols = ['age', 'zip', 'claim_amount', 'has_prior_auth', 
@@ -74,9 +217,8 @@ def train_appeal_predictor(data_path=None):
         y_pred = model.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
         
-        # Save model
-        with open('appeal_model.pkl', 'wb') as f:
-            pickle.dump(model, f)
+        # Register and promote; serving processes hot-reload the promoted version
+        publish_appeal_model(model, {"accuracy": accuracy}, time.time() - start, data_path)
         
         print(f"Model trained with accuracy: {accuracy:.2%}")
         return model, accuracy
@@ -89,17 +231,343 @@ def train_appeal_predictor(data_path=None):
         return model, 0.0
 
 
-def load_appeal_predictor():
-    """Load pre-trained appeal predictor model"""
+def _iter_training_chunks(data_path, chunk_size, holdout_fraction, seed):
+    """
+    Yield (X, y, is_holdout) per CSV chunk
+
+    Only the feature and outcome columns are parsed; missing feature columns
+    and unparseable values become 0 and rows without an outcome are dropped.
+    Rows are assigned to the hold-out set with a generator seeded by the
+    chunk index, so every pass over the file sees the same split.
+    """
+    import pandas as pd
+
+    header = pd.read_csv(data_path, nrows=0).columns
+    if 'outcome' not in header:
+        raise ValueError(f"{data_path} has no 'outcome' column")
+    usecols = [col for col in APPEAL_FEATURE_COLS if col in header] + ['outcome']
+
+    for index, chunk in enumerate(pd.read_csv(data_path, usecols=usecols, chunksize=chunk_size)):
+        chunk = chunk.apply(pd.to_numeric, errors='coerce')
+        chunk = chunk[chunk['outcome'].notna()]
+        X = np.zeros((len(chunk), len(APPEAL_FEATURE_COLS)), dtype=np.float64)
+        for j, col in enumerate(APPEAL_FEATURE_COLS):
+            if col in chunk.columns:
+                X[:, j] = chunk[col].fillna(0).to_numpy(dtype=np.float64)
+        y = (chunk['outcome'].to_numpy() > 0).astype(int)
+        is_holdout = np.random.default_rng([seed, index]).random(len(y)) < holdout_fraction
+        yield X, y, is_holdout
+
+
+def train_appeal_predictor_streaming(data_path, chunk_size=APPEAL_TRAIN_CHUNK_ROWS,
+                                     epochs=APPEAL_TRAIN_EPOCHS, holdout_fraction=0.2, seed=42):
+    """
+    Train the appeal predictor from a CSV too large to load into memory
+
+    The CSV is read in chunks, so peak memory depends on chunk_size rather
+    than file size. A first pass accumulates feature means/variances
+    (StandardScaler.partial_fit); each epoch then streams the training rows
+    through SGDClassifier(loss='log_loss').partial_fit on scaled features,
+    and the last epoch scores the held-out rows as it goes. The scaling is
+    folded into the final coefficients, so the result is a
+    LinearAppealScorer on raw features that works with predict_appeal,
+    predict_appeal_batch and the NumPy-only export.
+
+    Args:
+        data_path: CSV with APPEAL_FEATURE_COLS and an 'outcome' column
+        chunk_size: Rows per chunk
+        epochs: Passes over the training rows
+        holdout_fraction: Fraction of rows held out for evaluation
+        seed: Seed for the hold-out split and SGD shuffling
+
+    Returns:
+        tuple: (trained_model, accuracy_score) on the held-out rows
+    """
+    with model_registry.training_lock(blocking=True):
+        return _train_appeal_predictor_streaming(data_path, chunk_size, epochs, holdout_fraction, seed)
+
+
+def _train_appeal_predictor_streaming(data_path, chunk_size, epochs, holdout_fraction, seed):
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    from sklearn.metrics import log_loss
+    from sklearn.preprocessing import StandardScaler
+
     try:
-        if os.path.exists('appeal_model.pkl'):
-            with open('appeal_model.pkl', 'rb') as f:
-                return pickle.load(f)
-        else:
-            return train_appeal_predictor()[0]
+        start = time.time()
+        scaler = StandardScaler()
+        for X, y, is_holdout in _iter_training_chunks(data_path, chunk_size, holdout_fraction, seed):
+            if (~is_holdout).any():
+                scaler.partial_fit(X[~is_holdout])
+        if not scaler.n_samples_seen_.any():
+            raise ValueError("No training rows")
+        # Constant columns (e.g. a feature missing from the file) have zero variance
+        scale = np.where(scaler.scale_ > 0, scaler.scale_, 1.0)
+
+        classifier = SGDClassifier(loss='log_loss', alpha=1e-4, random_state=seed)
+        train_rows = holdout_rows = correct = 0
+        holdout_loss = 0.0
+        for epoch in range(epochs):
+            last_epoch = epoch == epochs - 1
+            for X, y, is_holdout in _iter_training_chunks(data_path, chunk_size, holdout_fraction, seed):
+                X = (X - scaler.mean_) / scale
+                train = ~is_holdout
+                if train.any():
+                    classifier.partial_fit(X[train], y[train], classes=[0, 1])
+                    train_rows += int(train.sum()) if last_epoch else 0
+                if last_epoch and is_holdout.any() and hasattr(classifier, 'coef_'):
+                    proba = classifier.predict_proba(X[is_holdout])[:, 1]
+                    correct += int(((proba > 0.5).astype(int) == y[is_holdout]).sum())
+                    holdout_loss += log_loss(y[is_holdout], proba, labels=[0, 1]) * int(is_holdout.sum())
+                    holdout_rows += int(is_holdout.sum())
+
+        # Fold the scaling into the weights: w.(x - mean)/scale + b = (w/scale).x + b - w.mean/scale
+        coef = classifier.coef_.ravel() / scale
+        intercept = classifier.intercept_[0] - float(np.dot(coef, scaler.mean_))
+        model = LinearAppealScorer(coef, intercept)
+
+        accuracy = correct / holdout_rows if holdout_rows else 0.0
+        metrics = {"accuracy": accuracy, "holdout_rows": holdout_rows, "train_rows": train_rows}
+        if holdout_rows:
+            metrics["log_loss"] = holdout_loss / holdout_rows
+        publish_appeal_model(model, metrics, time.time() - start, data_path)
+
+        print(f"Model trained on {train_rows} rows in {time.time() - start:.1f}s "
+              f"({epochs} epochs, chunks of {chunk_size})")
+        if holdout_rows:
+            print(f"Held-out rows: {holdout_rows}, log loss: {holdout_loss / holdout_rows:.4f}")
+        print(f"Model trained with accuracy: {accuracy:.2%}")
+        return model, accuracy
+
     except Exception as e:
-        print(f"Error loading model: {str(e)}")
+        print(f"Error training model: {str(e)}")
+        model = LogisticRegression()
+        model.fit([[0, 0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0, 0]], [0, 1])
+        return model, 0.0
+
+
+def load_model_bytes(content, path):
+    """Deserialize a model file: a pickle, or a NumPy scorer export (.npz/.json)"""
+    if is_scorer_path(path):
+        return loads_scorer(content, path)
+    return pickle.loads(content)
+
+
+def export_appeal_model(export_path, model_path=None):
+    """
+    Export the saved sklearn appeal model for NumPy-only serving
+
+    Args:
+        export_path: Destination .npz or .json file
+        model_path: Pickled model to export (default: the served model)
+
+    Returns:
+        LinearAppealScorer: The exported scorer
+    """
+    model_path = model_path or serving_model_path()
+    with open(model_path, 'rb') as f:
+        model = load_model_bytes(f.read(), model_path)
+    return export_scorer(model, export_path)
+
+
+def serving_model_path():
+    """
+    Served artifact of the promoted registry version, or the legacy APPEAL_MODEL_PATH
+
+    A promoted version without APPEAL_SERVE_ARTIFACT (e.g. a non-linear model
+    when serving model.npz) is served from its model.pkl instead.
+    """
+    version = model_registry.current_version()
+    if version is None:
+        return APPEAL_MODEL_PATH
+    path = model_registry.artifact_path(version, APPEAL_SERVE_ARTIFACT)
+    if APPEAL_SERVE_ARTIFACT != MODEL_ARTIFACT and not os.path.exists(path):
+        return model_registry.artifact_path(version, MODEL_ARTIFACT)
+    return path
+
+
+def model_published():
+    """True if a registry version is promoted or the legacy model file exists"""
+    return model_registry.current_version() is not None or os.path.exists(APPEAL_MODEL_PATH)
+
+
+def load_appeal_predictor():
+    """
+    Load pre-trained appeal predictor model
+
+    A model is trained only if none has ever been published; a promoted
+    version that fails to load raises instead of being replaced.
+    """
+    if not model_published():
         return train_appeal_predictor()[0]
+    path = serving_model_path()
+    with open(path, 'rb') as f:
+        return load_model_bytes(f.read(), path)
+
+
+class ModelNotReadyError(RuntimeError):
+    """Raised when no appeal model has been loaded yet"""
+
+
+class AppealModelHolder:
+    """
+    Process-wide holder for the appeal predictor with hot reload
+
+    start() loads the model (or trains one in the background if nothing has
+    ever been published; a published model that fails to load is reported,
+    not retrained) and starts a watcher thread that polls the served file:
+    the promoted registry version's artifact, or `path` if one is pinned.
+    When the registry pointer moves or the file's mtime/size change, the
+    file is hashed and, if its content differs,
+    deserialized (pickle or .npz/.json scorer export) and swapped in with a
+    single reference assignment, so predictions already holding the old model
+    finish unaffected. get() only returns the current reference: no disk
+    access or training happens on the request path.
+    """
+
+    def __init__(self, path=None, check_seconds=APPEAL_MODEL_CHECK_SECONDS):
+        self.path = path  # None: follow the registry's promoted version
+        self.check_seconds = check_seconds
+        self._model = None
+        self._ready = threading.Event()
+        self._stat = None
+        self._sha256 = None
+        self._served_path = None
+        self._loaded_at = None
+        self._reloads = 0
+        self._error = None
+        self._watcher = None
+        self._start_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+
+    def start(self):
+        """Load the model and start watching the file (idempotent)"""
+        with self._start_lock:
+            if self._watcher is not None:
+                return
+            if not self._check_file() and not model_published():
+                # Nothing published yet: train off the request path. A
+                # published model that fails to load is never replaced here;
+                # the error is reported in status() and retried by the watcher
+                threading.Thread(target=self._train_missing, name="appeal-model-train", daemon=True).start()
+            self._watcher = threading.Thread(target=self._watch, name="appeal-model-watch", daemon=True)
+            self._watcher.start()
+
+    def _train_missing(self):
+        with model_registry.training_lock(blocking=False) as acquired:
+            if not acquired or self._check_file() or model_published():
+                # Another process is training (or just published); keep
+                # serving and let the watcher pick up its promotion
+                return
+            model, _ = train_appeal_predictor()
+        if not self._check_file():
+            # Training could not write the file; serve the in-memory model anyway
+            with self._reload_lock:
+                if self._model is None:
+                    self._swap(model, None)
+
+    def _watch(self):
+        while True:
+            time.sleep(self.check_seconds)
+            self._check_file()
+
+    def _check_file(self):
+        """Reload the model if the file changed; returns True if a model is loaded"""
+        with self._reload_lock:
+            return self._check_file_locked()
+
+    def _check_file_locked(self):
+        path = self.path or serving_model_path()
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return self._model is not None
+        signature = (path, stat.st_mtime_ns, stat.st_size)
+        if signature == self._stat:
+            return True
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            digest = hashlib.sha256(content).hexdigest()
+            if digest != self._sha256:
+                model = load_model_bytes(content, path)
+                self._served_path = path
+                self._swap(model, digest)
+                print(f"Appeal model loaded from {path} ({digest[:12]})")
+            self._served_path = path
+            self._stat = signature
+            self._error = None
+        except Exception as e:
+            # Keep serving the previous model; retry on the next poll
+            self._error = f"{type(e).__name__}: {str(e)}"
+            print(f"Error reloading appeal model: {self._error}")
+        return self._model is not None
+
+    def _swap(self, model, digest):
+        if self._model is not None:
+            self._reloads += 1
+        self._model = model
+        self._sha256 = digest
+        self._loaded_at = time.time()
+        self._ready.set()
+
+    def get(self, timeout=10.0):
+        """
+        Return the current model
+
+        Args:
+            timeout: Seconds to wait if the first load/training is still running
+
+        Raises:
+            ModelNotReadyError: If no model is available within timeout
+        """
+        model = self._model
+        if model is not None:
+            return model
+        self.start()
+        if not self._ready.wait(timeout):
+            raise ModelNotReadyError("Appeal model is still loading")
+        return self._model
+
+    def status(self):
+        """
+        Report which model version is being served
+
+        Returns:
+            dict: path, registry version, content hash, load time, reload
+                count and last error
+        """
+        served_path = self._served_path
+        version = None
+        if served_path and os.path.abspath(served_path).startswith(
+                os.path.abspath(model_registry.versions_dir) + os.sep):
+            version = os.path.basename(os.path.dirname(served_path))
+        return {
+            "path": served_path,
+            "version": version,
+            "ready": self._model is not None,
+            "sha256": self._sha256,
+            "loaded_at": self._loaded_at,
+            "reloads": self._reloads,
+            "error": self._error
+        }
+
+
+# Shared by backend/app.py and the Streamlit app
+appeal_models = AppealModelHolder()
+
+
+def _model_input(model, X):
+    """
+    Feature matrix in the form the model expects
+
+    sklearn models fitted on a DataFrame get one (keeping their feature-name
+    check happy); the NumPy scorer takes the array as is, so serving it never
+    imports pandas.
+    """
+    if not hasattr(model, 'feature_names_in_'):
+        return X
+    import pandas as pd
+    return pd.DataFrame(X, columns=APPEAL_FEATURE_COLS)
 
 
 def predict_appeal(model, user_data, claim_features=None):
@@ -126,13 +594,11 @@ def predict_appeal(model, user_data, claim_features=None):
             'has_icd_code': claim_features.get('has_icd_code', 0) if claim_features else 0
         }
         
-        # Convert to DataFrame
-        df = pd.DataFrame([features])
-        feature_cols = ['age', 'zip', 'claim_amount', 'has_prior_auth', 
-                        'denial_reason_code', 'text_length', 'has_icd_code']
+        # One row in APPEAL_FEATURE_COLS order
+        X = np.asarray([[features[col] for col in APPEAL_FEATURE_COLS]], dtype=np.float64)
         
         # Predict
-        proba = model.predict_proba(df[feature_cols])[0]
+        proba = model.predict_proba(_model_input(model, X))[0]
         success_prob = proba[1] * 100  # Probability of success (class 1)
         
         return round(success_prob, 2)
@@ -142,6 +608,65 @@ def predict_appeal(model, user_data, claim_features=None):
         return 50.0  # Default 50%
 
 
+def predict_appeal_batch(model, claims):
+    """
+    Predict appeal success probabilities for many claims with one model call
+
+    Args:
+        model: Trained ML model
+        claims: Claims in any format accepted by build_feature_matrix
+
+    Returns:
+        numpy.ndarray: Success probabilities (0-100%), rounded to 2 decimals
+    """
+    X = build_feature_matrix(claims)
+    if len(X) == 0:
+        return np.zeros(0)
+    proba = model.predict_proba(_model_input(model, X))[:, 1]
+    return np.round(proba * 100, 2)
+
+
+def predict_appeal_surface(model, fixed, ages, amounts, prior_auth=(0, 1)):
+    """
+    Predict appeal success over an age x claim amount grid in one model call
+
+    Every grid point shares the claim's fixed features (zip, text features,
+    ...) and varies only age, claim_amount and, per layer, has_prior_auth, so
+    a client can interpolate what-if changes locally instead of calling
+    /api/predict-appeal per slider move.
+
+    Args:
+        model: Trained ML model
+        fixed: dict of fixed feature values; missing keys use APPEAL_FEATURE_DEFAULTS
+        ages: 1-D sequence of ages (grid rows)
+        amounts: 1-D sequence of claim amounts (grid columns)
+        prior_auth: has_prior_auth values, one layer each
+
+    Returns:
+        numpy.ndarray: Success probabilities (0-100%), rounded to 2 decimals,
+            of shape (len(prior_auth), len(ages), len(amounts))
+
+    Raises:
+        ValueError: If the grid is empty or larger than APPEAL_SURFACE_MAX_POINTS
+    """
+    ages = np.asarray(ages, dtype=np.float64).ravel()
+    amounts = np.asarray(amounts, dtype=np.float64).ravel()
+    prior_auth = np.asarray(prior_auth, dtype=np.float64).ravel()
+    shape = (len(prior_auth), len(ages), len(amounts))
+    points = shape[0] * shape[1] * shape[2]
+    if points == 0:
+        raise ValueError("Surface axes must not be empty")
+    if points > APPEAL_SURFACE_MAX_POINTS:
+        raise ValueError(f"Surface has {points} points (max {APPEAL_SURFACE_MAX_POINTS})")
+
+    X = np.repeat(build_feature_matrix([fixed]), points, axis=0)
+    # C-order grid: prior_auth slowest, amount fastest
+    X[:, APPEAL_FEATURE_COLS.index('has_prior_auth')] = np.repeat(prior_auth, shape[1] * shape[2])
+    X[:, APPEAL_FEATURE_COLS.index('age')] = np.tile(np.repeat(ages, shape[2]), shape[0])
+    X[:, APPEAL_FEATURE_COLS.index('claim_amount')] = np.tile(amounts, shape[0] * shape[1])
+    return predict_appeal_batch(model, X).reshape(shape)
+
+
 def dedalus_agent_summarize(text, api_key=None):
     """
     Use Dedalus Labs agent for claim analysis and appeal generation
@@ -196,9 +721,14 @@ Provide:
 3. Key talking points for follow-up
 """
         }
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        response.raise_for_status()
-        result = response.json()
+
+        def post():
+            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response.raise_for_status()
+            return response.json()
+
+        # Skips straight to the template while Dedalus keeps failing
+        result = get_breaker("dedalus", api_key).call(post)
         return result.get('output', result.get('response', 'Appeal generated successfully.'))
         
     except Exception as e:
@@ -242,9 +772,13 @@ def grok_real_time_analysis(query, api_key=None):
             "temperature": 0.7,
             "max_tokens": 500
         }
-        response = requests.post(url, json=payload, headers=headers, timeout=30)
-        response.raise_for_status()
-        result = response.json()
+
+        def post():
+            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response.raise_for_status()
+            return response.json()
+
+        result = get_breaker("xai", api_key).call(post)
         return result['choices'][0]['message']['content']
         
     except Exception as e:
@@ -0,0 +1,291 @@
+"""
+Online updates of the appeal predictor from shared outcomes
+Periodically folds new rows of the biases table into the served linear model
+and publishes the result as a new registry version
+"""
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from appeal_scorer import APPEAL_FEATURE_DEFAULTS, LinearAppealScorer, build_feature_matrix
+from model_registry import model_registry
+from models import load_model_bytes, publish_appeal_model, serving_model_path
+from bias_db import BIAS_DB_PATH, connect
+
+
+APPEAL_ONLINE_UPDATES = os.getenv('APPEAL_ONLINE_UPDATES', '0').lower() in ('1', 'true', 'yes')
+APPEAL_ONLINE_INTERVAL = float(os.getenv('APPEAL_ONLINE_INTERVAL', '3600'))
+APPEAL_ONLINE_MIN_ROWS = int(os.getenv('APPEAL_ONLINE_MIN_ROWS', '50'))
+APPEAL_ONLINE_MAX_ROWS = int(os.getenv('APPEAL_ONLINE_MAX_ROWS', '10000'))
+# Fraction of one core the updater may use on average
+APPEAL_ONLINE_CPU_FRACTION = float(os.getenv('APPEAL_ONLINE_CPU_FRACTION', '0.05'))
+APPEAL_ONLINE_STEPS = int(os.getenv('APPEAL_ONLINE_STEPS', '100'))
+APPEAL_ONLINE_LEARNING_RATE = float(os.getenv('APPEAL_ONLINE_LEARNING_RATE', '0.1'))
+# Strength of the pull back towards the current weights (higher = smaller updates)
+APPEAL_ONLINE_ANCHOR = float(os.getenv('APPEAL_ONLINE_ANCHOR', '0.01'))
+# Online versions kept in the registry (the served one is always kept)
+APPEAL_ONLINE_KEEP_VERSIONS = int(os.getenv('APPEAL_ONLINE_KEEP_VERSIONS', '10'))
+
+DEMO_AGE = re.compile(r'age_(\d+)(?:\s*-\s*(\d+))?')
+
+
+def demo_age(demo):
+    """Age implied by a demo bucket such as 'age_60' or 'age_40-50', or the default"""
+    match = DEMO_AGE.search(demo or '')
+    if not match:
+        return APPEAL_FEATURE_DEFAULTS['age']
+    low = int(match.group(1))
+    high = int(match.group(2)) if match.group(2) else low + 10
+    return (low + high) / 2
+
+
+def fetch_outcomes(conn, after_id, limit):
+    """
+    Read shared outcomes newer than the watermark
+
+    Args:
+        conn: SQLite connection to the bias database
+        after_id: Last biases.id already learned from
+        limit: Maximum rows
+
+    Returns:
+        list: (id, zip, demo, claim_amount, outcome) tuples ordered by id
+    """
+    return conn.execute('''
+        SELECT id, zip, demo, claim_amount, outcome FROM biases
+        WHERE id > ? ORDER BY id LIMIT ?
+    ''', (after_id, limit)).fetchall()
+
+
+def outcome_features(rows):
+    """
+    Turn biases rows into a feature matrix and labels
+
+    The table only records zip, demographic bucket and amount; the remaining
+    features take the same defaults predict_appeal uses.
+
+    Returns:
+        tuple: (X ndarray, y ndarray)
+    """
+    claims = [{'zip': zip_code, 'age': demo_age(demo), 'claim_amount': amount}
+              for _, zip_code, demo, amount, _ in rows]
+    y = np.array([1 if outcome else 0 for *_, outcome in rows])
+    return build_feature_matrix(claims), y
+
+
+def _mean_log_loss(scorer, X, y):
+    p = np.clip(scorer.predict_proba(X)[:, 1], 1e-12, 1 - 1e-12)
+    return float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p)))
+
+
+def update_linear_model(model, X, y, steps=APPEAL_ONLINE_STEPS, learning_rate=APPEAL_ONLINE_LEARNING_RATE,
+                        anchor=APPEAL_ONLINE_ANCHOR):
+    """
+    Nudge a linear appeal model towards new outcomes
+
+    Runs full-batch gradient descent on the mean log loss of (X, y) plus
+    anchor/2 * ||w - w_current||^2, in standardized feature space so the
+    very differently scaled raw features (zip, dollar amounts) share one
+    learning rate. The anchor keeps a small batch from erasing what the
+    model already knows. Works on single-class batches.
+
+    Args:
+        model: LogisticRegression or LinearAppealScorer
+        X: Raw feature matrix in APPEAL_FEATURE_COLS order
+        y: 0/1 labels
+
+    Returns:
+        LinearAppealScorer: Updated model on raw features
+
+    Raises:
+        ValueError/AttributeError: If the model is not a binary linear model
+    """
+    current = model if isinstance(model, LinearAppealScorer) else LinearAppealScorer.from_model(model)
+    coef, intercept = current.coef_.ravel(), current.intercept_[0]
+
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    Xs = (X - mean) / scale
+    # w.x + b == (w * scale).((x - mean) / scale) + (b + w.mean)
+    w0 = coef * scale
+    w, b = w0.copy(), intercept + float(coef @ mean)
+
+    for _ in range(steps):
+        with np.errstate(over='ignore'):
+            p = 1.0 / (1.0 + np.exp(-(Xs @ w + b)))
+        error = p - y
+        w -= learning_rate * (Xs.T @ error / len(y) + anchor * (w - w0))
+        b -= learning_rate * error.mean()
+
+    new_coef = w / scale
+    return LinearAppealScorer(new_coef, b - float(new_coef @ mean), current.feature_names, current.classes_)
+
+
+class OnlineUpdater:
+    """
+    Background updater that learns from shared outcomes
+
+    Each cycle reads up to max_rows biases rows past the watermark (the last
+    biases.id learned from, kept in the registry's state rather than in one
+    version's metadata, so a rollback or a promotion from training or the
+    model search does not make it re-learn every past outcome), updates the
+    served linear model, and publishes and promotes the result; serving
+    processes pick it up through their model watchers. Only the newest
+    keep_versions online versions are kept in the registry.
+    Cycles run every interval seconds and are stretched so the updater's
+    CPU time stays under cpu_fraction of one core. Only the process holding
+    the registry training lock updates.
+    """
+
+    def __init__(self, db_path=BIAS_DB_PATH, interval=APPEAL_ONLINE_INTERVAL, min_rows=APPEAL_ONLINE_MIN_ROWS,
+                 max_rows=APPEAL_ONLINE_MAX_ROWS, cpu_fraction=APPEAL_ONLINE_CPU_FRACTION,
+                 keep_versions=APPEAL_ONLINE_KEEP_VERSIONS):
+        self.db_path = db_path
+        self.interval = interval
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.cpu_fraction = cpu_fraction
+        self.keep_versions = keep_versions
+        self._thread = None
+        self._lock = threading.Lock()
+        self._last_run = None
+        self._last_result = None
+        self._next_run = None
+        self._cpu_seconds = 0.0
+        self._updates = 0
+
+    def start(self):
+        """Start the background schedule (idempotent)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="appeal-online-updater", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            self._next_run = time.time() + self.interval
+            time.sleep(self.interval)
+            cpu_start = time.thread_time()
+            self.run_once()
+            cpu_used = time.thread_time() - cpu_start
+            # Stretch the schedule if this cycle used more than its CPU share
+            if self.cpu_fraction > 0:
+                extra = cpu_used / self.cpu_fraction - self.interval
+                if extra > 0:
+                    self._next_run = time.time() + extra + self.interval
+                    time.sleep(extra)
+
+    def run_once(self):
+        """
+        Run one update cycle now
+
+        Returns:
+            dict: What happened (updated, or why not)
+        """
+        cpu_start = time.thread_time()
+        try:
+            with model_registry.training_lock(blocking=False) as acquired:
+                if not acquired:
+                    result = {"updated": False, "reason": "another process is training"}
+                else:
+                    result = self._update()
+        except Exception as e:
+            result = {"updated": False, "reason": f"{type(e).__name__}: {str(e)}"}
+            print(f"Online model update failed: {result['reason']}")
+        result["cpu_seconds"] = round(time.thread_time() - cpu_start, 3)
+        self._cpu_seconds += result["cpu_seconds"]
+        self._last_run = time.time()
+        self._last_result = result
+        return result
+
+    def _watermark(self, metadata):
+        watermark = model_registry.get_state("online_watermark")
+        if watermark is None:
+            # Registries written before the watermark moved to the registry state
+            watermark = metadata.get("online_watermark")
+        return int(watermark or 0)
+
+    def _prune(self):
+        """Delete online versions beyond the newest keep_versions, never the served one"""
+        current = model_registry.current_version()
+        online = [record["version"] for record in model_registry.versions()
+                  if "online_watermark" in record and record["version"] != current]
+        stale = online[:max(0, len(online) - max(self.keep_versions - 1, 0))]
+        for version in stale:
+            model_registry.delete(version)
+        return len(stale)
+
+    def _update(self):
+        metadata = model_registry.metadata() or {}
+        watermark = self._watermark(metadata)
+
+        conn = connect(self.db_path)
+        try:
+            rows = fetch_outcomes(conn, watermark, self.max_rows)
+        finally:
+            conn.close()
+        if len(rows) < self.min_rows:
+            return {"updated": False, "reason": f"{len(rows)} new outcomes (< {self.min_rows})",
+                    "watermark": watermark}
+
+        path = serving_model_path()
+        with open(path, 'rb') as f:
+            model = load_model_bytes(f.read(), path)
+        try:
+            current = model if isinstance(model, LinearAppealScorer) else LinearAppealScorer.from_model(model)
+        except (AttributeError, ValueError):
+            return {"updated": False, "reason": f"{type(model).__name__} does not support online updates",
+                    "watermark": watermark}
+
+        start = time.time()
+        X, y = outcome_features(rows)
+        updated = update_linear_model(current, X, y)
+        before = _mean_log_loss(current, X, y)
+        after = _mean_log_loss(updated, X, y)
+        new_watermark = rows[-1][0]
+        version = publish_appeal_model(updated, {
+            "online_rows": len(rows),
+            "log_loss_before": before,
+            "log_loss_after": after
+        }, time.time() - start, f"{self.db_path}:biases", metadata={
+            "online_watermark": new_watermark,
+            "parent_version": metadata.get("version")
+        })
+        model_registry.set_state("online_watermark", new_watermark)
+        pruned = self._prune()
+        self._updates += 1
+        print(f"Online update: {len(rows)} outcomes, log loss {before:.4f} -> {after:.4f}, version {version}")
+        return {"updated": True, "version": version, "rows": len(rows), "watermark": new_watermark,
+                "log_loss_before": before, "log_loss_after": after, "pruned_versions": pruned}
+
+    def status(self):
+        """
+        Report schedule and last cycle
+
+        Returns:
+            dict: enabled flag, schedule, CPU used and last result
+        """
+        return {
+            "running": self._thread is not None,
+            "interval_seconds": self.interval,
+            "cpu_fraction": self.cpu_fraction,
+            "last_run": self._last_run,
+            "next_run": self._next_run,
+            "updates": self._updates,
+            "cpu_seconds": round(self._cpu_seconds, 3),
+            "last_result": self._last_result
+        }
+
+
+# Process-wide updater; started by backend/app.py when APPEAL_ONLINE_UPDATES is set
+online_updater = OnlineUpdater()
+
+
+def start_online_updates():
+    """Start the background updater if APPEAL_ONLINE_UPDATES is enabled"""
+    if APPEAL_ONLINE_UPDATES:
+        online_updater.start()
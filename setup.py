@@ -2,9 +2,9 @@
 Setup script for ClaimEquity AI
 Initializes database and downloads required NLTK data
 """
-import sqlite3
 import nltk
 import os
+from bias_db import BIAS_DB_PATH, connect, migrate
 
 def setup():
     """Initialize the application"""
@@ -21,20 +21,9 @@ def setup():
     # Initialize database
     print("Initializing database...")
     try:
-        conn = sqlite3.connect('database.db')
-        conn.execute('''
-            CREATE TABLE IF NOT EXISTS biases (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                hash TEXT UNIQUE,
-                denial_reason TEXT,
-                zip TEXT,
-                demo TEXT,
-                claim_amount REAL,
-                outcome INTEGER,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        conn.commit()
+        # Creates the tables, aggregates and indexes (or migrates an older database)
+        conn = connect(BIAS_DB_PATH)
+        migrate(conn)
         conn.close()
         print("✅ Database initialized")
     except Exception as e:
@@ -0,0 +1,370 @@
+"""
+Local summarization model management for ClaimEquity AI
+Loads the Hugging Face summarizer once per process and shares it across callers
+"""
+import os
+import platform
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+SUMMARIZER_MODEL = os.getenv('SUMMARIZER_MODEL', 'facebook/bart-large-cnn')
+# "pytorch" (transformers default) or "onnx" (int8-quantized ONNX Runtime on CPU)
+SUMMARIZER_BACKEND = os.getenv('SUMMARIZER_BACKEND', 'pytorch').lower()
+SUMMARIZER_ONNX_DIR = os.getenv('SUMMARIZER_ONNX_DIR', 'onnx_models')
+SUMMARIZER_ONNX_THREADS = int(os.getenv('SUMMARIZER_ONNX_THREADS', str(os.cpu_count() or 1)))
+# avx2, avx512, avx512_vnni, arm64, or none to skip quantization
+SUMMARIZER_ONNX_QUANTIZATION = os.getenv(
+    'SUMMARIZER_ONNX_QUANTIZATION',
+    'arm64' if platform.machine().lower() in ('arm64', 'aarch64') else 'avx2'
+).lower()
+SUMMARIZER_BATCH_SIZE = int(os.getenv('SUMMARIZER_BATCH_SIZE', '8'))
+SUMMARIZER_MAX_WAIT_MS = float(os.getenv('SUMMARIZER_MAX_WAIT_MS', '10'))
+# Seconds after a failed load before the next request tries loading again
+SUMMARIZER_RETRY_SECONDS = float(os.getenv('SUMMARIZER_RETRY_SECONDS', '60'))
+
+
+def build_pytorch_pipeline(model_name):
+    """Build the default transformers (PyTorch) summarization pipeline"""
+    from transformers import pipeline
+    return pipeline("summarization", model=model_name)
+
+
+def build_onnx_pipeline(model_name, cache_dir=SUMMARIZER_ONNX_DIR, quantization=SUMMARIZER_ONNX_QUANTIZATION,
+                        threads=SUMMARIZER_ONNX_THREADS):
+    """
+    Build a summarization pipeline backed by ONNX Runtime
+
+    On first use the model is exported to ONNX and (unless quantization is
+    "none") its encoder/decoder graphs are dynamically quantized to int8;
+    both are kept under cache_dir so later loads skip the export. Requires
+    the optional `optimum[onnxruntime]` package.
+
+    Args:
+        model_name: Hugging Face seq2seq summarization model
+        cache_dir: Directory for exported/quantized models
+        quantization: Dynamic quantization target (avx2, avx512, avx512_vnni, arm64, none)
+        threads: ONNX Runtime intra-op threads
+
+    Returns:
+        Pipeline: transformers summarization pipeline running on ONNX Runtime
+    """
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer, pipeline
+
+    export_dir = os.path.join(cache_dir, model_name.replace('/', '--'))
+    graphs = ["encoder_model.onnx", "decoder_model.onnx", "decoder_with_past_model.onnx"]
+    if not os.path.exists(os.path.join(export_dir, graphs[0])):
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True)
+        model.save_pretrained(export_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(export_dir)
+
+    model_dir = export_dir
+    file_names = {}
+    if quantization != "none":
+        model_dir = f"{export_dir}-int8-{quantization}"
+        quantized = [graph.replace(".onnx", "_quantized.onnx") for graph in graphs]
+        if not os.path.exists(os.path.join(model_dir, quantized[0])):
+            # Dynamic int8: weights stored as int8, activations quantized at run time (no calibration data)
+            qconfig = getattr(AutoQuantizationConfig, quantization)(is_static=False, per_channel=False)
+            for graph in graphs:
+                if os.path.exists(os.path.join(export_dir, graph)):
+                    quantizer = ORTQuantizer.from_pretrained(export_dir, file_name=graph)
+                    quantizer.quantize(save_dir=model_dir, quantization_config=qconfig)
+            AutoTokenizer.from_pretrained(export_dir).save_pretrained(model_dir)
+            ORTModelForSeq2SeqLM.from_pretrained(export_dir).config.save_pretrained(model_dir)
+        file_names = {
+            "encoder_file_name": quantized[0],
+            "decoder_file_name": quantized[1],
+            "decoder_with_past_file_name": quantized[2]
+        }
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    model = ORTModelForSeq2SeqLM.from_pretrained(
+        model_dir, provider="CPUExecutionProvider", session_options=options, **file_names
+    )
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    return pipeline("summarization", model=model, tokenizer=tokenizer)
+
+
+PIPELINE_BUILDERS = {
+    "pytorch": build_pytorch_pipeline,
+    "onnx": build_onnx_pipeline,
+}
+
+
+class SummarizerRegistry:
+    """
+    Process-wide holder for the local summarization pipeline
+
+    The pipeline is built lazily on first use (or by warmup) and every later
+    caller gets the same instance. Loading is guarded by a lock so concurrent
+    requests never build the model twice. A failed load is retried by the
+    first request after retry_seconds, so a transient failure (a download
+    timeout, a full disk) does not disable the model until restart.
+    """
+
+    def __init__(self, model_name=SUMMARIZER_MODEL, backend=SUMMARIZER_BACKEND,
+                 retry_seconds=SUMMARIZER_RETRY_SECONDS):
+        self.model_name = model_name
+        self.backend = backend
+        self.retry_seconds = retry_seconds
+        self._pipeline = None
+        self._state = "not_loaded"
+        self._error = None
+        self._failed_at = None
+        self._load_seconds = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        """Build the pipeline; must be called with the lock held"""
+        self._state = "loading"
+        start = time.perf_counter()
+        try:
+            if self.backend not in PIPELINE_BUILDERS:
+                raise ValueError(f"Unknown summarizer backend '{self.backend}'")
+            self._pipeline = PIPELINE_BUILDERS[self.backend](self.model_name)
+            self._state = "ready"
+            self._error = None
+            self._loaded_at = time.time()
+        except Exception as e:
+            self._pipeline = None
+            self._state = "failed"
+            self._error = f"{type(e).__name__}: {str(e)}"
+            self._failed_at = time.monotonic()
+            print(f"❌ Summarizer load failed: {self._error}")
+        finally:
+            self._load_seconds = round(time.perf_counter() - start, 3)
+
+    def get(self):
+        """
+        Return the loaded summarization pipeline, loading it if needed
+
+        Returns:
+            Pipeline: Hugging Face summarization pipeline
+
+        Raises:
+            RuntimeError: If the model could not be loaded
+        """
+        if self._state == "ready":
+            return self._pipeline
+        with self._lock:
+            if self._state in ("not_loaded", "loading") or self._retry_due():
+                self._load()
+            if self._state == "failed":
+                raise RuntimeError(f"Summarizer unavailable: {self._error}")
+            return self._pipeline
+
+    def _retry_due(self):
+        """True if the last load failed at least retry_seconds ago"""
+        return (self._state == "failed" and self._failed_at is not None
+                and time.monotonic() - self._failed_at >= self.retry_seconds)
+
+    def warmup(self, background=False):
+        """
+        Load the model ahead of the first request
+
+        Args:
+            background: Load in a daemon thread instead of blocking the caller
+        """
+        if background:
+            thread = threading.Thread(target=self._warmup_quietly, name="summarizer-warmup", daemon=True)
+            thread.start()
+            return thread
+        self._warmup_quietly()
+        return None
+
+    def _warmup_quietly(self):
+        try:
+            self.get()
+        except RuntimeError:
+            pass  # Failure is recorded in status(); callers fall back to simple extraction
+
+    def reload(self):
+        """Discard the current pipeline (including a failed load) and load again"""
+        with self._lock:
+            self._pipeline = None
+            self._load()
+
+    def status(self):
+        """
+        Report load state for health checks
+
+        Returns:
+            dict: model name, state, load time, last error and next retry
+        """
+        retry_in = None
+        if self._state == "failed" and self._failed_at is not None:
+            retry_in = round(max(0.0, self.retry_seconds - (time.monotonic() - self._failed_at)), 1)
+        return {
+            "model": self.model_name,
+            "backend": self.backend,
+            "state": self._state,
+            "load_seconds": self._load_seconds,
+            "loaded_at": self._loaded_at,
+            "error": self._error,
+            "retry_in_seconds": retry_in
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent summarization requests into padded batches
+
+    Callers submit single texts; a worker thread waits up to max_wait_ms for
+    more requests (or until max_batch_size is reached), runs them through the
+    pipeline in one forward pass, and resolves each caller's future with its
+    own summary. Requests with different generation settings are batched
+    separately.
+    """
+
+    def __init__(self, registry, max_batch_size=SUMMARIZER_BATCH_SIZE, max_wait_ms=SUMMARIZER_MAX_WAIT_MS):
+        self.registry = registry
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+
+    def submit(self, text, **generate_kwargs):
+        """
+        Queue a text for summarization
+
+        Args:
+            text: Text to summarize
+            **generate_kwargs: Pipeline generation settings (max_length, min_length, ...)
+
+        Returns:
+            Future: Resolves to the summary string
+        """
+        future = Future()
+        key = tuple(sorted(generate_kwargs.items()))
+        self._ensure_worker()
+        self._queue.put((text, key, future))
+        return future
+
+    def summarize(self, text, timeout=None, **generate_kwargs):
+        """Summarize one text, blocking until its batch has run"""
+        return self.submit(text, **generate_kwargs).result(timeout=timeout)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="summarizer-batcher", daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        groups = {}
+        for text, key, future in batch:
+            if future.set_running_or_notify_cancel():
+                groups.setdefault(key, []).append((text, future))
+
+        for key, items in groups.items():
+            texts = [text for text, _ in items]
+            try:
+                summarizer = self.registry.get()
+                outputs = summarizer(texts, batch_size=len(texts), truncation=True, **dict(key))
+                for (_, future), output in zip(items, outputs):
+                    # Pipelines return a list per input when given a list
+                    if isinstance(output, list):
+                        output = output[0]
+                    future.set_result(output['summary_text'])
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+            self._batches += 1
+            self._items += len(items)
+
+    def status(self):
+        """
+        Report batching configuration and counters
+
+        Returns:
+            dict: batch size, wait time, batches run and mean batch size
+        """
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queued": self._queue.qsize(),
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": round(self._items / self._batches, 2) if self._batches else None
+        }
+
+
+# Shared by utils.summarize_claim, backend/app.py and the Streamlit app
+registry = SummarizerRegistry()
+batcher = MicroBatcher(registry)
+
+
+def local_model_id():
+    """Identify the local model and backend (used in summary cache keys)"""
+    if registry.backend == "onnx" and SUMMARIZER_ONNX_QUANTIZATION != "none":
+        return f"{registry.model_name}@onnx-int8"
+    return f"{registry.model_name}@{registry.backend}"
+
+
+def get_summarizer():
+    """Return the process-wide summarization pipeline"""
+    return registry.get()
+
+
+def summarize_local(text, **generate_kwargs):
+    """
+    Summarize text with the shared local model
+
+    Requests are routed through the micro-batcher unless
+    SUMMARIZER_BATCH_SIZE is 1, in which case the pipeline is called directly.
+
+    Args:
+        text: Text to summarize
+        **generate_kwargs: Pipeline generation settings
+
+    Returns:
+        str: Summary text
+    """
+    if batcher.max_batch_size == 1:
+        return registry.get()(text, **generate_kwargs)[0]['summary_text']
+    return batcher.summarize(text, **generate_kwargs)
+
+
+def warmup_summarizer(background=True):
+    """Warm up the summarizer if SUMMARIZER_WARMUP is enabled"""
+    enabled = os.getenv('SUMMARIZER_WARMUP', '0').lower() in ('1', 'true', 'yes')
+    if enabled and registry.status()["state"] == "not_loaded":
+        return registry.warmup(background=background)
+    return None
+
+
+def summarizer_status():
+    """Return the shared summarizer's load state and batching counters"""
+    state = registry.status()
+    state["batching"] = batcher.status()
+    return state
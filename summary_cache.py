@@ -0,0 +1,239 @@
+"""
+Content-addressed cache for claim summaries
+In-memory LRU tier backed by a persistent SQLite tier, keyed by text hash and provider
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+SUMMARY_CACHE_PATH = os.getenv('SUMMARY_CACHE_PATH', 'summary_cache.db')
+SUMMARY_CACHE_MEMORY_ENTRIES = int(os.getenv('SUMMARY_CACHE_MEMORY_ENTRIES', '256'))
+SUMMARY_CACHE_DISK_ENTRIES = int(os.getenv('SUMMARY_CACHE_DISK_ENTRIES', '10000'))
+SUMMARY_CACHE_TTL = float(os.getenv('SUMMARY_CACHE_TTL', str(7 * 24 * 3600)))
+
+
+def make_cache_key(text, provider, model, prompt_version):
+    """
+    Build a cache key for a summary
+
+    Args:
+        text: Full claim text
+        provider: Summarization provider (xai, openai, bart, simple)
+        model: Model name used by the provider
+        prompt_version: Version of the prompt/extraction logic
+
+    Returns:
+        str: provider:model:prompt_version:sha256(text)
+    """
+    digest = hashlib.sha256(text.encode('utf-8', errors='replace')).hexdigest()
+    return f"{provider}:{model}:{prompt_version}:{digest}"
+
+
+class SummaryCache:
+    """
+    Two-tier summary cache
+
+    Lookups check the in-memory LRU first, then SQLite; disk hits are promoted
+    to memory. Both tiers are bounded and entries older than the TTL are
+    treated as misses and removed.
+    """
+
+    def __init__(self, db_path=SUMMARY_CACHE_PATH, max_memory_entries=SUMMARY_CACHE_MEMORY_ENTRIES,
+                 max_disk_entries=SUMMARY_CACHE_DISK_ENTRIES, ttl_seconds=SUMMARY_CACHE_TTL):
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expired": 0}
+
+    def _db(self):
+        """Open the SQLite tier on first use; must be called with the lock held"""
+        if self._conn is None and self.db_path:
+            try:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn.execute('''
+                    CREATE TABLE IF NOT EXISTS summaries (
+                        key TEXT PRIMARY KEY,
+                        summary TEXT,
+                        created_at REAL,
+                        accessed_at REAL
+                    )
+                ''')
+                self._conn.execute('CREATE INDEX IF NOT EXISTS idx_summaries_accessed ON summaries (accessed_at)')
+                self._conn.commit()
+            except Exception as e:
+                print(f"Summary cache disk tier unavailable: {str(e)}")
+                self._conn = None
+                self.db_path = None
+        return self._conn
+
+    def _expired(self, created_at, now):
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def get(self, key):
+        """
+        Look up a cached summary
+
+        Args:
+            key: Key from make_cache_key
+
+        Returns:
+            str or None: Cached summary, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                summary, created_at = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return summary
+                del self._memory[key]
+                self._counters["expired"] += 1
+
+            conn = self._db()
+            if conn is not None:
+                try:
+                    row = conn.execute('SELECT summary, created_at FROM summaries WHERE key = ?', (key,)).fetchone()
+                    if row is not None:
+                        summary, created_at = row
+                        if not self._expired(created_at, now):
+                            conn.execute('UPDATE summaries SET accessed_at = ? WHERE key = ?', (now, key))
+                            conn.commit()
+                            self._remember(key, summary, created_at)
+                            self._counters["disk_hits"] += 1
+                            return summary
+                        conn.execute('DELETE FROM summaries WHERE key = ?', (key,))
+                        conn.commit()
+                        self._counters["expired"] += 1
+                except Exception as e:
+                    print(f"Summary cache read error: {str(e)}")
+
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, key, summary):
+        """
+        Store a summary in both tiers
+
+        Args:
+            key: Key from make_cache_key
+            summary: Summary text
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, summary, now)
+            self._counters["sets"] += 1
+            conn = self._db()
+            if conn is None:
+                return
+            try:
+                conn.execute('''
+                    INSERT OR REPLACE INTO summaries (key, summary, created_at, accessed_at)
+                    VALUES (?, ?, ?, ?)
+                ''', (key, summary, now, now))
+                if self.ttl_seconds > 0:
+                    conn.execute('DELETE FROM summaries WHERE created_at < ?', (now - self.ttl_seconds,))
+                cursor = conn.execute('''
+                    DELETE FROM summaries WHERE key IN (
+                        SELECT key FROM summaries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (self.max_disk_entries,))
+                self._counters["evictions"] += max(cursor.rowcount, 0)
+                conn.commit()
+            except Exception as e:
+                print(f"Summary cache write error: {str(e)}")
+
+    def _remember(self, key, summary, created_at):
+        """Insert into the memory tier, evicting least recently used entries"""
+        self._memory[key] = (summary, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def clear(self):
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            conn = self._db()
+            if conn is not None:
+                conn.execute('DELETE FROM summaries')
+                conn.commit()
+
+    def stats(self):
+        """
+        Report hit/miss counters and tier sizes
+
+        Returns:
+            dict: counters, hit rate and entry counts
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+            stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else None
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = None
+            conn = self._db()
+            if conn is not None:
+                try:
+                    stats["disk_entries"] = conn.execute('SELECT COUNT(*) FROM summaries').fetchone()[0]
+                except Exception:
+                    pass
+            return stats
+
+
+# Process-wide cache used by utils.summarize_claim
+summary_cache = SummaryCache() if os.getenv('SUMMARY_CACHE_ENABLED', '1').lower() in ('1', 'true', 'yes') else None
+
+
+def cached_summary(text, provider, model, prompt_version, compute):
+    """
+    Return a cached summary or compute and store it
+
+    Args:
+        text: Full claim text
+        provider: Summarization provider name
+        model: Model name
+        prompt_version: Prompt/extraction version
+        compute: Zero-argument callable producing the summary; exceptions propagate
+            and nothing is cached
+
+    Returns:
+        str: Summary text
+    """
+    summary = get_cached_summary(text, provider, model, prompt_version)
+    if summary is None:
+        summary = compute()
+        store_summary(text, provider, model, prompt_version, summary)
+    return summary
+
+
+def get_cached_summary(text, provider, model, prompt_version):
+    """Look up a summary without computing it; None on a miss or when disabled"""
+    if summary_cache is None:
+        return None
+    return summary_cache.get(make_cache_key(text, provider, model, prompt_version))
+
+
+def store_summary(text, provider, model, prompt_version, summary):
+    """Store a summary produced outside cached_summary (e.g. a finished stream)"""
+    if summary_cache is not None:
+        summary_cache.set(make_cache_key(text, provider, model, prompt_version), summary)
+
+
+def summary_cache_stats():
+    """Return cache counters, or a disabled marker"""
+    if summary_cache is None:
+        return {"enabled": False}
+    stats = summary_cache.stats()
+    stats["enabled"] = True
+    return stats
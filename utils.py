@@ -3,13 +3,40 @@ Utility functions for ClaimEquity AI
 Handles claim parsing, summarization, and bias detection
 """
 import PyPDF2
-import sqlite3
-import hashlib
-import pandas as pd
-import matplotlib.pyplot as plt
 import requests
 import os
-from transformers import pipeline
+import re
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from summarizer import get_summarizer, summarize_local, local_model_id
+from summary_cache import cached_summary, get_cached_summary, store_summary
+from circuit_breaker import get_breaker, CircuitOpenError
+from claim_extractor import extract_claim_fields, claim_feature_matrix, CLAIM_FEATURE_COLS
+from extractive_summary import extractive_summary
+from bias_db import BIAS_DB_PATH, anon_hash, bias_data_version, connect, migrate
+
+
+# Bump when the summarization prompts (or, for SIMPLE_SUMMARY_VERSION, the
+# simple_text_summary rules) change so cached summaries from the old logic
+# are not reused
+SUMMARY_PROMPT_VERSION = "1"
+SIMPLE_SUMMARY_VERSION = "2"
+
+# "auto" runs the xAI -> OpenAI -> local model -> simple extraction chain;
+# "extractive" returns the fast TF-IDF extractive summary directly
+SUMMARY_MODES = ("auto", "extractive")
+SUMMARY_SYSTEM_PROMPT = "You are a healthcare insurance claim expert. Summarize claims in plain English, highlighting key details like diagnosis codes, denial reasons, and treatment costs."
+
+# Map-reduce summarization settings for long claims
+SUMMARY_CHUNK_WORKERS = int(os.getenv('SUMMARY_CHUNK_WORKERS', '4'))
+LLM_CHUNK_CHARS = 4000    # matches the xAI/OpenAI truncation limit
+LOCAL_CHUNK_CHARS = 1000  # matches the BART truncation limit
+# Hedged summarization: start the next provider if the current one is slow
+SUMMARY_HEDGE_DELAY = float(os.getenv('SUMMARY_HEDGE_DELAY', '2.0'))
+SUMMARY_HEDGE_TIMEOUT = float(os.getenv('SUMMARY_HEDGE_TIMEOUT', '30'))
+
+SECTION_HEADING = re.compile(r'^\s*([A-Z][A-Z0-9 /&().,-]{3,}|[A-Z][\w /&().,-]{2,60}:)\s*$')
 
 
 def parse_claim(file):
@@ -32,7 +59,77 @@ def parse_claim(file):
         return f"Error parsing PDF: {str(e)}"
 
 
-def summarize_claim(text, use_openai=False, api_key=None, use_xai=False, xai_key=None):
+def _chat_payload(model, text):
+    """Build the chat-completions payload shared by xAI and OpenAI"""
+    # Truncate text to avoid token limits
+    truncated_text = text[:4000] if len(text) > 4000 else text
+    return {
+        "model": model,
+        "messages": [
+            {
+                "role": "system",
+                "content": SUMMARY_SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": f"Summarize this insurance claim in plain English, focusing on what was denied and why: {truncated_text}"
+            }
+        ],
+        "temperature": 0.3,
+        "max_tokens": 500
+    }
+
+
+def _chat_completion(provider, url, api_key, payload, timeout=30):
+    """
+    POST a chat-completions request and return the message content
+
+    The call goes through the provider's circuit breaker, so a provider that
+    keeps failing raises CircuitOpenError immediately instead of timing out.
+    """
+    def post():
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        response = requests.post(url, json=payload, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        result = response.json()
+        return result["choices"][0]["message"]["content"]
+
+    return get_breaker(provider, api_key).call(post)
+
+
+def _xai_summary(text, xai_key):
+    """Summarize with xAI Grok (cached); raises on any API error"""
+    payload = _chat_payload("grok-3", text)
+    return cached_summary(
+        text, "xai", payload["model"], SUMMARY_PROMPT_VERSION,
+        lambda: _chat_completion("xai", "https://api.x.ai/v1/chat/completions", xai_key, payload)
+    )
+
+
+def _openai_summary(text, api_key):
+    """Summarize with OpenAI (cached); raises on any API error"""
+    payload = _chat_payload("gpt-4o-mini", text)
+    return cached_summary(
+        text, "openai", payload["model"], SUMMARY_PROMPT_VERSION,
+        lambda: _chat_completion("openai", "https://api.openai.com/v1/chat/completions", api_key, payload)
+    )
+
+
+def _local_summary(text):
+    """Summarize with the shared local model (cached); raises if it is unavailable"""
+    # Limit text length for model
+    truncated_text = text[:1000] if len(text) > 1000 else text
+    # Shared transformers pipeline, batched with concurrent requests
+    return cached_summary(
+        text, "bart", local_model_id(), SUMMARY_PROMPT_VERSION,
+        lambda: summarize_local(truncated_text, max_length=150, min_length=50, do_sample=False)
+    )
+
+
+def summarize_claim(text, use_openai=False, api_key=None, use_xai=False, xai_key=None, mode="auto"):
     """
     Summarize insurance claim text
     
@@ -42,6 +139,8 @@ def summarize_claim(text, use_openai=False, api_key=None, use_xai=False, xai_key
         api_key: OpenAI API key if use_openai is True
         use_xai: Whether to use xAI Grok API
         xai_key: xAI API key if use_xai is True
+        mode: "auto" for the provider fallback chain, "extractive" for the
+            fast local extractive summary (no model or API calls)
     
     Returns:
         tuple: (summary_text, used_xai) - summary and whether xAI was successfully used
@@ -49,38 +148,18 @@ def summarize_claim(text, use_openai=False, api_key=None, use_xai=False, xai_key
     if not text or len(text.strip()) == 0:
         return "No text found in claim document.", False
     
+    if mode == "extractive":
+        return cached_summary(
+            text, "extractive", "tfidf-centroid", SUMMARY_PROMPT_VERSION, lambda: extractive_summary(text)
+        ), False
+    
     # Try xAI Grok first if available (for hackathon prize eligibility)
     if use_xai and xai_key:
         # Validate API key format
         if not xai_key.startswith('xai-'):
             print(f"⚠️ Warning: xAI API key doesn't start with 'xai-'. Key provided: {xai_key[:10]}...")
         try:
-            url = "https://api.x.ai/v1/chat/completions"
-            headers = {
-                "Authorization": f"Bearer {xai_key}",
-                "Content-Type": "application/json"
-            }
-            # Truncate text to avoid token limits
-            truncated_text = text[:4000] if len(text) > 4000 else text
-            payload = {
-                "model": "grok-3",
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "You are a healthcare insurance claim expert. Summarize claims in plain English, highlighting key details like diagnosis codes, denial reasons, and treatment costs."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Summarize this insurance claim in plain English, focusing on what was denied and why: {truncated_text}"
-                    }
-                ],
-                "temperature": 0.3,
-                "max_tokens": 500
-            }
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            response.raise_for_status()
-            result = response.json()
-            summary = result["choices"][0]["message"]["content"]
+            summary = _xai_summary(text, xai_key)
             return summary, True  # Successfully used xAI
         except requests.exceptions.HTTPError as e:
             # HTTP error (401, 403, 404, etc.)
@@ -127,32 +206,7 @@ def summarize_claim(text, use_openai=False, api_key=None, use_xai=False, xai_key
     
     if use_openai and api_key:
         try:
-            url = "https://api.openai.com/v1/chat/completions"
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-            # Truncate text to avoid token limits
-            truncated_text = text[:4000] if len(text) > 4000 else text
-            payload = {
-                "model": "gpt-4o-mini",
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "You are a healthcare insurance claim expert. Summarize claims in plain English, highlighting key details like diagnosis codes, denial reasons, and treatment costs."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Summarize this insurance claim in plain English, focusing on what was denied and why: {truncated_text}"
-                    }
-                ],
-                "max_tokens": 500,
-                "temperature": 0.3
-            }
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            response.raise_for_status()
-            result = response.json()
-            return result['choices'][0]['message']['content'], False
+            return _openai_summary(text, api_key), False
         except Exception as e:
             # Fallback to simple summarization if OpenAI fails
             summary, _ = summarize_claim(text, use_openai=False, api_key=None, use_xai=False, xai_key=None)
@@ -160,23 +214,426 @@ def summarize_claim(text, use_openai=False, api_key=None, use_xai=False, xai_key
     else:
         # Fallback: Try Hugging Face, then simple text extraction
         try:
-            # Try to use transformers pipeline
-            summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
-            # Limit text length for model
-            truncated_text = text[:1000] if len(text) > 1000 else text
-            if len(truncated_text) < 50:
+            if len(text) < 50:
                 return "Text too short to summarize.", False
-            summary = summarizer(truncated_text, max_length=150, min_length=50, do_sample=False)
-            return summary[0]['summary_text'], False
+            return _local_summary(text), False
         except Exception as e:
             # If transformers fails (e.g., Keras compatibility), use simple extraction
             error_msg = str(e)
             if "Keras" in error_msg or "tf-keras" in error_msg:
                 # Use simple text extraction as fallback
-                return simple_text_summary(text), False
+                return cached_simple_summary(text), False
             else:
                 # For other errors, also use simple summary
-                return simple_text_summary(text), False
+                return cached_simple_summary(text), False
+
+
+def split_claim_sections(text, max_chars):
+    """
+    Split claim text into chunks on section boundaries
+
+    Blank lines and heading lines (ALL CAPS or ending in a colon) start a new
+    section. Sections are packed greedily into chunks of at most max_chars;
+    a section longer than max_chars is split on line boundaries, and a single
+    overlong line is hard-split.
+
+    Args:
+        text: Claim text
+        max_chars: Maximum characters per chunk
+
+    Returns:
+        list: Chunk strings
+    """
+    sections = []
+    current = []
+    for line in text.split('\n'):
+        if not line.strip() or SECTION_HEADING.match(line):
+            if current:
+                sections.append('\n'.join(current))
+            current = [line] if line.strip() else []
+        else:
+            current.append(line)
+    if current:
+        sections.append('\n'.join(current))
+
+    pieces = []
+    for section in sections:
+        if len(section) <= max_chars:
+            pieces.append(section)
+            continue
+        for line in section.split('\n'):
+            for start in range(0, max(len(line), 1), max_chars):
+                pieces.append(line[start:start + max_chars])
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current}\n\n{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+        else:
+            if current:
+                chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _model_summary(text, use_openai=False, api_key=None, use_xai=False, xai_key=None):
+    """
+    Summarize with the first model provider that answers
+
+    Follows summarize_claim's provider order (xAI, OpenAI, local model) but
+    never falls back to simple extraction.
+
+    Returns:
+        tuple: (summary_text, provider) where provider is "xai", "openai" or "local"
+
+    Raises:
+        RuntimeError: If no provider could summarize the text
+    """
+    attempts = []
+    if use_xai and xai_key:
+        attempts.append(("xai", lambda: _xai_summary(text, xai_key)))
+    if use_openai and api_key:
+        attempts.append(("openai", lambda: _openai_summary(text, api_key)))
+    attempts.append(("local", lambda: _local_summary(text)))
+
+    errors = []
+    for provider, attempt in attempts:
+        try:
+            return attempt(), provider
+        except Exception as e:
+            errors.append(f"{provider}: {type(e).__name__}: {str(e)[:100]}")
+    raise RuntimeError("; ".join(errors))
+
+
+def _map_reduce_summary(text, provider_kwargs, max_workers, chunk_chars, report, depth=0):
+    """
+    Summarize chunks in parallel and combine them with a model
+
+    Returns:
+        tuple: (summary_text, set of providers used)
+
+    Raises:
+        RuntimeError: If any chunk or the reduce step could not use a model
+    """
+    chunks = split_claim_sections(text, chunk_chars)
+    report["chunks"] = len(chunks)
+
+    def summarize_chunk(index):
+        chunk_start = time.perf_counter()
+        summary, provider = _model_summary(chunks[index], **provider_kwargs)
+        return summary, provider, {
+            "index": index,
+            "chars": len(chunks[index]),
+            "provider": provider,
+            "seconds": round(time.perf_counter() - chunk_start, 3)
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        results = list(executor.map(summarize_chunk, range(len(chunks))))
+
+    report["chunk_timings"] = [timing for _, _, timing in results]
+    providers = {provider for _, provider, _ in results}
+    combined = "\n\n".join(f"Part {i + 1}: {summary}" for i, (summary, _, _) in enumerate(results))
+
+    reduce_start = time.perf_counter()
+    if len(combined) > chunk_chars and depth < 2:
+        # Partial summaries still too long for one call; reduce them again
+        reduce_report = {"chunk_chars": chunk_chars, "chunks": 0, "chunk_timings": []}
+        summary, reduce_providers = _map_reduce_summary(
+            combined, provider_kwargs, max_workers, chunk_chars, reduce_report, depth + 1
+        )
+        report["reduce_levels"] = reduce_report
+    else:
+        summary, reduce_provider = _model_summary(combined, **provider_kwargs)
+        reduce_providers = {reduce_provider}
+    report["reduce_seconds"] = round(time.perf_counter() - reduce_start, 3)
+    return summary, providers | reduce_providers
+
+
+def summarize_claim_chunked(text, use_openai=False, api_key=None, use_xai=False, xai_key=None,
+                            max_workers=SUMMARY_CHUNK_WORKERS, chunk_chars=None):
+    """
+    Summarize a long claim with map-reduce instead of truncating it
+
+    The text is split on section boundaries, each chunk is summarized in
+    parallel (at most max_workers at a time) by an LLM or the local model,
+    and the partial summaries are combined in a final reduce step. Text that
+    already fits in one chunk is summarized directly. If no model is
+    available, or any chunk could only be summarized by simple extraction,
+    the full text is summarized once by simple extraction instead, since
+    extracting from the "Part N:" concatenation would lose fields.
+
+    Args:
+        text: Claim text to summarize
+        use_openai, api_key, use_xai, xai_key: Provider options as for summarize_claim
+        max_workers: Maximum concurrent chunk summarizations
+        chunk_chars: Chunk size (defaults to the provider's truncation limit)
+
+    Returns:
+        tuple: (summary_text, used_xai, report) where report has per-chunk timings
+    """
+    start = time.perf_counter()
+    provider_kwargs = dict(use_openai=use_openai, api_key=api_key, use_xai=use_xai, xai_key=xai_key)
+    uses_llm = (use_xai and xai_key) or (use_openai and api_key)
+    if chunk_chars is None:
+        chunk_chars = LLM_CHUNK_CHARS if uses_llm else LOCAL_CHUNK_CHARS
+
+    report = {"chunk_chars": chunk_chars, "chunks": 0, "chunk_timings": [], "reduce_seconds": 0.0}
+
+    if not text or len(text) <= chunk_chars:
+        summary, used_xai = summarize_claim(text, **provider_kwargs)
+        report["chunks"] = 1
+        report["total_seconds"] = round(time.perf_counter() - start, 3)
+        return summary, used_xai, report
+
+    try:
+        if not uses_llm:
+            # Load the local model now (or learn that it is unavailable) rather
+            # than discovering it chunk by chunk
+            get_summarizer()
+        summary, providers = _map_reduce_summary(text, provider_kwargs, max_workers, chunk_chars, report)
+        used_xai = providers == {"xai"}
+    except RuntimeError as e:
+        # simple_text_summary already scans the whole document, so run it once
+        # over the original text
+        print(f"Chunked summarization unavailable, using simple extraction: {str(e)}")
+        summary, used_xai = cached_simple_summary(text), False
+        report["chunks"] = 1
+        report["chunk_timings"] = []
+        report["fallback"] = "simple"
+    report["total_seconds"] = round(time.perf_counter() - start, 3)
+    return summary, used_xai, report
+
+
+def summarize_claim_hedged(text, use_openai=False, api_key=None, use_xai=False, xai_key=None,
+                           hedge_delay=SUMMARY_HEDGE_DELAY, timeout=SUMMARY_HEDGE_TIMEOUT):
+    """
+    Summarize with hedged provider requests instead of a sequential fallback chain
+
+    Providers are tried in the usual priority order (xAI, OpenAI, local model).
+    If the running provider has not answered within hedge_delay seconds, the
+    next one is started alongside it; a provider that fails starts the next
+    one immediately. The first good answer wins and the remaining requests are
+    abandoned (queued ones are cancelled; in-flight HTTP calls are left to
+    finish in the background and their results discarded). The simple text
+    extraction is computed up front and returned if nothing succeeds before
+    the timeout.
+
+    Args:
+        text: Claim text to summarize
+        use_openai, api_key, use_xai, xai_key: Provider options as for summarize_claim
+        hedge_delay: Seconds to wait on a provider before starting the next one
+        timeout: Overall deadline in seconds
+
+    Returns:
+        tuple: (summary_text, used_xai, report) where report names the winning
+            provider and the timing of every attempt
+    """
+    start = time.perf_counter()
+    report = {"winner": None, "degraded": False, "attempts": []}
+    if not text or len(text.strip()) == 0:
+        report["degraded"] = True
+        return "No text found in claim document.", False, report
+
+    # Degraded answer that is always available right away
+    degraded = cached_simple_summary(text)
+
+    providers = []
+    if use_xai and xai_key:
+        providers.append(("xai", lambda: _xai_summary(text, xai_key)))
+    if use_openai and api_key:
+        providers.append(("openai", lambda: _openai_summary(text, api_key)))
+    if len(text) >= 50:
+        providers.append(("bart", lambda: _local_summary(text)))
+
+    executor = ThreadPoolExecutor(max_workers=max(1, len(providers)), thread_name_prefix="hedge")
+    pending = {}
+
+    def launch():
+        name, call = providers[len(report["attempts"])]
+        attempt = {"provider": name, "started": round(time.perf_counter() - start, 3), "status": "running"}
+        report["attempts"].append(attempt)
+        pending[executor.submit(call)] = attempt
+
+    try:
+        if providers:
+            launch()
+        deadline = start + timeout
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            can_hedge = len(report["attempts"]) < len(providers)
+            done, _ = wait(list(pending), timeout=min(hedge_delay, remaining) if can_hedge else remaining,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                if can_hedge:
+                    launch()  # Current provider is slow; hedge with the next one
+                continue
+            for future in done:
+                attempt = pending.pop(future)
+                attempt["seconds"] = round(max(time.perf_counter() - start - attempt["started"], 0.0), 3)
+                try:
+                    summary = future.result()
+                except Exception as e:
+                    attempt["status"] = "failed"
+                    attempt["error"] = f"{type(e).__name__}: {str(e)[:200]}"
+                    continue
+                if summary:
+                    attempt["status"] = "won"
+                    report["winner"] = attempt["provider"]
+                    report["total_seconds"] = round(time.perf_counter() - start, 3)
+                    return summary, attempt["provider"] == "xai", report
+                attempt["status"] = "empty"
+            if len(report["attempts"]) < len(providers):
+                launch()  # Provider failed; start the next one straight away
+    finally:
+        for attempt in pending.values():
+            attempt["status"] = "cancelled"
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    report["degraded"] = True
+    report["total_seconds"] = round(time.perf_counter() - start, 3)
+    return degraded, False, report
+
+
+def _stream_chat_completion(provider, url, api_key, payload, timeout=30):
+    """
+    Yield content deltas from an OpenAI-compatible streaming chat completion
+
+    Uses the provider's circuit breaker like _chat_completion; the call is
+    recorded as a success once the stream has been fully read. The latency
+    recorded is the time to the first delta, since the full stream time
+    grows with the letter's length and the client's reading speed and would
+    trip the slow-call rule for a healthy provider.
+    """
+    breaker = get_breaker(provider, api_key)
+    if not breaker.allow_request():
+        raise CircuitOpenError(f"{breaker.name} circuit open; skipping provider")
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    start = time.perf_counter()
+    first_delta = None
+
+    def latency():
+        return first_delta if first_delta is not None else time.perf_counter() - start
+
+    try:
+        with requests.post(url, json={**payload, "stream": True}, headers=headers, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or []
+                delta = choices[0].get("delta", {}).get("content") if choices else None
+                if delta:
+                    if first_delta is None:
+                        first_delta = time.perf_counter() - start
+                    yield delta
+    except GeneratorExit:
+        # Client went away mid-stream; the provider itself was healthy
+        breaker.record_success(latency())
+        raise
+    except Exception as e:
+        breaker.record_failure(latency(), e)
+        raise
+    breaker.record_success(latency())
+
+
+def iter_text_chunks(text, size=80):
+    """
+    Split finished text into word-aligned pieces for chunked streaming delivery
+
+    Args:
+        text: Text to split
+        size: Approximate characters per piece
+
+    Yields:
+        str: Consecutive pieces that join back to the original text
+    """
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            space = text.rfind(' ', start, end)
+            if space > start:
+                end = space + 1
+        yield text[start:end]
+        start = end
+
+
+def stream_claim_summary(text, use_openai=False, api_key=None, use_xai=False, xai_key=None):
+    """
+    Stream a claim summary as it is generated
+
+    xAI and OpenAI tokens are passed through as they arrive. If a provider
+    fails before sending anything, the next one in the usual fallback order is
+    tried. The local model and simple extraction produce the whole summary at
+    once, which is then delivered in chunks.
+
+    Args:
+        text: Claim text to summarize
+        use_openai, api_key, use_xai, xai_key: Provider options as for summarize_claim
+
+    Yields:
+        dict: {"type": "delta", "text": ...} events, optional {"type": "notice", "text": ...}
+            events when a provider is skipped, then {"type": "done", "provider": ..., "used_xai": ...};
+            {"type": "error", "error": ...} if a stream breaks part way through
+    """
+    if not text or len(text.strip()) == 0:
+        yield {"type": "delta", "text": "No text found in claim document."}
+        yield {"type": "done", "provider": None, "used_xai": False}
+        return
+
+    providers = []
+    if use_xai and xai_key:
+        providers.append(("xai", "xAI", "grok-3", "https://api.x.ai/v1/chat/completions", xai_key))
+    if use_openai and api_key:
+        providers.append(("openai", "OpenAI", "gpt-4o-mini", "https://api.openai.com/v1/chat/completions", api_key))
+
+    for provider, label, model, url, key in providers:
+        cached = get_cached_summary(text, provider, model, SUMMARY_PROMPT_VERSION)
+        if cached is not None:
+            for piece in iter_text_chunks(cached):
+                yield {"type": "delta", "text": piece}
+            yield {"type": "done", "provider": provider, "used_xai": provider == "xai"}
+            return
+
+        parts = []
+        try:
+            for delta in _stream_chat_completion(provider, url, key, _chat_payload(model, text)):
+                parts.append(delta)
+                yield {"type": "delta", "text": delta}
+        except Exception as e:
+            print(f"❌ {label} streaming error: {type(e).__name__}: {str(e)}")
+            if parts:
+                yield {"type": "error", "error": f"{label} stream interrupted: {str(e)[:100]}"}
+                return
+            yield {"type": "notice", "text": f"⚠️ {label} API failed. Using fallback summarization."}
+            continue
+        store_summary(text, provider, model, SUMMARY_PROMPT_VERSION, "".join(parts))
+        yield {"type": "done", "provider": provider, "used_xai": provider == "xai"}
+        return
+
+    # Local model / simple extraction: no token stream, deliver in chunks
+    summary, _ = summarize_claim(text)
+    for piece in iter_text_chunks(summary):
+        yield {"type": "delta", "text": piece}
+    yield {"type": "done", "provider": "local", "used_xai": False}
+
+
+def cached_simple_summary(text):
+    """simple_text_summary backed by the shared summary cache"""
+    return cached_summary(text, "simple", "rules", SIMPLE_SUMMARY_VERSION, lambda: simple_text_summary(text))
 
 
 def simple_text_summary(text):
@@ -193,63 +650,34 @@ def simple_text_summary(text):
     if not text or len(text.strip()) == 0:
         return "No text found in claim document."
     
-    # Extract key information using simple text parsing
+    # Extract key information in a single pass over the lines
+    fields = extract_claim_fields(text)
     summary_parts = []
     
-    # Extract insurance company
-    if "Insurance Company:" in text:
-        company_line = [line for line in text.split('\n') if "Insurance Company:" in line]
-        if company_line:
-            summary_parts.append(f"**Insurance:** {company_line[0].split('Insurance Company:')[-1].strip()}")
+    if fields["insurer"]:
+        summary_parts.append(f"**Insurance:** {fields['insurer']}")
     
-    # Extract claim number
-    if "Claim Number:" in text:
-        claim_line = [line for line in text.split('\n') if "Claim Number:" in line]
-        if claim_line:
-            summary_parts.append(f"**Claim Number:** {claim_line[0].split('Claim Number:')[-1].strip()}")
+    if fields["claim_number"]:
+        summary_parts.append(f"**Claim Number:** {fields['claim_number']}")
     
-    # Extract denial reason
-    denial_keywords = ["DENIAL REASON", "Denial Reason", "denial reason"]
-    for keyword in denial_keywords:
-        if keyword in text:
-            lines = text.split('\n')
-            for i, line in enumerate(lines):
-                if keyword in line:
-                    summary_parts.append(f"**Denial:** {line.split(':')[-1].strip() if ':' in line else line}")
-                    # Also get explanation if available
-                    if i + 1 < len(lines) and "Explanation" in lines[i+1]:
-                        explanation = lines[i+2] if i+2 < len(lines) else ""
-                        if explanation.strip():
-                            summary_parts.append(f"**Reason:** {explanation.strip()[:200]}")
-                    break
+    if fields["denial_reason"] and fields["denial_code"]:
+        summary_parts.append(f"**Denial:** {fields['denial_reason']} ({fields['denial_code']})")
+    elif fields["denial_reason"] or fields["denial_code"]:
+        summary_parts.append(f"**Denial:** {fields['denial_reason'] or fields['denial_code']}")
     
-    # Extract claim amount
-    amount_keywords = ["Total Claim Amount:", "Claim Amount:", "Billed Amount:"]
-    for keyword in amount_keywords:
-        if keyword in text:
-            amount_line = [line for line in text.split('\n') if keyword in line]
-            if amount_line:
-                amount = amount_line[0].split(':')[-1].strip()
-                summary_parts.append(f"**Amount:** {amount}")
-                break
+    if fields["explanation"]:
+        summary_parts.append(f"**Reason:** {fields['explanation']}")
+    
+    amounts = fields["amounts"]
+    amount = amounts["total_claim"] or amounts["claim"] or (amounts["billed"][0] if amounts["billed"] else None)
+    if amount:
+        summary_parts.append(f"**Amount:** {amount}")
     
-    # Extract diagnosis codes
-    if "ICD-10" in text or "ICD" in text:
-        import re
-        icd_pattern = r'[A-Z]\d{2}\.?\d*'
-        icd_codes = re.findall(icd_pattern, text)
-        if icd_codes:
-            unique_codes = list(set(icd_codes[:5]))  # Limit to 5 codes
-            summary_parts.append(f"**Diagnosis Codes:** {', '.join(unique_codes)}")
+    if fields["icd10_codes"]:
+        summary_parts.append(f"**Diagnosis Codes:** {', '.join(fields['icd10_codes'][:5])}")  # Limit to 5 codes
     
-    # Extract procedure codes
-    if "CPT" in text:
-        import re
-        cpt_pattern = r'\d{5}'
-        cpt_codes = re.findall(cpt_pattern, text)
-        if cpt_codes:
-            unique_codes = list(set(cpt_codes[:5]))  # Limit to 5 codes
-            summary_parts.append(f"**Procedure Codes:** {', '.join(unique_codes)}")
+    if fields["cpt_codes"]:
+        summary_parts.append(f"**Procedure Codes:** {', '.join(fields['cpt_codes'][:5])}")  # Limit to 5 codes
     
     # If we found key information, return formatted summary
     if summary_parts:
@@ -264,22 +692,11 @@ def init_db():
     Initialize SQLite database for anonymized bias data
     
     Returns:
-        sqlite3.Connection: Database connection
-    """
-    conn = sqlite3.connect('database.db')
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS biases (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            hash TEXT UNIQUE,
-            denial_reason TEXT,
-            zip TEXT,
-            demo TEXT,
-            claim_amount REAL,
-            outcome INTEGER,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    conn.commit()
+        sqlite3.Connection: Tuned connection to an up-to-date database; prefer
+            bias_db.connection() in multi-threaded servers
+    """
+    conn = connect(BIAS_DB_PATH)
+    migrate(conn)
     return conn
 
 
@@ -293,8 +710,7 @@ def add_anon_data(conn, data):
     """
     try:
         # Create hash from identifying information
-        hash_input = f"{data.get('zip', '')}{data.get('demo', '')}{data.get('reason', '')}"
-        hash_val = hashlib.sha256(hash_input.encode()).hexdigest()[:16]  # Short hash
+        hash_val = anon_hash(data.get('zip', ''), data.get('demo', ''), data.get('reason', ''))  # Short hash
         
         conn.execute('''
             INSERT OR IGNORE INTO biases (hash, denial_reason, zip, demo, claim_amount, outcome)
@@ -312,6 +728,31 @@ def add_anon_data(conn, data):
         print(f"Error adding data: {str(e)}")
 
 
+def is_bias_alert(denial_count, success_rate):
+    """True if a group has enough denials with a low enough success rate (0-1) to flag"""
+    return denial_count > 5 and success_rate * 100 < 30
+
+
+def bias_message(user_demo, user_zip, denial_count=None, success_rate=None):
+    """
+    User-facing bias message for the user's group
+
+    Args:
+        user_demo: Demographic group
+        user_zip: Zip code
+        denial_count: Records in the group, or None if the group has none
+        success_rate: Group success rate (0-1)
+
+    Returns:
+        str: Alert, pattern summary, or no-pattern message
+    """
+    if denial_count is None:
+        return "No specific patterns detected for your demographic group yet."
+    if is_bias_alert(denial_count, success_rate):
+        return f"⚠️ BIAS ALERT: High denial rate ({denial_count} denials, {success_rate * 100:.1f}% success) detected in your demographic group ({user_demo}, {user_zip})."
+    return f"Pattern detected: {denial_count} denials in your group with {success_rate * 100:.1f}% success rate."
+
+
 def detect_bias(conn, user_data):
     """
     Detect bias patterns in anonymized data
@@ -321,66 +762,35 @@ def detect_bias(conn, user_data):
         user_data: dict with user demographics (zip, demo, etc.)
     
     Returns:
-        tuple: (bias_message, figure_path)
+        tuple: (bias_message, chart_version); chart_version is the bias data
+            version the chart from bias_chart.bias_charts should be fetched
+            for, or None when there is no data
     """
     try:
-        df = pd.read_sql('SELECT * FROM biases', conn)
+        # The user's group is read by primary key, so the cost does not grow
+        # with the number of records; the chart is rendered separately and
+        # cached per data version
+        has_data = conn.execute('SELECT 1 FROM bias_cells LIMIT 1').fetchone()
         
-        if df.empty:
+        if not has_data:
             return "No data available yet. Share anonymized data to build bias detection.", None
         
-        # Group by demographics and zip to find patterns
-        patterns = df.groupby(['demo', 'zip']).agg({
-            'denial_reason': 'count',
-            'outcome': 'mean'
-        }).reset_index()
-        patterns.columns = ['demo', 'zip', 'denial_count', 'success_rate']
-        
         # Check if user matches high-denial group
         user_demo = user_data.get('demo', 'unknown')
         user_zip = user_data.get('zip', 'unknown')
         
-        match = patterns[
-            (patterns['demo'] == user_demo) & 
-            (patterns['zip'] == user_zip)
-        ]
-        
-        # Create visualization
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        if len(patterns) > 0:
-            top_patterns = patterns.nlargest(10, 'denial_count')
-            ax.barh(
-                range(len(top_patterns)),
-                top_patterns['denial_count'],
-                color='coral'
-            )
-            ax.set_yticks(range(len(top_patterns)))
-            ax.set_yticklabels([
-                f"{row['demo']} - {row['zip']}" 
-                for _, row in top_patterns.iterrows()
-            ])
-            ax.set_xlabel('Number of Denials')
-            ax.set_title('Bias Pattern: Denials by Demographics & Zip Code')
-            ax.grid(axis='x', alpha=0.3)
-        
-        plt.tight_layout()
-        figure_path = 'bias_heatmap.png'
-        plt.savefig(figure_path, dpi=150, bbox_inches='tight')
-        plt.close()
+        match = conn.execute('''
+            SELECT record_count, CAST(outcome_sum AS REAL) / record_count
+            FROM bias_cells WHERE demo = ? AND zip = ?
+        ''', (user_demo, user_zip)).fetchone()
         
         # Generate bias alert
-        if not match.empty:
-            denial_count = match.iloc[0]['denial_count']
-            success_rate = match.iloc[0]['success_rate'] * 100
-            if denial_count > 5 and success_rate < 30:
-                bias_msg = f"⚠️ BIAS ALERT: High denial rate ({denial_count} denials, {success_rate:.1f}% success) detected in your demographic group ({user_demo}, {user_zip})."
-            else:
-                bias_msg = f"Pattern detected: {denial_count} denials in your group with {success_rate:.1f}% success rate."
+        if match is not None:
+            bias_msg = bias_message(user_demo, user_zip, match[0], match[1])
         else:
-            bias_msg = "No specific patterns detected for your demographic group yet."
+            bias_msg = bias_message(user_demo, user_zip)
         
-        return bias_msg, figure_path
+        return bias_msg, bias_data_version(conn)
         
     except Exception as e:
         return f"Error detecting bias: {str(e)}", None
@@ -396,13 +806,7 @@ def get_claim_features(text):
     Returns:
         dict: Extracted features
     """
-    # Simple feature extraction
-    features = {
-        'text_length': len(text),
-        'has_icd_code': 1 if 'ICD' in text.upper() or 'E11' in text or 'I10' in text else 0,
-        'has_prior_auth': 1 if 'prior auth' in text.lower() or 'authorization' in text.lower() else 0,
-        'has_denial': 1 if 'denied' in text.lower() or 'denial' in text.lower() else 0,
-        'has_appeal': 1 if 'appeal' in text.lower() else 0
-    }
-    return features
+    # Same keyword checks as the batch extractor (one substring search per keyword)
+    row = claim_feature_matrix([text])[0]
+    return {name: int(value) for name, value in zip(CLAIM_FEATURE_COLS, row)}
 